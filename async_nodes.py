@@ -0,0 +1,139 @@
+import asyncio
+from pocketflow import AsyncNode
+from nodes import CreateHTMLNode, ExtractTranscriptNode, IdentifyTopicsNode, SingleCallSummaryNode, TopicBatchNode
+from utils.chunk_utils import chunk_segments, dedupe_topics, estimate_tokens, group_chunks
+from utils.concurrency import gather_bounded
+from utils.llm_utils import extract_topics_from_llm_response
+from utils.model_router import acall_routed_llm
+from utils.structured_output import SUMMARY_SCHEMA, json_mode_enabled, parse_structured, response_format_params
+from utils.youtube_utils import aget_transcript_segments, extract_video_id, get_thumbnail_url, get_video_title
+
+# Async versions of the nodes that wait on the network or disk. They reuse the
+# sync nodes' prep, post and prompts, so both flows produce the same summaries
+# and share checkpoints. Chunking, near-duplicate lookup and combining are
+# quick CPU work and stay synchronous (AsyncFlow runs them inline).
+
+class AsyncAdapterNode(AsyncNode):
+    """
+    Runs a synchronous node's prep, post and exec_fallback around its exec_async.
+    prep and post only touch the shared store, so they run inline on the event loop.
+    """
+    async def prep_async(self, shared):
+        return self.prep(shared)
+
+    async def post_async(self, shared, prep_res, exec_res):
+        return self.post(shared, prep_res, exec_res)
+
+    async def exec_fallback_async(self, prep_res, exc):
+        return self.exec_fallback(prep_res, exc)
+
+    async def _exec(self, prep_res):
+        # AsyncNode._exec, but keeping cur_retry so retries bypass the LLM cache like the sync nodes
+        for self.cur_retry in range(self.max_retries):
+            try:
+                return await self.exec_async(prep_res)
+            except Exception as e:
+                if self.cur_retry == self.max_retries - 1:
+                    return await self.exec_fallback_async(prep_res, e)
+                if self.wait > 0:
+                    await asyncio.sleep(self.wait)
+
+class AsyncCheckpointedNode(AsyncAdapterNode):
+    """Checkpointing (see CheckpointedNode) for async versions of checkpointed stages."""
+    async def _run_async(self, shared):
+        restored, action, stage_fingerprint = self.load_checkpoint(shared)
+        if restored:
+            return action
+        action = await super()._run_async(shared)
+        self.save_checkpoint(shared, stage_fingerprint, action)
+        return action
+
+class AsyncExtractTranscriptNode(AsyncAdapterNode, ExtractTranscriptNode):
+    async def exec_async(self, url):
+        """Extract transcript from YouTube video without blocking the event loop."""
+        video_id = extract_video_id(url)
+        if not video_id:
+            raise ValueError(f"Could not extract video ID from URL: {url}")
+
+        result = await aget_transcript_segments(video_id)
+        if not result:
+            raise ValueError(f"Could not get transcript for video ID: {video_id}")
+        language, segments = result
+        return video_id, language, segments, get_video_title(video_id), get_thumbnail_url(video_id)
+
+class AsyncSingleCallSummaryNode(AsyncCheckpointedNode, SingleCallSummaryNode):
+    async def exec_async(self, inputs):
+        """Summarize topics and Q&A in one call, or return None for long transcripts."""
+        transcript, title = inputs
+        if estimate_tokens(transcript) > self.max_tokens:
+            return None
+        json_mode = json_mode_enabled()
+        response = await acall_routed_llm(
+            "single_call", self.build_prompt(transcript, title, json_mode),
+            use_cache=self.cur_retry == 0, **response_format_params(json_mode)
+        )
+        return parse_structured(response, SUMMARY_SCHEMA).items
+
+class AsyncIdentifyTopicsNode(AsyncCheckpointedNode, IdentifyTopicsNode):
+    async def exec_async(self, inputs):
+        """Identify key topics, running the hierarchical map step as concurrent LLM calls."""
+        transcript, title, chunks = inputs
+        use_cache = self.cur_retry == 0
+        json_mode = json_mode_enabled()
+        format_params = response_format_params(json_mode)
+        if estimate_tokens(transcript) <= self.hierarchical_threshold:
+            response = await acall_routed_llm(
+                "topics", self.build_prompt(transcript, title, json_mode), use_cache=use_cache, **format_params
+            )
+            return extract_topics_from_llm_response(response)
+
+        if not chunks:
+            chunks = chunk_segments([{"text": transcript, "start": 0.0, "duration": 0.0}])
+
+        async def candidates_for(group):
+            prompt = self.build_candidates_prompt(group, title, json_mode)
+            return extract_topics_from_llm_response(
+                await acall_routed_llm("topic_candidates", prompt, use_cache=use_cache, **format_params)
+            )
+
+        groups = group_chunks(chunks, self.group_tokens)
+        results = await gather_bounded(candidates_for, groups, self.max_workers)
+        candidates = dedupe_topics([topic for topics in results for topic in topics])
+        if len(candidates) <= 5:
+            return candidates
+
+        reduce_prompt = self.build_reduce_prompt(candidates, title, json_mode)
+        topics = extract_topics_from_llm_response(
+            await acall_routed_llm("topic_reduce", reduce_prompt, use_cache=use_cache, **format_params)
+        )
+        return self.reduced_topics(topics, candidates)
+
+class AsyncTopicBatchNode(AsyncCheckpointedNode, TopicBatchNode):
+    """
+    Map phase with at most max_workers topics awaiting the LLM at once.
+    Results keep the original topic order, and each topic keeps its own retries.
+    """
+    def __init__(self, max_workers=4, **kwargs):
+        super().__init__(**kwargs)
+        self.max_workers = max_workers
+
+    async def _exec(self, items):
+        # AsyncAdapterNode._exec runs retries and exec_fallback for a single item
+        return await gather_bounded(super()._exec, items, self.max_workers)
+
+    async def exec_async(self, batch_item):
+        """Process a single topic to generate Q&A pairs."""
+        topic, prefix = batch_item
+        if prefix is None:
+            return topic
+        json_mode = json_mode_enabled()
+        response = await acall_routed_llm(
+            "qa", self.build_prompt(topic, prefix, json_mode),
+            use_cache=self.cur_retry == 0, **response_format_params(json_mode)
+        )
+        return self.add_questions(topic, response)
+
+class AsyncCreateHTMLNode(AsyncCheckpointedNode, CreateHTMLNode):
+    async def exec_async(self, inputs):
+        """Write the page on a worker thread so file I/O does not stall other pipelines."""
+        return await asyncio.to_thread(self.exec, inputs)
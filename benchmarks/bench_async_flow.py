@@ -0,0 +1,151 @@
+"""
+Benchmark how many concurrent video pipelines one process can drive: the async
+flow on a single event loop versus the sync flow with one thread per pipeline.
+
+The stub LLM server (with --llm-latency per call) and FakeTranscriptBackend
+(with --transcript-latency per fetch) stand in for OpenAI and YouTube, so the
+pipelines spend nearly all their time waiting, as they do in production. Each
+mode and concurrency level runs in a fresh child process, which reports wall
+time, peak thread count and peak RSS; the stub server runs in this process so
+its threads are not counted.
+
+Run from the repository root:
+    python benchmarks/bench_async_flow.py
+    python benchmarks/bench_async_flow.py --flows 50 200 500 --llm-latency 0.5
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_openai_server import start_stub_server
+
+class ThreadSampler:
+    """Records the highest number of live threads while the pipelines run."""
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count() - 1)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+def run_child(mode, flows, args):
+    """Run `flows` pipelines concurrently in this process and print the measurements as JSON."""
+    import asyncio
+    import contextlib
+    import io
+    from concurrent.futures import ThreadPoolExecutor
+    from flow import create_shared_store, create_youtube_summarizer_flow
+    from utils.fakes import FakeTranscriptBackend, fake_video_ids
+    from utils.youtube_utils import set_transcript_backend
+
+    set_transcript_backend(FakeTranscriptBackend(n_segments=args.segments, latency=args.transcript_latency))
+    flow = create_youtube_summarizer_flow(max_workers=args.topic_workers, interactive=False,
+                                          use_async=mode == "async")
+    stores = []
+    for video_id in fake_video_ids(flows, seed=args.seed):
+        shared = create_shared_store(f"https://www.youtube.com/watch?v={video_id}")
+        shared["output_dir"] = os.environ["BENCH_OUTPUT_DIR"]
+        stores.append(shared)
+
+    async def run_async_flows():
+        return await asyncio.gather(*(flow.run_async(shared) for shared in stores), return_exceptions=True)
+
+    def run_sync(shared):
+        try:
+            return flow.run(shared)
+        except Exception as e:
+            return e
+
+    start = time.perf_counter()
+    # Silence per-node progress output
+    with contextlib.redirect_stdout(io.StringIO()), ThreadSampler() as sampler:
+        if mode == "async":
+            results = asyncio.run(run_async_flows())
+        else:
+            with ThreadPoolExecutor(max_workers=flows) as pool:
+                results = list(pool.map(run_sync, stores))
+    elapsed = time.perf_counter() - start
+
+    done = sum(1 for result, shared in zip(results, stores)
+               if not isinstance(result, Exception) and shared.get("output_file"))
+    print(json.dumps({
+        "seconds": elapsed,
+        "done": done,
+        "failed": flows - done,
+        "threads": sampler.peak,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flows", type=int, nargs="+", default=[50, 200, 500], help="concurrent pipelines")
+    parser.add_argument("--modes", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+    parser.add_argument("--segments", type=int, default=400, help="caption segments per fake transcript")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="stub LLM latency in seconds")
+    parser.add_argument("--transcript-latency", type=float, default=0.3, help="transcript fetch latency in seconds")
+    parser.add_argument("--topic-workers", type=int, default=4, help="map phase concurrency per pipeline")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "FLOWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], int(args.child[1]), args)
+        return
+
+    _, state, llm_url = start_stub_server(latency=args.llm_latency)
+    print(f"{'mode':<6} {'flows':>6} {'done':>6} {'failed':>6} {'seconds':>8} {'flows/s':>8} "
+          f"{'threads':>8} {'RSS MB':>7}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for flows in args.flows:
+            for mode in args.modes:
+                run_dir = os.path.join(workdir, f"{mode}_{flows}")
+                os.makedirs(run_dir)
+                env = dict(
+                    os.environ,
+                    OPENAI_BASE_URL=llm_url,
+                    OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "stub"),
+                    LLM_CACHE_DISABLE="1",
+                    CHECKPOINT_DISABLE="1",
+                    NEAR_DUP_DISABLE="1",
+                    SUMMARY_DB_DISABLE="1",
+                    LLM_RPM="0",
+                    LLM_TPM="0",
+                    # Enough connections that the pool is not the limit for either mode
+                    LLM_POOL_SIZE=str(flows * args.topic_workers),
+                    TRANSCRIPT_CACHE_DIR=os.path.join(run_dir, "transcripts"),
+                    BENCH_OUTPUT_DIR=run_dir,
+                )
+                child = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", mode, str(flows),
+                     "--segments", str(args.segments), "--transcript-latency", str(args.transcript_latency),
+                     "--topic-workers", str(args.topic_workers), "--seed", str(args.seed)],
+                    env=env, capture_output=True, text=True, check=True,
+                )
+                m = json.loads(child.stdout.strip().splitlines()[-1])
+                print(f"{mode:<6} {flows:>6} {m['done']:>6} {m['failed']:>6} {m['seconds']:>8.2f} "
+                      f"{m['done'] / m['seconds']:>8.1f} {m['threads']:>8} {m['rss_mb']:>7.0f}")
+    print(f"Stub LLM served {state.requests} requests")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Report map-phase prompt tokens with and without transcript chunking.
+
+Run from the repository root:
+    python benchmarks/bench_chunking.py --topics 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nodes import ChunkTranscriptNode, TopicBatchNode
+
+VOCABULARY = [
+    "python", "database", "network", "cooking", "travel", "music", "finance",
+    "history", "physics", "design", "marketing", "health", "garden", "camera",
+]
+
+def make_segments(n_segments, seed=0):
+    """Synthetic captions where each stretch of the video focuses on one subject."""
+    rng = random.Random(seed)
+    segments = []
+    for i in range(n_segments):
+        subject = VOCABULARY[(i * len(VOCABULARY)) // n_segments]
+        filler = " ".join(rng.choice(VOCABULARY) for _ in range(3))
+        segments.append({"text": f"now about {subject} and more {subject} with {filler}", "start": i * 4.0, "duration": 4.0})
+    return segments
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--topics", type=int, default=5)
+    parser.add_argument("--sizes", default="200,1000,5000,20000", help="comma-separated caption segment counts")
+    args = parser.parse_args()
+
+    print(f"{'segments':>9} {'transcript':>11} {'unchunked':>10} {'chunked':>9} {'saved':>6} {'prep (s)':>9}")
+    for n_segments in [int(x) for x in args.sizes.split(",")]:
+        shared = {"title": "Benchmark video", "transcript_segments": make_segments(n_segments)}
+        shared["transcript"] = " ".join(s["text"] for s in shared["transcript_segments"])
+        shared["topics"] = [
+            {"topic": subject.title(), "summary": f"Discussion of {subject}", "questions": []}
+            for subject in VOCABULARY[:args.topics]
+        ]
+
+        start = time.perf_counter()
+        ChunkTranscriptNode().run(shared)
+        batch_node = TopicBatchNode()
+        prep_res = batch_node.prep(shared)
+        elapsed = time.perf_counter() - start
+        batch_node.post(shared, prep_res, [topic for topic, _ in prep_res])
+
+        stats = shared["map_token_stats"]
+        saved = stats["saved_tokens"] / stats["unchunked_tokens"] if stats["unchunked_tokens"] else 0
+        print(f"{n_segments:>9} {stats['full_transcript_tokens']:>11} {stats['unchunked_tokens']:>10} "
+              f"{stats['sent_tokens']:>9} {saved:>6.0%} {elapsed:>9.3f}")
+
+if __name__ == "__main__":
+    main()
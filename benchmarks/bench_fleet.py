@@ -0,0 +1,102 @@
+"""
+Benchmark the multi-process fleet runner offline: the stub LLM server and
+synthetic transcripts stand in for OpenAI and YouTube.
+
+Runs the same catalog with one worker process and with --workers processes
+and reports throughput for each. --kill-after kills one worker mid-run to
+exercise requeueing of a dead worker's jobs.
+
+Run from the repository root:
+    python benchmarks/bench_fleet.py --videos 400 --workers 4 --threads 2 --llm-latency 0.02
+"""
+import argparse
+import os
+import signal
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_openai_server import start_stub_server
+
+def kill_one_worker(queue_path, delay):
+    """After delay seconds, SIGKILL the first worker process seen running a job."""
+    time.sleep(delay)
+    while True:
+        conn = sqlite3.connect(queue_path, timeout=60)
+        row = conn.execute(
+            "SELECT w.worker, w.pid FROM workers w JOIN jobs j ON j.worker = w.worker"
+            " WHERE w.alive = 1 AND j.status = 'running' LIMIT 1"
+        ).fetchone()
+        conn.close()
+        if row:
+            print(f"Killing worker {row[0]} (pid {row[1]})")
+            os.kill(row[1], signal.SIGKILL)
+            return
+        time.sleep(0.1)
+
+def run_once(urls_file, workdir, workers, args):
+    from fleet import run_fleet
+    queue_path = os.path.join(workdir, f"fleet_{workers}.db")
+    if args.kill_after and workers > 1:
+        threading.Thread(target=kill_one_worker, args=(queue_path, args.kill_after), daemon=True).start()
+    start = time.perf_counter()
+    counts = run_fleet(
+        urls_file, queue_path, workers, args.threads, args.batch_size,
+        output_dir=os.path.join(workdir, f"out_{workers}"),
+        flow_options={"max_workers": 2},
+        fake_transcripts={"n_segments": args.segments},
+        progress_interval=1.0,
+    )
+    return counts, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--videos", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=2, help="pipelines per worker process")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--segments", type=int, default=300, help="caption segments per fake transcript")
+    parser.add_argument("--llm-latency", type=float, default=0.02, help="stub LLM latency in seconds")
+    parser.add_argument("--kill-after", type=float, default=0.0, help="kill one worker after this many seconds")
+    args = parser.parse_args()
+
+    from utils.fakes import fake_video_ids
+
+    _, state, llm_url = start_stub_server(latency=args.llm_latency)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.update({
+            "OPENAI_BASE_URL": llm_url,
+            "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "stub"),
+            "LLM_CACHE_DISABLE": "1",
+            "CHECKPOINT_DISABLE": "1",
+            "NEAR_DUP_DISABLE": "1",
+            "SUMMARY_DB_DISABLE": "1",
+            "LLM_RPM": "0",
+            "LLM_TPM": "0",
+            "TRACE_DISABLE": "1",
+            "TRANSCRIPT_CACHE_DIR": os.path.join(workdir, "transcripts"),
+        })
+        urls_file = os.path.join(workdir, "urls.txt")
+        with open(urls_file, "w", encoding="utf-8") as f:
+            f.writelines(f"https://www.youtube.com/watch?v={vid}\n" for vid in fake_video_ids(args.videos))
+
+        results = {}
+        for workers in sorted({1, args.workers}):
+            print(f"\n=== {workers} worker process(es) x {args.threads} threads ===")
+            results[workers] = run_once(urls_file, workdir, workers, args)
+
+    print(f"\n{'workers':>8} {'done':>6} {'failed':>7} {'seconds':>8} {'videos/s':>9}")
+    for workers, (counts, elapsed) in results.items():
+        print(f"{workers:>8} {counts['done']:>6} {counts['failed']:>7} {elapsed:>8.2f} {counts['done'] / elapsed:>9.2f}")
+    print(f"Stub LLM served {state.requests} requests")
+    if len(results) > 1:
+        speedup = (results[args.workers][0]["done"] / results[args.workers][1]) / (results[1][0]["done"] / results[1][1])
+        print(f"Speedup with {args.workers} workers: {speedup:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Render a summary with thousands of topics and Q&As and compare time and
+peak memory of the original string-concatenation renderer against the
+template-compiled streaming renderer.
+
+Run from the repository root:
+    python benchmarks/bench_html.py --topics 5000 --questions 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.html_utils import SUMMARY_CSS, iter_html, save_html
+
+def legacy_generate_html(title, topics, video_id=None, thumbnail_url=None):
+    """The previous renderer: repeated += on one string, CSS re-emitted on every page, no escaping."""
+    html = f"""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <title>{title} - Summary</title>
+        <style>{SUMMARY_CSS}</style>
+    </head>
+    <body>
+        <header>
+            <h1>{title}</h1>
+            <p class="subtitle">Video Summary</p>
+        </header>
+    """
+    if thumbnail_url and video_id:
+        html += f"""
+        <div class="video-container">
+            <img src="{thumbnail_url}" alt="Video thumbnail" class="thumbnail">
+            <a href="https://www.youtube.com/watch?v={video_id}" target="_blank" class="watch-button">Watch on YouTube</a>
+        </div>
+        """
+    html += '<div class="topics-container">'
+    for topic in topics:
+        html += f"""
+        <div class="topic">
+            <h2>{topic['topic']}</h2>
+            <p>{topic['summary']}</p>
+        """
+        if 'questions' in topic and topic['questions']:
+            for qa in topic['questions']:
+                html += f"""
+                <div class="question">
+                    <strong>Q:</strong> {qa['question']}
+                </div>
+                <div class="answer">
+                    <strong>A:</strong> {qa['answer']}
+                </div>
+                """
+        html += "</div>"
+    html += """
+        </div>
+        <footer>Generated by YouTube Video Summarizer</footer>
+    </body>
+    </html>
+    """
+    return html
+
+def make_topics(n_topics, n_questions):
+    return [
+        {
+            "topic": f"Topic {i} <with> & special \"chars\"",
+            "summary": "A summary sentence that is reasonably long. " * 5,
+            "questions": [
+                {"question": f"Question {j} about topic {i}?", "answer": "An answer that spans a couple of sentences. " * 4}
+                for j in range(n_questions)
+            ],
+        }
+        for i in range(n_topics)
+    ]
+
+def measure(fn):
+    """Time one untraced run, then measure peak allocations in a second run under tracemalloc."""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--topics", type=int, default=5000)
+    parser.add_argument("--questions", type=int, default=3)
+    args = parser.parse_args()
+
+    topics = make_topics(args.topics, args.questions)
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.html")
+        stream_path = os.path.join(tmp, "stream.html")
+        runs = (
+            ("legacy +=", lambda: save_html(legacy_generate_html("Benchmark", topics, "dQw4w9WgXcQ", "thumb.jpg"), legacy_path)),
+            ("streaming", lambda: save_html(iter_html("Benchmark", topics, "dQw4w9WgXcQ", "thumb.jpg", "summary.css"), stream_path)),
+        )
+        # The streaming renderer also HTML-escapes every field, which the legacy one skipped
+        print(f"{args.topics} topics x {args.questions} Q&As")
+        print(f"{'renderer':<10} {'time (s)':>9} {'peak MiB':>9} {'file MiB':>9}")
+        for name, fn in runs:
+            elapsed, peak = measure(fn)
+            path = legacy_path if name.startswith("legacy") else stream_path
+            size = os.path.getsize(path)
+            print(f"{name:<10} {elapsed:>9.3f} {peak / 2**20:>9.2f} {size / 2**20:>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Measure IdentifyTopicsNode latency as the transcript grows, using a fake LLM
+whose latency increases with prompt size.
+
+Run from the repository root:
+    python benchmarks/bench_identify_topics.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nodes import ChunkTranscriptNode, IdentifyTopicsNode
+from utils import model_router
+from utils.chunk_utils import estimate_tokens
+
+def make_fake_llm(base_latency, per_1k_tokens, calls):
+    """Fake LLM: latency = base + per_1k_tokens * prompt size, returns distinct topics per call."""
+    def fake_call_llm(prompt, **kwargs):
+        tokens = estimate_tokens(prompt)
+        calls.append(tokens)
+        time.sleep(base_latency + per_1k_tokens * tokens / 1000)
+        n = len(calls)
+        return (
+            "```yaml\ntopics:\n"
+            f"  - topic: \"Subject {n}a\"\n    summary: \"Summary {n}a\"\n"
+            f"  - topic: \"Subject {n}b\"\n    summary: \"Summary {n}b\"\n```"
+        )
+    return fake_call_llm
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="5000,20000,80000,160000", help="transcript sizes in words")
+    parser.add_argument("--threshold", type=int, default=12000, help="hierarchical threshold in tokens")
+    parser.add_argument("--base-latency", type=float, default=0.05)
+    parser.add_argument("--per-1k-tokens", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=32, help="chunk groups in flight (TOPIC_MAP_CONCURRENCY)")
+    args = parser.parse_args()
+    # One model per call, so calls are counted without cascade escalations
+    os.environ["LLM_ROUTING"] = "strong"
+
+    print(f"{'words':>8} {'tokens':>8} {'mode':>12} {'calls':>6} {'max prompt':>11} {'wall (s)':>9}")
+    for words in [int(x) for x in args.sizes.split(",")]:
+        segments = [{"text": f"word{i % 500} " * 10, "start": i * 5.0, "duration": 5.0} for i in range(words // 10)]
+        shared = {"transcript_segments": segments, "title": "Benchmark"}
+        shared["transcript"] = " ".join(s["text"] for s in segments)
+        ChunkTranscriptNode().run(shared)
+
+        calls = []
+        model_router.call_llm = make_fake_llm(args.base_latency, args.per_1k_tokens, calls)
+        node = IdentifyTopicsNode(hierarchical_threshold=args.threshold, max_workers=args.workers)
+        start = time.perf_counter()
+        node.run(shared)
+        elapsed = time.perf_counter() - start
+
+        tokens = estimate_tokens(shared["transcript"])
+        mode = "hierarchical" if tokens > args.threshold else "single"
+        print(f"{words:>8} {tokens:>8} {mode:>12} {len(calls):>6} {max(calls):>11} {elapsed:>9.2f}")
+
+if __name__ == "__main__":
+    main()
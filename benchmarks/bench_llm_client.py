@@ -0,0 +1,51 @@
+"""
+Compare a fresh OpenAI client per call with the shared pooled client,
+against the local stub server.
+
+Run from the repository root:
+    python benchmarks/bench_llm_client.py --calls 50 --threads 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_openai_server import start_stub_server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    server, state, base_url = start_stub_server(latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ["LLM_CACHE_DISABLE"] = "1"
+
+    from openai import OpenAI
+    from utils.concurrency import map_bounded
+    from utils.llm_utils import call_llm
+
+    def per_call_client(i):
+        client = OpenAI(api_key=os.environ["OPENAI_API_KEY"], base_url=base_url)
+        return client.chat.completions.create(model="stub", messages=[{"role": "user", "content": f"prompt {i}"}])
+
+    def shared_client(i):
+        return call_llm(f"prompt {i}")
+
+    print(f"{'mode':<16} {'wall (s)':>9} {'ms/call':>8} {'connections':>12}")
+    for name, fn in (("client per call", per_call_client), ("shared client", shared_client)):
+        state.connections = 0
+        start = time.perf_counter()
+        map_bounded(fn, range(args.calls), args.threads)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<16} {elapsed:>9.3f} {1000 * elapsed / args.calls:>8.2f} {state.connections:>12}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark tiered model routing against a stub server emulating two models.
+
+The stub answers the fast model quickly but gives a --weak-rate share of weak
+responses (one topic without a summary, terse answers); the strong model is
+slower and always answers in full. Each routing policy summarizes the same
+fake videos: "strong" sends every call to the strong model, "fast" to the fast
+one, and "cascade" tries the fast model first and escalates weak responses.
+For each weak rate and policy this reports calls per tier, escalations, wall
+seconds and cost per video at the tiers' prices, and the share of weak responses
+that made it into the summaries.
+
+Run from the repository root:
+    python benchmarks/bench_model_routing.py
+    python benchmarks/bench_model_routing.py --weak-rates 0 0.2 0.5 --fast-latency 0.02 --strong-latency 0.2
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_openai_server import ModelProfile, start_stub_server
+
+POLICIES = ("strong", "fast", "cascade")
+FAST, STRONG = "stub-fast", "stub-strong"
+
+def weak_share(topics):
+    """Share of topics and answers in a summary that came from weak responses."""
+    topic_count = len(topics)
+    answers = [qa["answer"] for topic in topics for qa in topic.get("questions", [])]
+    weak = sum(not topic.get("summary") for topic in topics) + sum(answer == "A stub." for answer in answers)
+    return weak / max(topic_count + len(answers), 1)
+
+def run_policy(policy, videos, segments, workdir, seed):
+    """Summarize `videos` fake videos with one routing policy; returns (seconds, router metrics, weak share)."""
+    from flow import create_shared_store, create_youtube_summarizer_flow
+    from utils.fakes import FakeTranscriptBackend, fake_video_ids
+    from utils.model_router import get_model_router
+    from utils.transcript_store import TranscriptStore
+    from utils.youtube_utils import set_transcript_backend, set_transcript_store
+
+    os.environ["LLM_ROUTING"] = policy
+    set_transcript_backend(FakeTranscriptBackend(n_segments=segments))
+    set_transcript_store(TranscriptStore(os.path.join(workdir, "transcripts")))
+    output_dir = os.path.join(workdir, policy)
+    os.makedirs(output_dir, exist_ok=True)
+    router = get_model_router()
+    before = router.metrics()
+    weak, elapsed = [], 0.0
+    for video_id in fake_video_ids(videos, seed=seed):
+        shared = create_shared_store(f"https://www.youtube.com/watch?v={video_id}")
+        shared["output_dir"] = output_dir
+        flow = create_youtube_summarizer_flow(interactive=False, single_call_threshold=0)
+        start = time.perf_counter()
+        flow.run(shared)
+        elapsed += time.perf_counter() - start
+        weak.append(weak_share(shared["topics"]))
+    after = router.metrics()
+    # The router is shared per configuration, so report only this run's share of its counters
+    for name, tier in after["tiers"].items():
+        for key in ("calls", "seconds", "cost_usd"):
+            tier[key] -= before["tiers"][name][key]
+    after["escalations"] = sum(after["escalations"].values()) - sum(before["escalations"].values())
+    return elapsed, after, sum(weak) / len(weak)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=5, help="videos per weak rate and policy")
+    parser.add_argument("--segments", type=int, default=200, help="caption segments per transcript")
+    parser.add_argument("--weak-rates", type=float, nargs="+", default=[0.0, 0.1, 0.3],
+                        help="shares of weak fast-model responses")
+    parser.add_argument("--fast-latency", type=float, default=0.02, help="fast model seconds per call")
+    parser.add_argument("--strong-latency", type=float, default=0.1, help="strong model seconds per call")
+    parser.add_argument("--policies", nargs="+", choices=POLICIES, default=list(POLICIES))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    _, state, llm_url = start_stub_server(seed=args.seed, models={
+        FAST: ModelProfile(args.fast_latency),
+        STRONG: ModelProfile(args.strong_latency),
+    })
+    os.environ.update({
+        "OPENAI_BASE_URL": llm_url,
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "stub"),
+        "LLM_FAST_MODEL": FAST,
+        "LLM_STRONG_MODEL": STRONG,
+        "LLM_FAST_PRICE": os.environ.get("LLM_FAST_PRICE", "0.15,0.60"),
+        "LLM_STRONG_PRICE": os.environ.get("LLM_STRONG_PRICE", "2.50,10.00"),
+        "LLM_CACHE_DISABLE": "1",
+        "CHECKPOINT_DISABLE": "1",
+        "NEAR_DUP_DISABLE": "1",
+        "SUMMARY_DB_DISABLE": "1",
+        "LLM_RPM": "0",
+        "LLM_TPM": "0",
+    })
+
+    # Build the client up front so its import is not timed as part of the first policy
+    from utils.llm_client import get_client
+    get_client()
+
+    print(f"{'weak':>5} {'policy':<8} {'fast':>5} {'strong':>6} {'escal':>6} {'s/video':>8} "
+          f"{'$/video':>9} {'weak kept':>9}")
+    for weak_rate in args.weak_rates:
+        state.models[FAST].weak_rate = weak_rate
+        for policy in args.policies:
+            # Silence per-node progress output and escalation messages
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed, metrics, weak = run_policy(policy, args.videos, args.segments, workdir, args.seed)
+            tiers = metrics["tiers"]
+            cost = sum(tier["cost_usd"] for tier in tiers.values())
+            print(f"{weak_rate:>5.0%} {policy:<8} {tiers['fast']['calls']:>5} {tiers['strong']['calls']:>6} "
+                  f"{metrics['escalations']:>6} {elapsed / args.videos:>8.3f} {cost / args.videos:>9.5f} {weak:>9.0%}")
+    print(f"\nStub LLM served {state.requests} requests ({state.model_requests}), {state.weak_replies} weak.")
+    print("Cascade keeps fast-model prices while weak responses are rare; each escalation pays for both calls.")
+
+if __name__ == "__main__":
+    main()
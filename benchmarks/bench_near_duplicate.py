@@ -0,0 +1,122 @@
+"""
+Benchmark the near-duplicate transcript index: build throughput, lookup
+latency and throughput at catalog scale, and how reliably re-uploads and clips
+are found.
+
+The index is filled with --docs videos. Most are filler entries with random
+MinHash signatures (computing real signatures for a million synthetic
+transcripts would dominate the run, and random signatures never collide, so
+they only add index size). On top of those, --real fake transcripts are
+indexed with real signatures and queried three ways: as a re-upload with
+small caption differences, as a clip (the first 60% of the video) and as an
+unrelated video.
+
+Run from the repository root:
+    python benchmarks/bench_near_duplicate.py --docs 100000
+    python benchmarks/bench_near_duplicate.py --docs 1000000 --queries 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.fakes import FakeTranscriptBackend, fake_video_ids
+from utils.near_duplicate import NUM_PERM, NearDuplicateIndex, transcript_signature
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def reupload(segments, rng, rate=0.05):
+    """Same captions with a rate share of segments re-transcribed slightly differently."""
+    result = []
+    for segment in segments:
+        words = segment["text"].split()
+        if rng.random() < rate:
+            words[rng.randrange(len(words))] = rng.choice(["uh", "um", "the", "and"])
+        result.append(" ".join(words))
+    return " ".join(result)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100000, help="videos in the index")
+    parser.add_argument("--real", type=int, default=200, help="indexed fake transcripts queried for accuracy")
+    parser.add_argument("--queries", type=int, default=1000, help="lookups timed against the full index")
+    parser.add_argument("--segments", type=int, default=300, help="caption segments per fake transcript")
+    parser.add_argument("--threshold", type=float, default=0.7, help="similarity (or clip containment) to reuse")
+    parser.add_argument("--batch", type=int, default=20000, help="filler videos indexed per transaction")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    backend = FakeTranscriptBackend(n_segments=args.segments)
+    real_ids = fake_video_ids(args.real * 2, seed=args.seed)
+    indexed_ids, unrelated_ids = real_ids[:args.real], real_ids[args.real:]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "near_duplicates.db")
+        index = NearDuplicateIndex(path)
+
+        start = time.perf_counter()
+        signatures = [transcript_signature(" ".join(s["text"] for s in backend.segments(vid))) for vid in indexed_ids]
+        signature_seconds = (time.perf_counter() - start) / len(indexed_ids)
+        index.add_many([(vid, sig, n) for vid, (sig, n) in zip(indexed_ids, signatures)])
+
+        filler = args.docs - args.real
+        start = time.perf_counter()
+        for offset in range(0, filler, args.batch):
+            count = min(args.batch, filler - offset)
+            index.add_many([
+                (f"filler{offset + i:08d}", array("I", os.urandom(4 * NUM_PERM)), rng.randint(500, 5000))
+                for i in range(count)
+            ])
+        build_seconds = time.perf_counter() - start
+        size = os.path.getsize(path) + sum(
+            os.path.getsize(path + suffix) for suffix in ("-wal",) if os.path.exists(path + suffix)
+        )
+        print(f"Indexed {len(index)} videos: {filler / build_seconds:,.0f} videos/s, "
+              f"{size / 1024 / 1024:.0f} MB ({size / len(index):.0f} bytes/video)")
+        print(f"Transcript signature ({args.segments} segments): {signature_seconds * 1000:.1f} ms")
+
+        # Re-uploads, clips and unrelated videos of the real transcripts
+        cases = []
+        for vid in indexed_ids:
+            segments = backend.segments(vid)
+            cases.append(("re-upload", vid, reupload(segments, rng)))
+            cases.append(("clip", vid, " ".join(s["text"] for s in segments[:len(segments) * 6 // 10])))
+        for vid in unrelated_ids:
+            cases.append(("unrelated", None, " ".join(s["text"] for s in backend.segments(vid))))
+        queries = [(kind, source, transcript_signature(text)) for kind, source, text in cases]
+
+        found = {"re-upload": 0, "clip": 0, "unrelated": 0}
+        totals = {"re-upload": 0, "clip": 0, "unrelated": 0}
+        for kind, source, (signature, shingles) in queries:
+            totals[kind] += 1
+            for match in index.query(signature, shingles):
+                if match.jaccard >= args.threshold or match.containment >= args.threshold:
+                    found[kind] += match.video_id == source if source else 1
+                    break
+
+        timed = [rng.choice(queries) for _ in range(args.queries)]
+        latencies = []
+        start = time.perf_counter()
+        for _, _, (signature, shingles) in timed:
+            begin = time.perf_counter()
+            index.query(signature, shingles)
+            latencies.append(time.perf_counter() - begin)
+        elapsed = time.perf_counter() - start
+
+        print(f"\nLookups against {len(index):,} videos: {len(timed) / elapsed:,.0f}/s, "
+              f"p50 {percentile(latencies, 50) * 1e6:.0f} us, p99 {percentile(latencies, 99) * 1e6:.0f} us "
+              f"(plus {signature_seconds * 1000:.1f} ms to fingerprint the transcript)")
+        print(f"Re-uploads reused: {found['re-upload']}/{totals['re-upload']}, "
+              f"clips reused: {found['clip']}/{totals['clip']}, "
+              f"unrelated videos matched: {found['unrelated']}/{totals['unrelated']}")
+
+if __name__ == "__main__":
+    main()
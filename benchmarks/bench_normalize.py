@@ -0,0 +1,93 @@
+"""
+Benchmark transcript normalization on large synthetic captions.
+
+Generates captions the way YouTube's auto-generated tracks look: rolling lines
+that repeat the end of the previous line, [Music]/[Applause] tags, repeated
+phrases and hesitation sounds, in English and Vietnamese. "manual" captions
+have none of the overlap, so they show what normalization costs when there is
+little to remove. For each style and size this reports normalization time,
+tokens before and after, the reduction ratio and the words removed per step,
+and the prompt tokens saved per video when each of the 1 + --topics prompts
+carries the full transcript.
+
+Run from the repository root:
+    python benchmarks/bench_normalize.py
+    python benchmarks/bench_normalize.py --hours 1 5 --styles auto-vi --trim-fillers
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.fakes import FAKE_VOCABULARY
+from utils.transcript_normalize import normalize_segments
+
+VIETNAMESE_VOCABULARY = [
+    "hôm nay", "chúng ta", "bộ nhớ", "đệm", "độ trễ", "máy chủ", "dữ liệu", "người dùng",
+    "hiệu năng", "mạng", "câu hỏi", "ví dụ", "quan trọng", "tiếp theo", "rất", "nhanh",
+]
+FILLER_WORDS = {"en": ["um", "uh", "hmm"], "vi": ["ờ", "ừm", "ơ"]}
+TAGS = {"en": ["[Music]", "[Applause]", "[Laughter]"], "vi": ["[Âm nhạc]", "[Vỗ tay]", "[Tiếng cười]"]}
+STYLES = ("auto-en", "auto-vi", "manual-en")
+SEGMENTS_PER_HOUR = 900  # one caption line every 4 seconds
+
+def synthetic_captions(style, hours, seed=0):
+    """Caption segments of the given style; "auto" styles roll, repeat and carry tags and fillers."""
+    rng = random.Random(seed)
+    kind, language = style.split("-")
+    vocabulary = VIETNAMESE_VOCABULARY if language == "vi" else FAKE_VOCABULARY
+    segments, previous = [], []
+    for i in range(int(hours * SEGMENTS_PER_HOUR)):
+        if kind == "auto" and rng.random() < 0.03:
+            segments.append({"text": rng.choice(TAGS[language]), "start": i * 4.0, "duration": 4.0})
+            continue
+        words = []
+        for _ in range(rng.randint(5, 8)):
+            roll = rng.random()
+            if kind == "auto" and roll < 0.06:
+                words.append(rng.choice(FILLER_WORDS[language]))
+            elif kind == "auto" and roll < 0.08:
+                phrase = rng.choice(vocabulary) + " " + rng.choice(vocabulary)
+                words += [phrase, phrase]
+            else:
+                words.append(rng.choice(vocabulary))
+        new_words = " ".join(words).split()
+        # Rolling captions open with the last few words of the previous line
+        carried = previous[-rng.randint(3, 6):] if kind == "auto" and previous else []
+        segments.append({"text": " ".join(carried + new_words), "start": i * 4.0, "duration": 4.0})
+        previous = new_words
+    return segments
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 3, 10], help="video lengths to generate")
+    parser.add_argument("--styles", nargs="+", choices=STYLES, default=list(STYLES))
+    parser.add_argument("--trim-fillers", action="store_true", help="also remove hesitation sounds")
+    parser.add_argument("--topics", type=int, default=5, help="Q&A prompts per video that carry the transcript")
+    parser.add_argument("--runs", type=int, default=3, help="timed runs per case (best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'style':<10} {'hours':>5} {'segments':>8} {'ms':>8} {'seg/s':>9} {'raw tok':>9} {'tokens':>9} "
+          f"{'reduced':>8} {'saved/video':>12}  removed words (tags/overlap/repetition/fillers)")
+    for style in args.styles:
+        language = style.split("-")[1]
+        for hours in args.hours:
+            segments = synthetic_captions(style, hours, args.seed)
+            best = None
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                normalized, stats = normalize_segments(segments, language, args.trim_fillers)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            removed = stats["removed_words"]
+            saved = (stats["raw_tokens"] - stats["tokens"]) * (1 + args.topics)
+            print(f"{style:<10} {hours:>5g} {len(segments):>8} {best * 1000:>8.1f} {len(segments) / best:>9.0f} "
+                  f"{stats['raw_tokens']:>9} {stats['tokens']:>9} {stats['reduction']:>8.1%} {saved:>12}  "
+                  f"{removed['tags']}/{removed['overlap']}/{removed['repetition']}/{removed['fillers']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark the map phase prompt layouts against a provider-side prefix cache.
+
+"shared_prefix" opens every topic's Q&A prompt with the full transcript, the
+same prefix the topic identification call already sent, so a provider prompt
+cache serves it after the first call; "retrieval" sends each topic only its
+most relevant chunks, which are short but never cached; "auto" picks per video.
+
+The stub LLM server simulates OpenAI-style prefix caching (prompts of 1024+
+tokens, cached in 128-token blocks) and reports cached tokens in usage, like
+the real API. For each transcript size and layout this reports prompt tokens,
+the cached share, and the billed prompt tokens (uncached + cached priced at
+1 - discount) at each --discounts value. Single-call summaries are disabled so
+every video goes through the map phase.
+
+Run from the repository root:
+    python benchmarks/bench_prompt_cache.py
+    python benchmarks/bench_prompt_cache.py --segments 200 1000 --discounts 0.5 0.75 0.9
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_openai_server import PrefixCache, start_stub_server
+
+LAYOUTS = ("retrieval", "shared_prefix", "auto")
+
+def topics_reply(n_topics):
+    """
+    Stub reply naming n_topics topics, so the map phase makes one call per topic.
+    Topics are fake transcript subjects, so retrieval picks different chunks for each.
+    """
+    from utils.fakes import FAKE_VOCABULARY
+
+    lines = ["```yaml", "topics:"]
+    for subject in FAKE_VOCABULARY[:n_topics]:
+        lines += [f'  - topic: "Talking about {subject}"', f'    summary: "The part of the video about {subject}"']
+    lines += ["questions:", '  - question: "What is this?"', '    answer: "A reply from the stub server."', "```"]
+    return "\n".join(lines)
+
+def run_layout(layout, segments, videos, cache_discount, workdir, seed):
+    """Summarize `videos` fake videos with one layout; returns summed tracer totals."""
+    from flow import create_shared_store, create_youtube_summarizer_flow
+    from utils.fakes import FakeTranscriptBackend, fake_video_ids
+    from utils.tracing import RunTracer
+    from utils.transcript_store import TranscriptStore
+    from utils.youtube_utils import set_transcript_backend, set_transcript_store
+
+    set_transcript_backend(FakeTranscriptBackend(n_segments=segments))
+    set_transcript_store(TranscriptStore(os.path.join(workdir, f"transcripts_{segments}")))
+    output_dir = os.path.join(workdir, f"{layout}_{segments}")
+    os.makedirs(output_dir, exist_ok=True)
+    totals = {}
+    for video_id in fake_video_ids(videos, seed=seed):
+        shared = create_shared_store(f"https://www.youtube.com/watch?v={video_id}")
+        shared["output_dir"] = output_dir
+        flow = create_youtube_summarizer_flow(interactive=False, single_call_threshold=0,
+                                              prompt_layout=layout, cache_discount=cache_discount)
+        tracer = RunTracer("prompt_cache", video_id=video_id)
+        with tracer:
+            flow.run(shared)
+        for key, value in tracer.root.totals().items():
+            totals[key] = totals.get(key, 0) + value
+        totals["shared_prefix_videos"] = (totals.get("shared_prefix_videos", 0)
+                                          + shared["map_token_stats"]["shared_prefix"])
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, nargs="+", default=[100, 400, 1000],
+                        help="caption segments per transcript (about 12 tokens each)")
+    parser.add_argument("--videos", type=int, default=3, help="videos per transcript size and layout")
+    parser.add_argument("--topics", type=int, default=5, help="topics the stub LLM returns")
+    parser.add_argument("--layouts", nargs="+", choices=LAYOUTS, default=list(LAYOUTS))
+    parser.add_argument("--discounts", type=float, nargs="+", default=[0.5, 0.9],
+                        help="cached token discounts to price the runs at")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    _, state, llm_url = start_stub_server(reply=topics_reply(args.topics), prefix_cache=True)
+    os.environ.update({
+        "OPENAI_BASE_URL": llm_url,
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "stub"),
+        "LLM_CACHE_DISABLE": "1",
+        "CHECKPOINT_DISABLE": "1",
+        "NEAR_DUP_DISABLE": "1",
+        "SUMMARY_DB_DISABLE": "1",
+        "LLM_RPM": "0",
+        "LLM_TPM": "0",
+    })
+
+    print(f"{'segments':>8} {'layout':<14} {'auto@':>5} {'shared':>6} {'calls':>6} {'prompt tok':>11} "
+          f"{'cached':>7} " + " ".join(f"{f'billed@{d:g}':>11}" for d in args.discounts))
+    for segments in args.segments:
+        for layout in args.layouts:
+            # auto decides with the discount it is told, so it runs once per discount
+            discounts = args.discounts if layout == "auto" else args.discounts[:1]
+            for decided_at in discounts:
+                # Every run starts with a cold provider cache
+                state.prefix_cache = PrefixCache()
+                # Silence per-node progress output
+                with contextlib.redirect_stdout(io.StringIO()):
+                    totals = run_layout(layout, segments, args.videos, decided_at, workdir, args.seed)
+                prompt = totals.get("prompt_tokens", 0) / args.videos
+                cached = totals.get("cached_prompt_tokens", 0) / args.videos
+                billed = " ".join(f"{prompt - cached * d:>11.0f}" for d in args.discounts)
+                print(f"{segments:>8} {layout:<14} {f'{decided_at:g}' if layout == 'auto' else '-':>5} "
+                      f"{totals['shared_prefix_videos']:>3}/{args.videos:<2} {totals.get('llm_calls', 0) / args.videos:>6.1f} "
+                      f"{prompt:>11.0f} {cached / max(prompt, 1):>7.0%} {billed}")
+    print(f"\nPer video averages. Stub LLM served {state.requests} requests, "
+          f"{state.cached_tokens} of {state.prompt_tokens} prompt tokens from its prefix cache.")
+    print("Shared prefixes pay for the full transcript on every topic at the cached rate, so retrieval "
+          "stays cheaper for long transcripts unless the discount is large.")
+
+if __name__ == "__main__":
+    main()
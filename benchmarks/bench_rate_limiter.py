@@ -0,0 +1,56 @@
+"""
+Drive many concurrent LLM calls through the shared limiter against a stub
+server that answers a fraction of requests with 429 + Retry-After.
+
+Run from the repository root:
+    python benchmarks/bench_rate_limiter.py --calls 200 --threads 32 --rpm 600
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_openai_server import start_stub_server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--rpm", type=int, default=600)
+    parser.add_argument("--tpm", type=int, default=0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.1)
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    args = parser.parse_args()
+
+    server, state, base_url = start_stub_server(
+        latency=0.01, rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after
+    )
+    os.environ.update({
+        "OPENAI_BASE_URL": base_url,
+        "LLM_CACHE_DISABLE": "1",
+        "LLM_RPM": str(args.rpm),
+        "LLM_TPM": str(args.tpm),
+        "LLM_BACKOFF_BASE": "0.2",
+    })
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    from utils.concurrency import map_bounded
+    from utils.llm_utils import call_llm
+    from utils.rate_limiter import get_rate_limiter
+
+    start = time.perf_counter()
+    results = map_bounded(lambda i: call_llm(f"prompt {i}"), range(args.calls), args.threads)
+    elapsed = time.perf_counter() - start
+
+    failed = sum(1 for r in results if r is None)
+    # The bucket holds one minute of budget, so short runs can burst above the per-minute rate
+    print(f"{args.calls} calls on {args.threads} threads in {elapsed:.2f}s, {failed} failed")
+    print(f"server: {state.requests} requests, {state.rate_limited} answered 429")
+    print(f"limiter: {get_rate_limiter().metrics()}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
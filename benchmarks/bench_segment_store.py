@@ -0,0 +1,90 @@
+"""
+Compare the memory-mapped SegmentArray transcript format with the previous
+JSON list of segment dicts: load time, Python heap held by concurrent jobs
+reading the same video (with and without decoding the full transcript string
+the prompts use), and time-range slicing.
+
+Run from the repository root:
+    python benchmarks/bench_segment_store.py --segments 20000 --jobs 16
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.fakes import FakeTranscriptBackend
+from utils.segment_store import SegmentArray
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        segments = json.load(f)
+    return segments, " ".join(segment["text"] for segment in segments)
+
+def load_mapped(path):
+    segments = SegmentArray.load(path)
+    return segments, segments.text()
+
+def load_mapped_lazy(path):
+    """Segments only; text is decoded per slice when needed."""
+    return SegmentArray.load(path), None
+
+def held_memory(load, path, jobs):
+    """Python heap held while `jobs` loaded copies of the transcript are alive, and load seconds per job."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = [load(path) for _ in range(jobs)]
+    elapsed = (time.perf_counter() - start) / jobs
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return current, elapsed
+
+def slice_list(segments, start, end):
+    return [s for s in segments if s["start"] + s["duration"] > start and s["start"] < end]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--segments", type=int, default=20000, help="caption segments in the transcript")
+    parser.add_argument("--jobs", type=int, default=16, help="concurrent jobs holding the same transcript")
+    parser.add_argument("--slices", type=int, default=2000, help="time-range slices to time")
+    args = parser.parse_args()
+
+    segments = FakeTranscriptBackend(n_segments=args.segments).segments("benchmark")
+    duration = segments[-1]["start"] + segments[-1]["duration"]
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "en.json")
+        seg_path = os.path.join(tmp, "en.seg")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(segments, f, ensure_ascii=False)
+        SegmentArray.from_segments(segments).save(seg_path)
+        print(f"{args.segments} segments ({duration / 3600:.1f}h): "
+              f"JSON {os.path.getsize(json_path) / 1024:.0f} KB, segment file {os.path.getsize(seg_path) / 1024:.0f} KB")
+
+        print(f"\n{'format':<20} {'load ms':>8} {'heap for ' + str(args.jobs) + ' jobs':>18}")
+        rows = (("json", load_json, json_path), ("mmap", load_mapped, seg_path),
+                ("mmap, no full text", load_mapped_lazy, seg_path))
+        for name, load, path in rows:
+            memory, elapsed = held_memory(load, path, args.jobs)
+            print(f"{name:<20} {elapsed * 1000:>8.2f} {memory / 1024 / 1024:>15.1f} MB")
+
+        mapped = SegmentArray.load(seg_path)
+        windows = [(i * duration / args.slices, i * duration / args.slices + 60) for i in range(args.slices)]
+        start = time.perf_counter()
+        for lo, hi in windows[:200]:
+            " ".join(s["text"] for s in slice_list(segments, lo, hi))
+        list_seconds = (time.perf_counter() - start) / 200
+        start = time.perf_counter()
+        for lo, hi in windows:
+            mapped.slice_time(lo, hi).text()
+        mapped_seconds = (time.perf_counter() - start) / len(windows)
+        print(f"\n60s time-range slice + text: list scan {list_seconds * 1e6:.0f} us, "
+              f"SegmentArray {mapped_seconds * 1e6:.1f} us ({list_seconds / mapped_seconds:.0f}x)")
+        mapped.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Compare the single-call fast path with the full map-reduce flow across
+transcript sizes: wall time, LLM round trips and tokens per video.
+
+Runs the real flow against the stub LLM server (fixed latency per call) and
+synthetic transcripts. Transcripts above --threshold tokens take the full flow
+in both columns, so the two converge for long videos.
+
+Run from the repository root:
+    python benchmarks/bench_single_call.py --sizes 20 60 150 400 --llm-latency 0.3
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_openai_server import start_stub_server
+
+def run_video(video_id, threshold, workers, state, output_dir):
+    """Summarize one video; returns (seconds, LLM requests, total tokens, route)."""
+    from flow import create_shared_store, create_youtube_summarizer_flow
+    from utils.tracing import RunTracer
+
+    shared = create_shared_store(f"https://www.youtube.com/watch?v={video_id}")
+    shared["output_dir"] = output_dir
+    flow = create_youtube_summarizer_flow(max_workers=workers, interactive=False, single_call_threshold=threshold)
+    requests = state.requests
+    tracer = RunTracer("bench")
+    start = time.perf_counter()
+    with tracer:
+        flow.run(shared)
+    elapsed = time.perf_counter() - start
+    totals = tracer.root.totals()
+    tokens = totals.get("prompt_tokens", 0) + totals.get("completion_tokens", 0)
+    return elapsed, state.requests - requests, tokens, shared.get("route", "map_reduce")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 60, 150, 400],
+                        help="caption segments per transcript (about 12 tokens each)")
+    parser.add_argument("--threshold", type=int, default=4000, help="single-call token threshold")
+    parser.add_argument("--workers", type=int, default=4, help="map phase concurrency")
+    parser.add_argument("--videos", type=int, default=3, help="videos per size")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="stub LLM seconds per call")
+    args = parser.parse_args()
+
+    _, state, llm_url = start_stub_server(latency=args.llm_latency)
+    workdir = tempfile.mkdtemp()
+    os.environ.update({
+        "OPENAI_BASE_URL": llm_url,
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "stub"),
+        "LLM_CACHE_DISABLE": "1",
+        "CHECKPOINT_DISABLE": "1",
+        "NEAR_DUP_DISABLE": "1",
+        "SUMMARY_DB_DISABLE": "1",
+        "TRANSCRIPT_CACHE_DIR": os.path.join(workdir, "transcripts"),
+    })
+
+    from utils.chunk_utils import estimate_tokens
+    from utils.fakes import FakeTranscriptBackend, fake_video_ids
+    from utils.youtube_utils import set_transcript_backend
+
+    print(f"{'segments':>8} {'tokens':>7}  {'route':<14} {'seconds':>8} {'calls':>6} {'LLM tokens':>11}"
+          f"   vs full: {'seconds':>8} {'calls':>6} {'LLM tokens':>11}")
+    for size in args.sizes:
+        backend = FakeTranscriptBackend(n_segments=size)
+        set_transcript_backend(backend)
+        ids = fake_video_ids(args.videos, seed=size)
+        transcript_tokens = estimate_tokens(" ".join(s["text"] for s in backend.segments(ids[0])))
+
+        results = {}
+        # Silence per-node progress output
+        with contextlib.redirect_stdout(io.StringIO()):
+            for label, threshold in (("fast", args.threshold), ("full", 0)):
+                runs = [run_video(vid, threshold, args.workers, state, workdir) for vid in ids]
+                results[label] = (
+                    sum(r[0] for r in runs) / len(runs),
+                    sum(r[1] for r in runs) / len(runs),
+                    sum(r[2] for r in runs) / len(runs),
+                    runs[0][3],
+                )
+
+        fast, full = results["fast"], results["full"]
+        print(f"{size:>8} {transcript_tokens:>7}  {fast[3]:<14} {fast[0]:>8.2f} {fast[1]:>6.1f} {fast[2]:>11.0f}"
+              f"             {full[0]:>8.2f} {full[1]:>6.1f} {full[2]:>11.0f}")
+
+if __name__ == "__main__":
+    main()
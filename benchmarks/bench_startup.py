@@ -0,0 +1,102 @@
+"""
+Benchmark CLI and worker startup: how long importing each entry point takes,
+measured with `python -X importtime` in fresh interpreters, and which heavy
+dependencies get imported before any work is done.
+
+The project commits to a startup budget: importing an entry point must stay
+under its BUDGET_MS (cumulative import time of the module, best of --runs) and
+must not import any of DEFERRED, which load on first use instead (the LLM
+client on the first uncached call, the transcript API on the first uncached
+fetch, PyYAML on the first YAML response). The run exits with status 1 when
+either is broken, and lists the slowest imports to look at.
+
+Run from the repository root:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --modules main fleet --runs 10 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds of cumulative import time per entry point
+BUDGET_MS = {
+    "main": 150,
+    "bulk": 150,
+    "fleet": 150,
+    "server": 150,
+    # Lookup and search CLI, answering in milliseconds once started
+    "summaries": 100,
+}
+
+# Dependencies that must not be imported at startup
+DEFERRED = ("openai", "httpx", "youtube_transcript_api", "requests", "yaml")
+
+def importtime(module):
+    """Import module in a fresh interpreter; returns (wall seconds, {module: (self us, cumulative us)})."""
+    # Bytecode is cached as in a normal install, so source compilation is not timed
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return wall, timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", choices=sorted(BUDGET_MS), default=list(BUDGET_MS))
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per entry point (best is kept)")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports listed per entry point")
+    args = parser.parse_args()
+
+    # The first runs write bytecode and are not timed
+    for module in args.modules:
+        importtime(module)
+    baseline = min(importtime("sys")[0] for _ in range(args.runs))
+
+    failures = []
+    print(f"Bare interpreter startup: {baseline * 1000:.0f} ms")
+    print(f"\n{'module':<8} {'import ms':>10} {'budget':>7} {'median':>7} {'process ms':>11}")
+    slowest = {}
+    for module in args.modules:
+        runs = [importtime(module) for _ in range(args.runs)]
+        cumulative = [timings[module][1] / 1000 for _, timings in runs]
+        best = min(cumulative)
+        wall = min(wall for wall, _ in runs)
+        print(f"{module:<8} {best:>10.1f} {BUDGET_MS[module]:>7} {statistics.median(cumulative):>7.1f} {wall * 1000:>11.0f}")
+        if best > BUDGET_MS[module]:
+            failures.append(f"importing {module} takes {best:.0f} ms (budget {BUDGET_MS[module]} ms)")
+
+        timings = runs[cumulative.index(best)][1]
+        loaded = [name for name in DEFERRED if name in timings]
+        if loaded:
+            failures.append(f"importing {module} loads {', '.join(loaded)}")
+        slowest[module] = sorted(timings.items(), key=lambda item: -item[1][0])[:args.top]
+
+    for module, imports in slowest.items():
+        print(f"\nSlowest imports of {module} (self time):")
+        for name, (self_us, cumulative_us) in imports:
+            print(f"  {self_us / 1000:>6.1f} ms  {name} ({cumulative_us / 1000:.1f} ms with its imports)")
+
+    if failures:
+        print(f"\n{len(failures)} startup budget violation(s):")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\nAll entry points are within the startup budget.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Compare time-to-first-Q&A and total latency of the sequential pipeline
+(identify topics, then map phase) against the streaming pipeline, using a
+stubbed streaming backend that emits tokens at a fixed rate.
+
+Run from the repository root:
+    python benchmarks/bench_streaming.py --topics 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nodes
+from nodes import IdentifyTopicsNode, ParallelTopicBatchNode, StreamingTopicsNode
+from utils import model_router
+
+def topics_response(n_topics):
+    items = "".join(
+        f'  - topic: "Topic {i}"\n    summary: "A summary of topic {i} that takes a while to generate."\n'
+        for i in range(n_topics)
+    )
+    return f"```yaml\ntopics:\n{items}```"
+
+QA_RESPONSE = '```yaml\nquestions:\n  - question: "Q?"\n    answer: "A."\n```'
+
+def install_stub(n_topics, first_token_latency, seconds_per_char, qa_latency):
+    """Install a fake call_llm on the model router and a fake call_llm_stream on the nodes module."""
+    def fake_stream(prompt, **kwargs):
+        time.sleep(first_token_latency)
+        text = topics_response(n_topics)
+        for i in range(0, len(text), 8):
+            time.sleep(seconds_per_char * 8)
+            yield text[i:i + 8]
+
+    def fake_call_llm(prompt, **kwargs):
+        if "3-5 main topics" in prompt:
+            return "".join(fake_stream(prompt))
+        time.sleep(qa_latency)
+        return QA_RESPONSE
+
+    model_router.call_llm = fake_call_llm
+    nodes.call_llm_stream = fake_stream
+    # One model per call, so the stub's short answers are not escalated
+    os.environ["LLM_ROUTING"] = "strong"
+
+def new_shared():
+    return {"transcript": "fake transcript", "title": "Benchmark", "chunks": [], "chunk_index": None}
+
+def run_sequential(workers):
+    shared = new_shared()
+    start = time.perf_counter()
+    IdentifyTopicsNode().run(shared)
+    ParallelTopicBatchNode(max_workers=workers).run(shared)
+    # The batch node hands back all Q&As at once, so the first result arrives at the end
+    total = time.perf_counter() - start
+    return total, total
+
+def run_streaming(workers):
+    shared = new_shared()
+    start = time.perf_counter()
+    StreamingTopicsNode(qa_node=ParallelTopicBatchNode(max_workers=workers), max_workers=workers).run(shared)
+    return shared["stream_stats"]["first_qa_seconds"], time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--topics", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--seconds-per-char", type=float, default=0.002)
+    parser.add_argument("--qa-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    install_stub(args.topics, args.first_token_latency, args.seconds_per_char, args.qa_latency)
+    print(f"{'mode':<11} {'first Q&A (s)':>14} {'total (s)':>10}")
+    for name, run in (("sequential", run_sequential), ("streaming", run_streaming)):
+        first_qa, total = run(args.workers)
+        print(f"{name:<11} {first_qa:>14.2f} {total:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Fuzz and benchmark the structured-output parser against the previous
+split-on-backticks + yaml.safe_load parsing.
+
+The corpus starts from realistic topic and Q&A responses (fenced YAML, bare
+and fenced JSON, responses wrapped in prose) and adds corrupted variants:
+truncation, broken quoting, missing fences, trailing commas, tabs, unescaped
+colons and missing fields. Reports parse throughput, how often each parser
+returns usable items, and how many of the expected items were recovered.
+
+Run from the repository root:
+    python benchmarks/bench_structured_output.py --variants 20 --repeat 5
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.structured_output import QUESTIONS_SCHEMA, TOPICS_SCHEMA, parse_structured
+
+TOPICS = [
+    {"topic": "Why the cache misses", "summary": "The speaker profiles a slow endpoint and finds most time in cache misses."},
+    {"topic": "Fixing the hot loop", "summary": "Rewriting the inner loop: it avoids allocations, and runs 3x faster."},
+    {"topic": "Lessons learned", "summary": "Measure first; the \"obvious\" bottleneck was not the real one."},
+    {"topic": "Q&A with the audience", "summary": "Questions about tooling, flame graphs and production rollouts."},
+]
+QUESTIONS = [
+    {"question": "What did the profile show?", "answer": "Most of the time went to cache misses in the lookup table."},
+    {"question": "How much faster was the rewrite?", "answer": "About 3x: it removed per-item allocations."},
+    {"question": "What is the main takeaway?", "answer": "Profile before optimizing, because intuition is often wrong."},
+]
+
+def yaml_block(key, items):
+    lines = [f"{key}:"]
+    for item in items:
+        for i, (field, value) in enumerate(item.items()):
+            lines.append(f"{'  - ' if i == 0 else '    '}{field}: {json.dumps(value, ensure_ascii=False)}")
+    return "\n".join(lines)
+
+def real_responses(key, items):
+    """Well-formed responses in the shapes models actually return."""
+    block = yaml_block(key, items)
+    payload = json.dumps({key: items}, ensure_ascii=False)
+    pretty = json.dumps({key: items}, ensure_ascii=False, indent=2)
+    return [
+        f"```yaml\n{block}\n```",
+        f"Here is the analysis you asked for:\n\n```yaml\n{block}\n```\n\nLet me know if you need more detail.",
+        f"```\n{block}\n```",
+        block,
+        payload,
+        pretty,
+        f"```json\n{pretty}\n```",
+    ]
+
+def corrupt(response, rng):
+    """Apply one random corruption; returns (kind, text)."""
+    kind = rng.choice([
+        "truncate", "broken_quotes", "no_closing_fence", "trailing_commas", "tabs",
+        "unquoted_colons", "missing_field", "prose_inside_fence", "wrong_indent",
+    ])
+    if kind == "truncate":
+        return kind, response[:rng.randint(len(response) // 3, len(response) - 5)]
+    if kind == "broken_quotes":
+        return kind, response.replace('\\"', '"').replace(': "', ': "He said "', 1)
+    if kind == "no_closing_fence":
+        return kind, response.rstrip().removesuffix("```") if "```" in response else response + "\n```"
+    if kind == "trailing_commas":
+        return kind, response.replace("}", ",}").replace("]", ",]") if "{" in response else response.replace('"\n', '",\n')
+    if kind == "tabs":
+        return kind, response.replace("    ", "\t")
+    if kind == "unquoted_colons":
+        return kind, response.replace('"', "")
+    if kind == "missing_field":
+        return kind, response.replace("summary", "sumary", 1).replace("answer", "anwser", 1)
+    if kind == "prose_inside_fence":
+        return kind, response.replace("\n", "\nNote: the following is generated.\n", 1)
+    lines = response.split("\n")
+    i = rng.randrange(len(lines))
+    lines[i] = " " + lines[i]
+    return kind, "\n".join(lines)
+
+def legacy_parse(response, key):
+    """The parsing previously copy-pasted in llm_utils and TopicBatchNode."""
+    try:
+        if "```yaml" in response:
+            content = response.split("```yaml")[1].split("```")[0].strip()
+        elif "```" in response:
+            content = response.split("```")[1].split("```")[0].strip()
+        else:
+            content = response.strip()
+        data = yaml.safe_load(content)
+        if isinstance(data, dict) and isinstance(data.get(key), list):
+            return [item for item in data[key] if isinstance(item, dict)]
+    except Exception:
+        pass
+    return []
+
+def build_corpus(variants, seed):
+    """Return [(label, response, schema, expected_items)]."""
+    rng = random.Random(seed)
+    corpus = []
+    for schema, items in ((TOPICS_SCHEMA, TOPICS), (QUESTIONS_SCHEMA, QUESTIONS)):
+        for response in real_responses(schema.list_key, items):
+            corpus.append(("real", response, schema, items))
+            for _ in range(variants):
+                kind, text = corrupt(response, rng)
+                corpus.append((kind, text, schema, items))
+    return corpus
+
+def recovered(items, expected, schema):
+    """Number of expected items whose first field was recovered."""
+    key = schema.required[0]
+    got = {str(item.get(key, "")).strip() for item in items}
+    return sum(1 for item in expected if item[key] in got)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--variants", type=int, default=20, help="corrupted variants per real response")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the corpus when timing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dump", metavar="DIR", help="write the corpus to DIR as text files")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.variants, args.seed)
+    if args.dump:
+        os.makedirs(args.dump, exist_ok=True)
+        for i, (label, text, schema, _) in enumerate(corpus):
+            with open(os.path.join(args.dump, f"{i:04d}_{schema.list_key}_{label}.txt"), "w", encoding="utf-8") as f:
+                f.write(text)
+
+    parsers = {
+        "legacy": lambda text, schema: legacy_parse(text, schema.list_key),
+        "structured": lambda text, schema: parse_structured(text, schema).items,
+    }
+    total_bytes = sum(len(text) for _, text, _, _ in corpus)
+    print(f"Corpus: {len(corpus)} responses ({sum(1 for c in corpus if c[0] == 'real')} real), {total_bytes / 1024:.0f} KB")
+    print(f"\n{'parser':<11} {'resp/s':>9} {'MB/s':>7} {'usable real':>12} {'usable corrupt':>15} {'item recall':>12}")
+    for name, parse in parsers.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for _, text, schema, _ in corpus:
+                parse(text, schema)
+        elapsed = time.perf_counter() - start
+
+        usable = Counter()
+        found = expected = 0
+        for label, text, schema, items in corpus:
+            result = parse(text, schema)
+            group = "real" if label == "real" else "corrupt"
+            usable[group, bool(result)] += 1
+            found += recovered(result, items, schema)
+            expected += len(items)
+        real_rate = usable["real", True] / (usable["real", True] + usable["real", False])
+        corrupt_rate = usable["corrupt", True] / (usable["corrupt", True] + usable["corrupt", False])
+        print(f"{name:<11} {len(corpus) * args.repeat / elapsed:>9.0f} "
+              f"{total_bytes * args.repeat / elapsed / 1e6:>7.2f} {real_rate:>12.1%} {corrupt_rate:>15.1%} "
+              f"{found / expected:>12.1%}")
+
+    methods = Counter(parse_structured(text, schema).method for _, text, schema, _ in corpus)
+    by_kind = Counter()
+    kinds = Counter()
+    for label, text, schema, items in corpus:
+        kinds[label] += 1
+        if parse_structured(text, schema).items:
+            by_kind[label] += 1
+    print(f"\nStructured parser paths: {dict(methods)}")
+    print("Usable results per corruption: " + ", ".join(f"{k} {by_kind[k]}/{kinds[k]}" for k in sorted(kinds)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Benchmark the summary store on a large synthetic corpus.
+
+Builds a store of --docs summaries (5 topics with 2 Q&A each, words drawn from
+a Zipf-distributed vocabulary of --vocabulary pseudo-words) and reports the
+insert rate and file size, then latency percentiles of the lookups the store
+exists for: "already summarized?" checks for stored and unknown videos, a
+batch check of 1000 IDs, loading a record and rendering its page, and ranked
+search for common, mid-frequency and rare terms and multi-word queries.
+
+For comparison it writes --html-files loose HTML pages, as the pipeline
+did before, and times the same questions answered from them: a file existence
+check, and a search that reads and scans every page (extrapolated to --docs).
+
+Run from the repository root:
+    python benchmarks/bench_summary_store.py
+    python benchmarks/bench_summary_store.py --docs 1000000 --queries 500
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.fakes import fake_video_ids
+from utils.html_utils import iter_html, save_html
+from utils.summary_store import SummaryStore
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "pe", "da", "gu", "zo", "ba", "chi", "fen", "tor"]
+
+def make_vocabulary(size, seed):
+    """size distinct pseudo-words and Zipf cumulative weights (word rank r has weight 1/r)."""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    words = sorted(words, key=lambda _: rng.random())
+    return words, list(itertools.accumulate(1 / rank for rank in range(1, size + 1)))
+
+def synthetic_summaries(video_ids, vocabulary, cum_weights, seed):
+    """Yield summary records shaped like the pipeline's: a title and 5 topics with 2 Q&A each."""
+    rng = random.Random(seed)
+    for video_id in video_ids:
+        words = iter(rng.choices(vocabulary, cum_weights=cum_weights, k=300))
+        def text(n):
+            return " ".join(itertools.islice(words, n))
+        topics = [
+            {"topic": text(3).title(), "summary": text(14), "start": float(i * 120),
+             "questions": [{"question": text(8) + "?", "answer": text(15)} for _ in range(2)]}
+            for i in range(5)
+        ]
+        yield {"video_id": video_id, "title": text(6).title(), "topics": topics,
+               "thumbnail_url": f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg", "language": "en"}
+
+def percentiles(samples):
+    """(p50, p99) of samples in microseconds."""
+    samples = sorted(samples)
+    return (statistics.median(samples) * 1e6, samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6)
+
+def timed(fn, args_list):
+    """Time fn over each argument; returns (per-call seconds, results)."""
+    times, results = [], []
+    for args in args_list:
+        start = time.perf_counter()
+        results.append(fn(*args))
+        times.append(time.perf_counter() - start)
+    return times, results
+
+def report(name, times, extra=""):
+    p50, p99 = percentiles(times)
+    print(f"{name:<34} {p50:>10.1f} {p99:>10.1f}  {extra}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100_000, help="summaries in the store")
+    parser.add_argument("--vocabulary", type=int, default=20_000, help="distinct words in the corpus")
+    parser.add_argument("--queries", type=int, default=200, help="timed calls per lookup kind")
+    parser.add_argument("--batch", type=int, default=1000, help="summaries stored per transaction while building")
+    parser.add_argument("--html-files", type=int, default=2000, help="loose HTML pages for the baseline")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary, cum_weights = make_vocabulary(args.vocabulary, args.seed)
+    video_ids = fake_video_ids(args.docs, seed=args.seed)
+    workdir = tempfile.mkdtemp()
+    store = SummaryStore(os.path.join(workdir, "summaries.db"))
+
+    start = time.perf_counter()
+    records = synthetic_summaries(video_ids, vocabulary, cum_weights, args.seed)
+    while True:
+        batch = list(itertools.islice(records, args.batch))
+        if not batch:
+            break
+        store.save_many(batch)
+    build = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir))
+    print(f"Stored {len(store)} summaries in {build:.1f}s ({args.docs / build:.0f}/s, generation included), "
+          f"{size / 2**20:.0f} MiB on disk ({size / args.docs / 1024:.1f} KiB per summary)\n")
+
+    unknown = fake_video_ids(args.queries, seed=args.seed + 1)
+    sample = rng.sample(video_ids, args.queries)
+    # Rank bands of the Zipf vocabulary: frequent, mid-frequency and rare words
+    common, mid, rare = vocabulary[:50], vocabulary[500:2000], vocabulary[5000:]
+    searches = {
+        "search common word": [(rng.choice(common),) for _ in range(args.queries)],
+        "search mid-frequency word": [(rng.choice(mid),) for _ in range(args.queries)],
+        "search rare word": [(rng.choice(rare),) for _ in range(args.queries)],
+        "search 2 words (common + mid)": [(f"{rng.choice(common)} {rng.choice(mid)}",) for _ in range(args.queries)],
+        "search 3 words (mid)": [(" ".join(rng.sample(mid, 3)),) for _ in range(args.queries)],
+        "search prefix (first 3 letters)": [(rng.choice(mid)[:3],) for _ in range(args.queries)],
+    }
+
+    print(f"{'lookup':<34} {'p50 us':>10} {'p99 us':>10}")
+    times, found = timed(store.has, [(video_id,) for video_id in sample])
+    report("already summarized? (stored)", times, f"{sum(found)}/{len(found)} found")
+    times, found = timed(store.has, [(video_id,) for video_id in unknown])
+    report("already summarized? (unknown)", times, f"{sum(found)}/{len(found)} found")
+    id_batches = [(rng.sample(video_ids, 500) + fake_video_ids(500, seed=args.seed + 2 + i),)
+                  for i in range(max(1, args.queries // 20))]
+    times, found = timed(store.summarized, id_batches)
+    report("batch check of 1000 IDs", times, f"{sum(map(len, found)) / len(found):.0f} found per batch")
+    times, _ = timed(store.get, [(video_id,) for video_id in sample])
+    report("load record", times)
+    times, _ = timed(lambda video_id: "".join(store.iter_html(video_id, "summary.css")),
+                     [(video_id,) for video_id in sample])
+    report("load record and render page", times)
+    for name, queries in searches.items():
+        times, hits = timed(lambda text: store.search(text, 10), queries)
+        report(name, times, f"{sum(map(len, hits)) / len(hits):.1f} hits of 10")
+
+    # Loose HTML files: the same questions answered from a directory of pages
+    html_dir = os.path.join(workdir, "html")
+    os.makedirs(html_dir)
+    page_ids = video_ids[:args.html_files]
+    for record in (store.get(video_id) for video_id in page_ids):
+        save_html(iter_html(record["title"], record["topics"], record["video_id"], record["thumbnail_url"],
+                            "summary.css"), os.path.join(html_dir, f"video_summary_{record['video_id']}.html"))
+    pages = [os.path.join(html_dir, name) for name in os.listdir(html_dir)]
+
+    def scan(text):
+        terms = text.lower().split()
+        matches = []
+        for path in pages:
+            with open(path, encoding="utf-8") as f:
+                page = f.read().lower()
+            if all(term in page for term in terms):
+                matches.append(path)
+        return matches
+
+    print(f"\nLoose HTML pages ({len(pages)} files, scan times extrapolated to {args.docs} summaries):")
+    times, _ = timed(os.path.exists, [(os.path.join(html_dir, f"video_summary_{video_id}.html"),)
+                                      for video_id in page_ids[:args.queries]])
+    report("already summarized? (file exists)", times)
+    scan_queries = searches["search 2 words (common + mid)"][:max(1, args.queries // 40)]
+    times, _ = timed(scan, scan_queries)
+    scale = args.docs / len(pages)
+    report("search by scanning pages", [t * scale for t in times], "unranked, substring match")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark the map phase with a fake LLM that sleeps for a fixed latency.
+
+Run from the repository root:
+    python benchmarks/bench_topic_batch.py --topics 8 --latency 0.2
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nodes import TopicBatchNode, ParallelTopicBatchNode
+from utils import model_router
+
+FAKE_RESPONSE = """```yaml
+questions:
+  - question: "What is covered?"
+    answer: "A fake answer."
+```"""
+
+def make_fake_llm(latency, fail_topic=None):
+    """Return a call_llm replacement with injected latency and an optional failing topic."""
+    def fake_call_llm(prompt, **kwargs):
+        time.sleep(latency)
+        if fail_topic and f"TOPIC: {fail_topic}\n" in prompt:
+            raise RuntimeError("injected failure")
+        return FAKE_RESPONSE
+    return fake_call_llm
+
+def run_once(node, n_topics):
+    shared = {
+        "title": "Benchmark video",
+        "transcript": "fake transcript " * 100,
+        "topics": [{"topic": f"Topic {i}", "summary": "Summary", "questions": []} for i in range(n_topics)],
+    }
+    start = time.perf_counter()
+    node.run(shared)
+    elapsed = time.perf_counter() - start
+    order = [t["topic"] for t in shared["processed_topics"]]
+    assert order == [f"Topic {i}" for i in range(n_topics)], "topic order changed"
+    return elapsed, shared["processed_topics"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--topics", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake LLM call")
+    parser.add_argument("--limits", default="1,2,4,8", help="comma-separated concurrency limits")
+    args = parser.parse_args()
+
+    model_router.call_llm = make_fake_llm(args.latency, fail_topic="Topic 1")
+    # One model per call, so the fake's short answers are not escalated
+    os.environ["LLM_ROUTING"] = "strong"
+
+    print(f"{args.topics} topics, {args.latency:.2f}s per call, 'Topic 1' always fails")
+    print(f"{'limit':>6} {'wall (s)':>10} {'speedup':>8} {'failed':>7}")
+    baseline = None
+    for limit in [int(x) for x in args.limits.split(",")]:
+        if limit <= 1:
+            node = TopicBatchNode(max_retries=1)
+        else:
+            node = ParallelTopicBatchNode(max_workers=limit, max_retries=1)
+        elapsed, topics = run_once(node, args.topics)
+        baseline = baseline or elapsed
+        failed = sum(1 for t in topics if t["questions"][0]["question"] == "Error generating questions")
+        print(f"{limit:>6} {elapsed:>10.3f} {baseline / elapsed:>7.2f}x {failed:>7}")
+
+if __name__ == "__main__":
+    main()
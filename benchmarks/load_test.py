@@ -0,0 +1,117 @@
+"""
+Load-test the HTTP service with offline fakes and report latency percentiles,
+throughput and how many pipeline runs request coalescing saved.
+
+By default the service runs in-process against the stub LLM server and a fake
+transcript backend. Pass --target to load-test an already running server.
+
+Run from the repository root:
+    python benchmarks/load_test.py --requests 200 --concurrency 32 --videos 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_openai_server import start_stub_server
+
+def start_local_service(llm_latency, max_pipelines, workdir):
+    """Run SummaryService on a background event loop with fake backends. Returns the base URL."""
+    _, _, llm_url = start_stub_server(latency=llm_latency)
+    os.environ.update({
+        "OPENAI_BASE_URL": llm_url,
+        "LLM_CACHE_DISABLE": "1",
+        "LLM_RPM": "0",
+        "LLM_TPM": "0",
+        # A fresh summary store, checkpoints and near-duplicate index, so every video goes through the pipeline
+        "SUMMARY_DB": os.path.join(workdir, "summaries.db"),
+        "CHECKPOINT_DIR": os.path.join(workdir, "checkpoints"),
+        "NEAR_DUP_INDEX": os.path.join(workdir, "near_duplicates.db"),
+    })
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    from server import SummaryService, start_server
+    from utils import youtube_utils
+    from utils.fakes import FakeTranscriptBackend
+    from utils.transcript_store import TranscriptStore
+
+    youtube_utils.set_transcript_backend(FakeTranscriptBackend(latency=0.05))
+    youtube_utils.set_transcript_store(TranscriptStore(os.path.join(workdir, "transcripts")))
+    service = SummaryService({"max_workers": 4}, max_pipelines, os.path.join(workdir, "results"))
+    os.makedirs(service.output_dir, exist_ok=True)
+
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    address = {}
+
+    def run():
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(start_server(service, port=0))
+        address["port"] = server.sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return f"http://127.0.0.1:{address['port']}"
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--videos", type=int, default=20, help="distinct video IDs requested")
+    parser.add_argument("--llm-latency", type=float, default=0.1)
+    parser.add_argument("--max-pipelines", type=int, default=8)
+    parser.add_argument("--target", help="base URL of a running server instead of an in-process one")
+    args = parser.parse_args()
+
+    from nodes import summary_complete
+    from utils.fakes import fake_video_ids
+
+    with tempfile.TemporaryDirectory() as workdir:
+        base_url = args.target or start_local_service(args.llm_latency, args.max_pipelines, workdir)
+        video_ids = fake_video_ids(args.videos)
+
+        def request(i):
+            url = f"https://www.youtube.com/watch?v={video_ids[i % len(video_ids)]}"
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(f"{base_url}/summarize?url={quote(url)}", timeout=300) as response:
+                    # A summary without topics or with failed Q&A counts as a failure too
+                    ok = response.status == 200 and summary_complete(json.loads(response.read())["topics"])
+            except Exception:
+                ok = False
+            return time.perf_counter() - start, ok
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(request, range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+        latencies = [latency for latency, _ in results]
+        failures = sum(1 for _, ok in results if not ok)
+        with urllib.request.urlopen(f"{base_url}/stats") as response:
+            stats = json.loads(response.read())
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent, {args.videos} distinct videos")
+    print(f"p50 {percentile(latencies, 50) * 1000:.1f} ms, p99 {percentile(latencies, 99) * 1000:.1f} ms, "
+          f"throughput {args.requests / elapsed:.1f} req/s, {failures} failed")
+    print(f"pipelines run {stats['pipelines']}, coalesced {stats['coalesced']}, "
+          f"served from recent results {stats['result_hits']}, incomplete summaries {stats.get('incomplete', 0)}")
+
+if __name__ == "__main__":
+    main()
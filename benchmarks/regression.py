@@ -0,0 +1,238 @@
+"""
+Offline performance regression suite for the full summarizer flow.
+
+Runs create_youtube_summarizer_flow end to end against deterministic fakes:
+the stub OpenAI server (latency and injected 503s) and FakeTranscriptBackend
+(transcript size, latency and injected connection errors). For each scenario it
+measures per video: end-to-end seconds, seconds per node, peak Python heap,
+LLM calls, tokens and retries, plus how many videos failed.
+
+Results are compared with benchmarks/baselines.json and the run exits with
+status 1 when a metric regresses beyond its tolerance. LLM calls and tokens
+are deterministic, so they get a tight tolerance; timings and memory depend on
+the machine, so re-record baselines (--update) when moving to new hardware, or
+pass --ignore-timing to check only the deterministic metrics.
+
+Run from the repository root:
+    python benchmarks/regression.py
+    python benchmarks/regression.py --scenarios short flaky --update
+    python benchmarks/regression.py --async --ignore-timing
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_openai_server import start_stub_server
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# segments: caption segments per transcript (about 12 tokens each)
+SCENARIOS = {
+    "short": {"videos": 3, "segments": 40, "llm_latency": 0.05},
+    "medium": {"videos": 3, "segments": 400, "llm_latency": 0.05},
+    "long": {"videos": 2, "segments": 1500, "llm_latency": 0.05},
+    "flaky": {"videos": 8, "segments": 400, "llm_latency": 0.05, "llm_error_rate": 0.25,
+              "transcript_error_rate": 0.25, "transcript_latency": 0.02},
+}
+
+COUNT_METRICS = ("llm_calls", "prompt_tokens", "completion_tokens")
+
+def node_key(node):
+    """Baseline name of a node: the sync, async and parallel versions of a stage share one."""
+    for prefix in ("Async", "Parallel"):
+        if node.startswith(prefix):
+            node = node[len(prefix):]
+    return node
+
+def run_video(video_id, output_dir, workers, use_async=False):
+    """Summarize one video; returns (seconds, tracer, error)."""
+    from flow import create_shared_store, create_youtube_summarizer_flow, run_flow
+    from utils.tracing import RunTracer
+
+    shared = create_shared_store(f"https://www.youtube.com/watch?v={video_id}")
+    shared["output_dir"] = output_dir
+    flow = create_youtube_summarizer_flow(max_workers=workers, interactive=False, use_async=use_async)
+    tracer = RunTracer("regression", video_id=video_id)
+    start = time.perf_counter()
+    error = None
+    try:
+        with tracer:
+            run_flow(flow, shared)
+    except Exception as e:
+        error = e
+    return time.perf_counter() - start, tracer, error
+
+def run_scenario(name, config, state, workdir, workers, seed, use_async=False):
+    """Run every video of a scenario and return its averaged metrics."""
+    from utils.fakes import FakeTranscriptBackend, fake_video_ids
+    from utils.transcript_store import TranscriptStore
+    from utils.youtube_utils import set_transcript_backend, set_transcript_store
+
+    state.latency = config["llm_latency"]
+    state.error_rate = config.get("llm_error_rate", 0.0)
+    # Each scenario draws its injected failures from its own repeatable stream
+    state.random.seed(f"{name}-{seed}")
+    set_transcript_backend(FakeTranscriptBackend(
+        n_segments=config["segments"],
+        latency=config.get("transcript_latency", 0.0),
+        error_rate=config.get("transcript_error_rate", 0.0),
+        seed=f"{name}-{seed}",
+    ))
+    set_transcript_store(TranscriptStore(os.path.join(workdir, name, "transcripts")))
+    output_dir = os.path.join(workdir, name, "html")
+    os.makedirs(output_dir, exist_ok=True)
+
+    ids = fake_video_ids(config["videos"], seed=seed)
+    seconds, failed = [], 0
+    nodes, counts = {}, dict.fromkeys(COUNT_METRICS + ("llm_retries", "retries"), 0)
+    # Silence per-node progress output
+    with contextlib.redirect_stdout(io.StringIO()):
+        for video_id in ids:
+            elapsed, tracer, error = run_video(video_id, output_dir, workers, use_async)
+            totals = tracer.root.totals()
+            if error is not None:
+                # Failed videos still count their retries, but not their time or partial LLM usage
+                failed += 1
+                counts["llm_retries"] += totals.get("llm_retries", 0)
+                counts["retries"] += totals.get("retries", 0)
+                continue
+            seconds.append(elapsed)
+            for key in counts:
+                counts[key] += totals.get(key, 0)
+            for node, node_seconds, _ in tracer.node_summary():
+                nodes[node_key(node)] = nodes.get(node_key(node), 0.0) + node_seconds
+
+        # Heap is measured on a separate run so tracemalloc does not skew the timings
+        set_transcript_store(TranscriptStore(os.path.join(workdir, name, "memory")))
+        tracemalloc.start()
+        run_video(ids[0], output_dir, workers, use_async)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    done = max(1, len(seconds))
+    return {
+        "videos": len(ids),
+        "failed": failed,
+        "seconds": round(sum(seconds) / done, 4),
+        "peak_mb": round(peak / 1024 / 1024, 3),
+        **{key: round(value / done, 2) for key, value in counts.items()},
+        "nodes": {node: round(value / done, 4) for node, value in nodes.items()},
+    }
+
+def compare(name, current, baseline, args):
+    """Return (regressions, notes) for one scenario."""
+    regressions, notes = [], []
+
+    def check(label, value, expected, tolerance, slack=0.0):
+        limit = expected * (1 + tolerance) + slack
+        if value > limit:
+            regressions.append(f"{name}: {label} {value:.3f} > {limit:.3f} (baseline {expected:.3f})")
+        elif value < expected * (1 - tolerance) - slack:
+            notes.append(f"{name}: {label} improved to {value:.3f} from {expected:.3f}")
+
+    if current["failed"] > baseline["failed"]:
+        regressions.append(f"{name}: {current['failed']} failed videos (baseline {baseline['failed']})")
+    for key in COUNT_METRICS:
+        check(key, current[key], baseline[key], args.count_tolerance)
+    if not args.ignore_timing:
+        check("seconds", current["seconds"], baseline["seconds"], args.time_tolerance, slack=0.05)
+        check("peak_mb", current["peak_mb"], baseline["peak_mb"], args.memory_tolerance, slack=1.0)
+        for node, expected in baseline["nodes"].items():
+            check(f"{node} seconds", current["nodes"].get(node, 0.0), expected, args.time_tolerance, slack=0.05)
+        # A node without a baseline could regress unnoticed, so new nodes fail the run until recorded
+        for node in sorted(set(current["nodes"]) - set(baseline["nodes"])):
+            regressions.append(f"{name}: {node} ran but has no baseline (re-record with --update)")
+    return regressions, notes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--workers", type=int, default=4, help="map phase concurrency")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="run the async flow (compared with the same baselines)")
+    parser.add_argument("--baselines", default=BASELINES, help="baseline file to compare with or update")
+    parser.add_argument("--update", action="store_true", help="record the results as the new baselines")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="allowed relative heap growth")
+    parser.add_argument("--count-tolerance", type=float, default=0.02, help="allowed relative growth in LLM calls and tokens")
+    parser.add_argument("--ignore-timing", action="store_true", help="only check failures, LLM calls and tokens")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ.update({
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "stub"),
+        "LLM_CACHE_DISABLE": "1",
+        "CHECKPOINT_DISABLE": "1",
+        "LLM_RPM": "0",
+        "LLM_TPM": "0",
+        "LLM_BACKOFF_BASE": "0.05",
+        "LLM_BACKOFF_MAX": "0.2",
+    })
+    _, state, llm_url = start_stub_server(seed=args.seed)
+    os.environ["OPENAI_BASE_URL"] = llm_url
+    os.environ["NEAR_DUP_INDEX"] = os.path.join(workdir, "near_duplicates.db")
+    os.environ["SUMMARY_DB"] = os.path.join(workdir, "summaries.db")
+    # The LLM client (and the openai and httpx imports) is built on first use; build it before
+    # timing, as in a long-running worker, so the first video does not absorb the import
+    from utils.llm_client import get_client
+    get_client()
+
+    results = {}
+    print(f"{'scenario':<8} {'videos':>6} {'failed':>6} {'seconds':>8} {'peak MB':>8} {'calls':>6} "
+          f"{'prompt tok':>10} {'compl tok':>10} {'LLM retries':>11} {'node retries':>12}")
+    for name in args.scenarios:
+        m = results[name] = run_scenario(name, SCENARIOS[name], state, workdir, args.workers, args.seed, args.use_async)
+        print(f"{name:<8} {m['videos']:>6} {m['failed']:>6} {m['seconds']:>8.2f} {m['peak_mb']:>8.1f} "
+              f"{m['llm_calls']:>6.1f} {m['prompt_tokens']:>10.0f} {m['completion_tokens']:>10.0f} "
+              f"{m['llm_retries']:>11.1f} {m['retries']:>12.1f}")
+        slowest = sorted(m["nodes"].items(), key=lambda item: -item[1])[:3]
+        print("         " + ", ".join(f"{node} {seconds:.2f}s" for node, seconds in slowest))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines, encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    if args.update:
+        baselines.update(results)
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaselines for {', '.join(results)} written to {args.baselines}")
+        return 0
+
+    regressions, notes = [], []
+    for name, current in results.items():
+        if name not in baselines:
+            notes.append(f"{name}: no baseline recorded (run with --update)")
+            continue
+        found, improved = compare(name, current, baselines[name], args)
+        regressions += found
+        notes += improved
+    for note in notes:
+        print(f"note: {note}")
+    if regressions:
+        print(f"\n{len(regressions)} performance regression(s):")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\nNo performance regressions against the baselines.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+"""
+Minimal OpenAI-compatible chat completions server for offline testing.
+
+Serves POST /v1/chat/completions (plain and streamed) with HTTP/1.1 keep-alive,
+and counts the TCP connections it accepts so connection reuse can be checked.
+With --prefix-cache it simulates provider-side prompt caching and reports the
+cached part of each prompt in usage.prompt_tokens_details.cached_tokens.
+With --model it emulates several models, each with its own latency and share
+of weak (parseable but incomplete) responses, for testing model routing.
+
+Run from the repository root:
+    python benchmarks/stub_openai_server.py --port 8765 --latency 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub python main.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = """```yaml
+topics:
+  - topic: "Stub Topic"
+    summary: "Summary from the stub server"
+    questions:
+      - question: "What does the stub cover?"
+        answer: "Everything in one reply."
+  - topic: "Second Stub Topic"
+    summary: "Another summary from the stub server"
+    questions:
+      - question: "Why two topics?"
+        answer: "So single-call summaries are complete."
+questions:
+  - question: "What is this?"
+    answer: "A reply from the stub server."
+```"""
+
+# Sent instead of DEFAULT_REPLY when the request asks for response_format json_object
+DEFAULT_JSON_REPLY = json.dumps({
+    "topics": [
+        {"topic": "Stub Topic", "summary": "Summary from the stub server",
+         "questions": [{"question": "What does the stub cover?", "answer": "Everything in one reply."}]},
+        {"topic": "Second Stub Topic", "summary": "Another summary from the stub server",
+         "questions": [{"question": "Why two topics?", "answer": "So single-call summaries are complete."}]},
+    ],
+    "questions": [{"question": "What is this?", "answer": "A reply from the stub server."}],
+})
+
+# Sent for a model profile's weak responses: parseable, but one topic without a summary and a terse answer
+WEAK_REPLY = """```yaml
+topics:
+  - topic: "Stub Topic"
+questions:
+  - question: "What is this?"
+    answer: "A stub."
+```"""
+WEAK_JSON_REPLY = json.dumps({
+    "topics": [{"topic": "Stub Topic"}],
+    "questions": [{"question": "What is this?", "answer": "A stub."}],
+})
+
+class ModelProfile:
+    """How the stub answers requests for one model: its latency and the share of weak responses."""
+    def __init__(self, latency=0.0, weak_rate=0.0):
+        self.latency = latency
+        self.weak_rate = weak_rate
+
+    @classmethod
+    def parse(cls, spec):
+        """Parse "name:latency:weak_rate" (the last two optional) into (name, ModelProfile)."""
+        name, *values = spec.split(":")
+        return name, cls(*map(float, values))
+
+class PrefixCache:
+    """
+    Simulated provider prompt cache, following OpenAI's scheme: prompts of at least
+    MIN_TOKENS tokens are cached in BLOCK_TOKENS increments once a request has been
+    processed, and a later prompt gets the longest cached prefix it starts with
+    billed as cached tokens. Tokens are counted as 4 characters, like the stub's usage.
+    Requests that arrive before the first one with the same prefix finishes miss.
+    """
+    MIN_TOKENS = 1024
+    BLOCK_TOKENS = 128
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._prefixes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _boundaries(self, prompt):
+        """(token count, prefix hash) for every cacheable prefix length of the prompt."""
+        hasher = hashlib.blake2b(digest_size=16)
+        boundaries, consumed = [], 0
+        end = self.MIN_TOKENS * 4
+        while end <= len(prompt):
+            hasher.update(prompt[consumed:end].encode("utf-8"))
+            consumed = end
+            boundaries.append((end // 4, hasher.copy().digest()))
+            end += self.BLOCK_TOKENS * 4
+        return boundaries
+
+    def lookup(self, prompt):
+        """Return (cached tokens, boundaries to store once the request is processed)."""
+        boundaries = self._boundaries(prompt)
+        cached = 0
+        with self._lock:
+            for tokens, key in boundaries:
+                if key not in self._prefixes:
+                    break
+                self._prefixes.move_to_end(key)
+                cached = tokens
+        return cached, boundaries
+
+    def store(self, boundaries):
+        with self._lock:
+            for _, key in boundaries:
+                self._prefixes[key] = True
+                self._prefixes.move_to_end(key)
+            while len(self._prefixes) > self.max_entries:
+                self._prefixes.popitem(last=False)
+
+class StubState:
+    """Counters shared by all handler threads."""
+    def __init__(self, latency=0.0, reply=DEFAULT_REPLY, rate_limit_rate=0.0, retry_after=1.0,
+                 error_rate=0.0, seed=None, prefix_cache=False, models=None):
+        self.latency = latency
+        self.reply = reply
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.connections = 0
+        self.prefix_cache = PrefixCache() if prefix_cache else None
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.models = dict(models or {})
+        self.model_requests = {}
+        self.weak_replies = 0
+        self.lock = threading.Lock()
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        model = body.get("model", "stub")
+        profile = self.state.models.get(model)
+        with self.state.lock:
+            self.state.requests += 1
+            self.state.model_requests[model] = self.state.model_requests.get(model, 0) + 1
+            draw = self.state.random.random()
+            limited = draw < self.state.rate_limit_rate
+            failed = not limited and draw < self.state.rate_limit_rate + self.state.error_rate
+            if limited:
+                self.state.rate_limited += 1
+            if failed:
+                self.state.errors += 1
+            weak = bool(profile) and not (limited or failed) and self.state.random.random() < profile.weak_rate
+            if weak:
+                self.state.weak_replies += 1
+        if limited:
+            self._send_rate_limited()
+            return
+        if failed:
+            self._send_error(503, "Service temporarily unavailable")
+            return
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        cached, boundaries = self.state.prefix_cache.lookup(prompt) if self.state.prefix_cache else (0, [])
+        time.sleep(profile.latency if profile else self.state.latency)
+        if self.state.prefix_cache:
+            self.state.prefix_cache.store(boundaries)
+
+        json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+        reply = WEAK_REPLY if weak else self.state.reply
+        if json_mode and reply in (DEFAULT_REPLY, WEAK_REPLY):
+            reply = WEAK_JSON_REPLY if weak else DEFAULT_JSON_REPLY
+        usage = {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": len(reply) // 4,
+            "total_tokens": (len(prompt) + len(reply)) // 4,
+            "prompt_tokens_details": {"cached_tokens": cached},
+        }
+        with self.state.lock:
+            self.state.prompt_tokens += usage["prompt_tokens"]
+            self.state.cached_tokens += cached
+        if body.get("stream"):
+            self._send_stream(model, reply)
+            return
+
+        payload = json.dumps({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_rate_limited(self):
+        self._send_error(429, "Rate limit reached", retry_after=self.state.retry_after)
+
+    def _send_error(self, status, message, retry_after=None):
+        error_type = "rate_limit_exceeded" if status == 429 else "server_error"
+        payload = json.dumps({"error": {"message": message, "type": error_type}}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if retry_after is not None:
+            self.send_header("Retry-After", str(retry_after))
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_stream(self, model, reply):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i in range(0, len(reply), 16):
+            event = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": reply[i:i + 16]}, "finish_reason": None}],
+            }
+            self._write_chunk(f"data: {json.dumps(event)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+class StubHTTPServer(ThreadingHTTPServer):
+    # Hundreds of clients may connect at once; the default listen backlog of 5 drops their SYNs
+    request_queue_size = 1024
+    daemon_threads = True
+
+def start_stub_server(port=0, latency=0.0, reply=DEFAULT_REPLY, rate_limit_rate=0.0, retry_after=1.0,
+                      error_rate=0.0, seed=None, prefix_cache=False, models=None):
+    """
+    Start the stub server on a background thread. Returns (server, state, base_url).
+    A rate_limit_rate fraction of requests is answered with 429 and a Retry-After header,
+    and an error_rate fraction with 503. Pass seed to make the injected failures repeatable,
+    and prefix_cache=True to simulate provider prompt caching (see PrefixCache).
+    models maps model names to ModelProfiles; requests for other models use latency.
+    """
+    state = StubState(latency, reply, rate_limit_rate, retry_after, error_rate, seed, prefix_cache, models)
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+    server = StubHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--prefix-cache", action="store_true", help="simulate provider prompt caching")
+    parser.add_argument("--model", action="append", default=[], metavar="NAME:LATENCY:WEAK_RATE",
+                        help="emulate a model with its own latency and share of weak responses (repeatable)")
+    args = parser.parse_args()
+    server, state, base_url = start_stub_server(
+        args.port, args.latency, rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+        error_rate=args.error_rate, prefix_cache=args.prefix_cache,
+        models=dict(ModelProfile.parse(spec) for spec in args.model),
+    )
+    print(f"Stub OpenAI server listening on {base_url}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"{state.requests} requests over {state.connections} connections")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
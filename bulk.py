@@ -0,0 +1,196 @@
+import json
+import os
+import sys
+import threading
+import time
+from flow import create_youtube_summarizer_flow, create_shared_store, run_flow
+from utils.checkpoint import get_checkpoint_store
+from utils.concurrency import map_bounded
+from utils.summary_store import get_summary_store
+from utils.tracing import RunTracer
+from utils.youtube_utils import extract_video_id
+
+class JobLedger:
+    """
+    Append-only JSON-lines ledger of bulk jobs.
+
+    Every state change is appended as one line, so the ledger survives a crash
+    mid-run: on restart the last line per video_id tells which jobs are done.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Return the latest record per video_id."""
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A crash can leave a truncated last line
+                    continue
+                records[record["video_id"]] = record
+        return records
+
+    def record(self, **fields):
+        """Append a record and flush it to disk."""
+        fields["timestamp"] = time.time()
+        line = json.dumps(fields, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+def read_urls(source):
+    """Read URLs from a file path, or from stdin when source is '-'. Blank lines and # comments are skipped."""
+    if source == "-":
+        lines = sys.stdin.readlines()
+    else:
+        with open(source, encoding="utf-8") as f:
+            lines = f.readlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+def dedupe_urls(urls):
+    """
+    Deduplicate URLs by video ID, keeping the first URL seen for each video.
+    Returns (jobs, invalid) where jobs is a list of (video_id, url).
+    """
+    jobs, invalid, seen = [], [], set()
+    for url in urls:
+        video_id = extract_video_id(url)
+        if not video_id:
+            invalid.append(url)
+        elif video_id not in seen:
+            seen.add(video_id)
+            jobs.append((video_id, url))
+    return jobs, invalid
+
+def run_job(video_id, url, ledger, output_dir=".", flow_options=None):
+    """
+    Run one summarizer pipeline and record its outcome in the ledger.
+    flow_options are passed to create_youtube_summarizer_flow().
+    """
+    ledger.record(video_id=video_id, url=url, status="running")
+    shared = create_shared_store(url)
+    shared["output_dir"] = output_dir
+    tracer = RunTracer("youtube_summarizer", video_id=video_id)
+    start = time.perf_counter()
+    try:
+        with tracer:
+            run_flow(create_youtube_summarizer_flow(**{**(flow_options or {}), "interactive": False}), shared)
+        if shared.get("output_file") and os.path.exists(shared["output_file"]):
+            status, error = "done", None
+        else:
+            status, error = "failed", "no summary was written"
+    except Exception as e:
+        status, error = "failed", str(e)
+    elapsed = time.perf_counter() - start
+    trace_file = None
+    if os.environ.get("TRACE_DISABLE") != "1":
+        trace_file = tracer.save(os.environ.get("TRACE_DIR", "runs"))
+        if os.environ.get("TRACE_OTEL") == "1":
+            tracer.emit_otel()
+    record = {
+        "video_id": video_id,
+        "url": url,
+        "status": status,
+        "elapsed": round(elapsed, 3),
+        "error": error,
+        "output_file": shared.get("output_file") or None,
+        "trace_file": trace_file,
+    }
+    ledger.record(**record)
+    return record
+
+def run_bulk(source, concurrency=4, ledger_path="bulk_ledger.jsonl", output_dir=".", flow_options=None,
+             retry_failed=True):
+    """
+    Summarize every URL from source with at most `concurrency` pipelines running at once.
+
+    Jobs already marked done in the ledger, or whose video is in the summary
+    store, are skipped, so an interrupted run can be resumed by running the
+    same command again.
+    """
+    jobs, invalid = dedupe_urls(read_urls(source))
+    for url in invalid:
+        print(f"Skipping invalid URL: {url}")
+
+    ledger = JobLedger(ledger_path)
+    previous = ledger.load()
+    skip = {"done"} if retry_failed else {"done", "failed"}
+    pending = [(vid, url) for vid, url in jobs if previous.get(vid, {}).get("status") not in skip]
+    summaries = get_summary_store()
+    if summaries is not None:
+        stored = summaries.summarized(vid for vid, _ in pending)
+        pending = [(vid, url) for vid, url in pending if vid not in stored]
+    print(f"{len(jobs)} unique videos, {len(jobs) - len(pending)} already in ledger or summary store, "
+          f"{len(pending)} to run")
+
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    results = map_bounded(
+        lambda job: run_job(job[0], job[1], ledger, output_dir, flow_options),
+        pending,
+        concurrency,
+    )
+    total = time.perf_counter() - start
+
+    print_job_timings(results, total)
+    return results
+
+# Checkpoint stages dropped by each --force choice. Short videos take the single-call
+# path, whose one stage produces both the topics and their Q&A.
+FORCE_STAGES = {"topics": ("topics", "single_call"), "qa": ("qa", "single_call"), "html": ("html",)}
+
+def resummarize_all(concurrency=4, ledger_path="bulk_ledger.jsonl", output_dir=".", flow_options=None,
+                    force=()):
+    """
+    Re-run the pipeline for every checkpointed video.
+
+    Stages whose inputs, settings and code are unchanged are restored from their
+    checkpoints, so e.g. a template change only re-renders the HTML pages without
+    any LLM calls. Stages named in `force` ("topics", "qa", "html") are recomputed
+    regardless, along with every later stage whose inputs change as a result;
+    forcing "topics" or "qa" also recomputes single-call summaries of short videos.
+    """
+    store = get_checkpoint_store()
+    if store is None:
+        print("Checkpoints are disabled (CHECKPOINT_DISABLE=1); nothing to re-summarize.")
+        return []
+
+    jobs = [(vid, url) for vid, url in store.videos() if url]
+    for vid, _ in jobs:
+        for choice in force:
+            for stage in FORCE_STAGES[choice]:
+                store.drop_stage(vid, stage)
+    print(f"Re-summarizing {len(jobs)} checkpointed videos" + (f", forcing {', '.join(force)}" if force else ""))
+
+    ledger = JobLedger(ledger_path)
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    results = map_bounded(
+        lambda job: run_job(job[0], job[1], ledger, output_dir, flow_options),
+        jobs,
+        concurrency,
+    )
+    total = time.perf_counter() - start
+
+    print_job_timings(results, total)
+    return results
+
+def print_job_timings(results, total):
+    """Print a per-job timing table and overall throughput."""
+    if not results:
+        print("Nothing to do.")
+        return
+    print(f"\n{'video_id':<12} {'status':<7} {'seconds':>8}  output / error")
+    for r in results:
+        detail = r["output_file"] if r["status"] == "done" else r["error"]
+        print(f"{r['video_id']:<12} {r['status']:<7} {r['elapsed']:>8.2f}  {detail}")
+    done = sum(1 for r in results if r["status"] == "done")
+    print(f"\n{done}/{len(results)} succeeded in {total:.2f}s ({len(results) / total:.2f} videos/s)")
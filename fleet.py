@@ -0,0 +1,382 @@
+import argparse
+import contextlib
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+from bulk import dedupe_urls, read_urls
+
+class JobQueue:
+    """
+    SQLite job queue shared by the fleet worker processes of one machine.
+
+    The queue runs in WAL mode, whose shared-memory index only works between
+    processes on the same host: the file must live on a local disk, not on a
+    network filesystem such as NFS.
+
+    Workers claim small batches of pending jobs. A worker that runs out of
+    pending jobs steals half of the claimed-but-not-started backlog of the
+    busiest other worker. Workers heartbeat while alive; jobs held by a worker
+    whose heartbeat went stale (or whose process died) are put back in the
+    queue, and after max_attempts such losses a job is marked failed.
+
+    JobQueue also accepts bulk.run_job()'s ledger records, so workers reuse the
+    bulk pipeline runner unchanged.
+    """
+    def __init__(self, path, max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " video_id TEXT PRIMARY KEY,"
+                " url TEXT NOT NULL,"
+                " status TEXT NOT NULL,"  # pending, claimed, running, done, failed
+                " worker TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " elapsed REAL,"
+                " error TEXT,"
+                " output_file TEXT,"
+                " trace_file TEXT,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_status ON jobs(status, worker)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS workers ("
+                " worker TEXT PRIMARY KEY,"
+                " host TEXT NOT NULL,"
+                " pid INTEGER NOT NULL,"
+                " heartbeat REAL NOT NULL,"
+                " alive INTEGER NOT NULL DEFAULT 1)"
+            )
+
+    def _connect(self):
+        """Return this thread's connection (sqlite3 connections are not shared across threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Run statements in one write transaction, taking the write lock up front."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def enqueue(self, jobs, retry_failed=True):
+        """Add (video_id, url) jobs; finished jobs are kept, failed ones are retried if retry_failed."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (video_id, url, status, updated_at) VALUES (?, ?, 'pending', ?)",
+                [(vid, url, now) for vid, url in jobs],
+            )
+            if retry_failed:
+                conn.execute(
+                    "UPDATE jobs SET status = 'pending', worker = NULL, attempts = 0, error = NULL, updated_at = ?"
+                    " WHERE status = 'failed'", (now,)
+                )
+
+    def register(self, worker):
+        """Register a worker (or revive one with the same name) and record its first heartbeat."""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (worker, host, pid, heartbeat, alive) VALUES (?, ?, ?, ?, 1)",
+                (worker, socket.gethostname(), os.getpid(), time.time()),
+            )
+
+    def heartbeat(self, workers):
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE workers SET heartbeat = ? WHERE worker = ?", [(time.time(), w) for w in workers]
+            )
+
+    def claim(self, worker, batch_size=4):
+        """
+        Claim up to batch_size pending jobs for worker, stealing from the busiest
+        other worker when none are pending. Returns a list of (video_id, url).
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT video_id, url FROM jobs WHERE status = 'pending' ORDER BY rowid LIMIT ?", (batch_size,)
+            ).fetchall()
+            if not rows:
+                victim = conn.execute(
+                    "SELECT worker, COUNT(*) AS backlog FROM jobs WHERE status = 'claimed' AND worker != ?"
+                    " GROUP BY worker ORDER BY backlog DESC LIMIT 1", (worker,)
+                ).fetchone()
+                if victim:
+                    # Take the tail of the victim's backlog; it keeps working on the head
+                    rows = conn.execute(
+                        "SELECT video_id, url FROM jobs WHERE status = 'claimed' AND worker = ?"
+                        " ORDER BY rowid DESC LIMIT ?", (victim[0], min(batch_size, (victim[1] + 1) // 2))
+                    ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET status = 'claimed', worker = ?, updated_at = ? WHERE video_id = ?",
+                [(worker, now, vid) for vid, _ in rows],
+            )
+        return rows
+
+    def start(self, video_id, worker):
+        """Mark a claimed job as running; False if another worker stole it in the meantime."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ?"
+                " WHERE video_id = ? AND worker = ? AND status = 'claimed'",
+                (time.time(), video_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def record(self, video_id, status, **fields):
+        """Store a job outcome; bulk.run_job() calls this as its ledger."""
+        if status not in ("done", "failed"):
+            return
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, elapsed = ?, error = ?, output_file = ?, trace_file = ?,"
+                " updated_at = ? WHERE video_id = ?",
+                (status, fields.get("elapsed"), fields.get("error"), fields.get("output_file"),
+                 fields.get("trace_file"), time.time(), video_id),
+            )
+
+    def release(self, worker):
+        """Return a worker's unstarted jobs to the queue (called when it exits cleanly)."""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'pending', worker = NULL, updated_at = ?"
+                " WHERE worker = ? AND status = 'claimed'", (time.time(), worker)
+            )
+            conn.execute("UPDATE workers SET alive = 0 WHERE worker = ?", (worker,))
+
+    def requeue_dead(self, heartbeat_timeout=60.0, dead_pids=(), host=None):
+        """
+        Put back the jobs of dead workers: those whose heartbeat is older than
+        heartbeat_timeout, or whose process is in dead_pids on host.
+        Returns the number of jobs requeued.
+        """
+        now = time.time()
+        host = host or socket.gethostname()
+        with self._transaction() as conn:
+            dead = [
+                worker for worker, worker_host, pid, heartbeat in conn.execute(
+                    "SELECT worker, host, pid, heartbeat FROM workers WHERE alive = 1"
+                ).fetchall()
+                if now - heartbeat > heartbeat_timeout or (worker_host == host and pid in dead_pids)
+            ]
+            requeued = 0
+            for worker in dead:
+                conn.execute("UPDATE workers SET alive = 0 WHERE worker = ?", (worker,))
+                requeued += conn.execute(
+                    "UPDATE jobs SET status = 'pending', worker = NULL, updated_at = ?"
+                    " WHERE worker = ? AND status = 'claimed'", (now, worker)
+                ).rowcount
+                # A job that was running when its worker died may be what killed it
+                requeued += conn.execute(
+                    "UPDATE jobs SET status = 'pending', worker = NULL, updated_at = ?"
+                    " WHERE worker = ? AND status = 'running' AND attempts < ?", (now, worker, self.max_attempts)
+                ).rowcount
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'worker died', updated_at = ?"
+                    " WHERE worker = ? AND status = 'running'", (now, worker)
+                )
+        return requeued
+
+    def counts(self):
+        """Return the number of jobs per status."""
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {"pending": 0, "claimed": 0, "running": 0, "done": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def worker_stats(self):
+        """Return (worker, finished jobs, total pipeline seconds) per worker."""
+        return self._connect().execute(
+            "SELECT worker, COUNT(*), COALESCE(SUM(elapsed), 0) FROM jobs"
+            " WHERE status IN ('done', 'failed') GROUP BY worker ORDER BY worker"
+        ).fetchall()
+
+def run_worker(queue_path, name, output_dir=".", flow_options=None, threads=1, batch_size=4,
+               fake_transcripts=None, env=None):
+    """
+    Fleet worker: claim jobs from the queue and run one pipeline per job until none are left.
+
+    Runs `threads` pipelines at once, each under its own worker name. fake_transcripts
+    is a dict of FakeTranscriptBackend options for offline runs; env overrides
+    environment variables (e.g. this worker's share of the LLM rate limits).
+    """
+    os.environ.update(env or {})
+    # Imported here so spawned workers pick up env before the flow modules read it
+    from bulk import run_job
+    from utils.concurrency import map_bounded
+    if fake_transcripts is not None:
+        from utils.fakes import FakeTranscriptBackend
+        from utils.youtube_utils import set_transcript_backend
+        set_transcript_backend(FakeTranscriptBackend(**fake_transcripts))
+
+    queue = JobQueue(queue_path)
+    names = [f"{name}.{i}" for i in range(threads)]
+    for worker in names:
+        queue.register(worker)
+
+    stop = threading.Event()
+    def beat():
+        while not stop.wait(5.0):
+            queue.heartbeat(names)
+    threading.Thread(target=beat, daemon=True).start()
+
+    def loop(worker):
+        finished = 0
+        while True:
+            jobs = queue.claim(worker, batch_size)
+            if not jobs:
+                break
+            for video_id, url in jobs:
+                if queue.start(video_id, worker):
+                    run_job(video_id, url, queue, output_dir, flow_options)
+                    finished += 1
+        queue.release(worker)
+        return finished
+
+    try:
+        return sum(map_bounded(loop, names, threads))
+    finally:
+        stop.set()
+
+def split_rate_limits(workers):
+    """Give each local worker process an equal share of the LLM_RPM / LLM_TPM budgets."""
+    env = {}
+    for name, default in (("LLM_RPM", "500"), ("LLM_TPM", "300000")):
+        budget = float(os.environ.get(name, default))
+        if budget > 0:
+            env[name] = str(max(1, int(budget / workers)))
+    return env
+
+def run_fleet(source, queue_path="fleet.db", workers=4, threads=1, batch_size=4, output_dir=".",
+              flow_options=None, fake_transcripts=None, heartbeat_timeout=60.0, progress_interval=2.0,
+              retry_failed=True):
+    """
+    Summarize every URL from source with a pool of worker processes sharing one job queue.
+
+    The coordinator enqueues the jobs, starts the workers, requeues the jobs of
+    workers that die (restarting them while work remains) and prints aggregate
+    progress and throughput. More workers on the same machine can join the queue
+    with `python fleet.py worker`. Returns the final job counts.
+    """
+    queue = JobQueue(queue_path)
+    if source:
+        jobs, invalid = dedupe_urls(read_urls(source))
+        for url in invalid:
+            print(f"Skipping invalid URL: {url}")
+        queue.enqueue(jobs, retry_failed)
+
+    os.makedirs(output_dir, exist_ok=True)
+    ctx = multiprocessing.get_context("spawn")
+    env = split_rate_limits(workers)
+    host = socket.gethostname()
+    generation = 0
+
+    def spawn(slot):
+        nonlocal generation
+        generation += 1
+        process = ctx.Process(
+            target=run_worker,
+            args=(queue_path, f"{host}-w{slot}-g{generation}", output_dir, flow_options, threads, batch_size,
+                  fake_transcripts, env),
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    start = time.perf_counter()
+    initial_done = queue.counts()["done"]
+    processes = {slot: spawn(slot) for slot in range(workers)}
+    restarts = 0
+    while True:
+        time.sleep(progress_interval)
+        dead_pids = [p.pid for p in processes.values() if p.exitcode not in (None, 0)]
+        requeued = queue.requeue_dead(heartbeat_timeout, dead_pids, host)
+        counts = queue.counts()
+        remaining = counts["pending"] + counts["claimed"] + counts["running"]
+        elapsed = time.perf_counter() - start
+        rate = (counts["done"] - initial_done) / elapsed
+        print(f"[{elapsed:7.1f}s] done {counts['done']}  failed {counts['failed']}  running {counts['running']}"
+              f"  queued {counts['pending'] + counts['claimed']}  {rate:.2f} videos/s"
+              + (f"  requeued {requeued}" if requeued else ""))
+
+        for slot, process in processes.items():
+            if process.exitcode not in (None, 0) and remaining:
+                print(f"Worker {slot} died (exit code {process.exitcode}), restarting")
+                processes[slot] = spawn(slot)
+                restarts += 1
+        if not remaining:
+            break
+        if all(p.exitcode is not None for p in processes.values()) and counts["pending"]:
+            # Every worker exited while jobs were being requeued; start a fresh pool
+            processes = {slot: spawn(slot) for slot in range(workers)}
+
+    for process in processes.values():
+        process.join()
+    total = time.perf_counter() - start
+    print_fleet_summary(queue, total, restarts)
+    return queue.counts()
+
+def print_fleet_summary(queue, total, restarts=0):
+    """Print per-worker job counts and the fleet's aggregate throughput."""
+    print(f"\n{'worker':<32} {'jobs':>6} {'busy s':>8}")
+    for worker, jobs, busy in queue.worker_stats():
+        print(f"{worker:<32} {jobs:>6} {busy:>8.1f}")
+    counts = queue.counts()
+    finished = counts["done"] + counts["failed"]
+    print(f"\n{counts['done']}/{finished} succeeded in {total:.2f}s ({counts['done'] / total:.2f} videos/s)"
+          + (f", {restarts} worker restarts" if restarts else ""))
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize large video catalogs with a pool of worker processes")
+    parser.add_argument("command", choices=["run", "worker", "status"],
+                        help="run: enqueue and coordinate local workers; worker: join an existing queue on this machine; "
+                             "status: print job counts")
+    parser.add_argument("source", nargs="?", help="file with one URL per line ('-' for stdin), for 'run'")
+    parser.add_argument("--queue", default="fleet.db", help="SQLite job queue (on a local disk; shared by workers on this machine only)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="worker processes")
+    parser.add_argument("--threads", type=int, default=2, help="pipelines running at once per worker process")
+    parser.add_argument("--batch-size", type=int, default=4, help="jobs claimed per trip to the queue")
+    parser.add_argument("--output-dir", default=".", help="directory for generated HTML files")
+    parser.add_argument("--fake-transcripts", action="store_true",
+                        help="use synthetic transcripts (pair with OPENAI_BASE_URL pointing at the stub LLM server)")
+    args = parser.parse_args()
+
+    queue = JobQueue(args.queue)
+    if args.command == "status":
+        print(queue.counts())
+        return
+
+    from flow import flow_options_from_env
+    flow_options = flow_options_from_env()
+    fake_transcripts = {} if args.fake_transcripts else None
+    if args.command == "worker":
+        name = f"{socket.gethostname()}-{os.getpid()}"
+        finished = run_worker(args.queue, name, args.output_dir, flow_options, args.threads, args.batch_size,
+                              fake_transcripts)
+        print(f"Worker {name} finished {finished} jobs")
+        return
+    run_fleet(args.source, args.queue, args.workers, args.threads, args.batch_size, args.output_dir,
+              flow_options, fake_transcripts)
+
+if __name__ == "__main__":
+    main()
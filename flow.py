@@ -1,46 +1,212 @@
-from pocketflow import Flow
+from pocketflow import AsyncFlow, Flow
+import asyncio
+import os
+from utils.checkpoint import get_checkpoint_store
+from utils.near_duplicate import get_near_duplicate_index
+from utils.summary_store import get_summary_store
+from utils.tracing import instrument_flow
 from nodes import (
     GetYouTubeURLNode, 
     ExtractTranscriptNode, 
+    NormalizeTranscriptNode,
+    ChunkTranscriptNode,
+    NearDuplicateNode,
     IdentifyTopicsNode, 
+    StreamingTopicsNode,
+    SingleCallSummaryNode,
     TopicBatchNode,
+    ParallelTopicBatchNode,
     CombineResultsNode,
     CreateHTMLNode
 )
+from async_nodes import (
+    AsyncExtractTranscriptNode,
+    AsyncIdentifyTopicsNode,
+    AsyncSingleCallSummaryNode,
+    AsyncTopicBatchNode,
+    AsyncCreateHTMLNode
+)
 
-def create_youtube_summarizer_flow():
+def create_shared_store(url=""):
+    """
+    Return a fresh shared store for one summarizer run.
+    Stage outputs are checkpointed per video unless CHECKPOINT_DISABLE=1,
+    summaries are indexed for near-duplicate reuse unless NEAR_DUP_DISABLE=1, and
+    finished summaries are stored for lookup and search unless SUMMARY_DB_DISABLE=1.
+    """
+    return {
+        "url": url,
+        "video_id": "",
+        "title": "",
+        "language": "",
+        "transcript": "",
+        "transcript_segments": [],
+        "chunks": [],
+        "thumbnail_url": "",
+        "topics": [],
+        "processed_topics": [],
+        "output_file": "",
+        # Set once a prompt opening with the full transcript was sent, so a provider cache holds it
+        "transcript_prefix_sent": False,
+        "checkpoints": get_checkpoint_store(),
+        "near_duplicates": get_near_duplicate_index(),
+        "summaries": get_summary_store()
+    }
+
+def flow_options_from_env():
+    """Read create_youtube_summarizer_flow() options from environment variables."""
+    return {
+        # Number of topics processed concurrently in the map phase
+        "max_workers": int(os.environ.get("TOPIC_CONCURRENCY", "4")),
+        # Transcripts above this many tokens identify topics chunk by chunk
+        "hierarchical_threshold": int(os.environ.get("HIERARCHICAL_TOPIC_TOKENS", "12000")),
+        # Chunk groups of a long transcript whose candidate topics are requested at once
+        "topic_map_workers": int(os.environ.get("TOPIC_MAP_CONCURRENCY", "32")),
+        # Stream topic identification and overlap it with Q&A generation
+        "streaming": os.environ.get("STREAM_TOPICS") == "1",
+        # Transcripts up to this many tokens are summarized in a single LLM call (0 disables)
+        "single_call_threshold": int(os.environ.get("SINGLE_CALL_TOKENS", "4000")),
+        # Transcript similarity from which a near-duplicate's summary is reused (0 disables)
+        "near_duplicate_threshold": float(os.environ.get("NEAR_DUP_THRESHOLD", "0.7")),
+        # Build the asyncio flow (run it with run_flow() or await flow.run_async())
+        "use_async": os.environ.get("ASYNC_FLOW") == "1",
+        # Clean captions (tags, rolling overlaps, repetition) before prompting
+        "normalize_transcript": os.environ.get("TRANSCRIPT_NORMALIZE", "1") != "0",
+        # Also drop hesitation sounds (English and Vietnamese)
+        "trim_fillers": os.environ.get("TRANSCRIPT_TRIM_FILLERS") == "1",
+        # Map phase prompts: "auto", "shared_prefix" (full transcript, cacheable) or "retrieval" (excerpts)
+        "prompt_layout": os.environ.get("PROMPT_LAYOUT", "auto"),
+        # Share of the price a provider charges off cached prompt tokens
+        "cache_discount": float(os.environ.get("PROMPT_CACHE_DISCOUNT", "0.5")),
+    }
+
+def run_flow(flow, shared):
+    """Run a flow built by create_youtube_summarizer_flow(), starting an event loop for async flows."""
+    if isinstance(flow, AsyncFlow):
+        return asyncio.run(flow.run_async(shared))
+    return flow.run(shared)
+
+def create_youtube_summarizer_flow(max_workers=1, interactive=True, hierarchical_threshold=12000, streaming=False,
+                                   single_call_threshold=4000, near_duplicate_threshold=0.7, use_async=False,
+                                   prompt_layout="auto", cache_discount=0.5, normalize_transcript=True,
+                                   trim_fillers=False, topic_map_workers=32):
     """
     Create and return a YouTube video summarizing flow using MapReduce pattern.
+
+    Args:
+        max_workers: int, number of topics processed concurrently in the map phase.
+            1 keeps the sequential BatchNode.
+        interactive: bool, start by asking the user for a URL. When False the flow
+            starts at transcript extraction and expects shared["url"] to be set.
+        hierarchical_threshold: int, transcript size in tokens above which topics are
+            identified map-reduce style over transcript chunks.
+        streaming: bool, stream topic identification and start Q&A for each topic
+            as soon as it is parsed, skipping the separate map phase.
+        single_call_threshold: int, transcript size in tokens up to which topics and
+            Q&A are generated in one LLM call, falling back to the full flow when
+            that output is incomplete. 0 disables the fast path.
+        near_duplicate_threshold: float, transcript similarity (estimated Jaccard, or
+            containment for clips) from which the summary of an already summarized
+            near-duplicate video is reused. 0 disables the lookup.
+        use_async: bool, build an AsyncFlow whose transcript fetch, LLM calls and
+            map phase are awaited, so one event loop can drive many pipelines.
+            Run it with `await flow.run_async(shared)` or run_flow(). Streaming
+            topic identification is only available in the sync flow.
+        prompt_layout: str, how map phase prompts carry the transcript: "shared_prefix"
+            sends every topic the full transcript as the prefix the topic
+            identification call already sent, "retrieval" only the chunks relevant
+            to the topic, and "auto" picks the cheaper one given cache_discount.
+        cache_discount: float, share of the price the provider charges off prompt
+            tokens served from its prefix cache.
+        normalize_transcript: bool, clean the captions before prompting: strip
+            non-speech tags, drop rolling-caption overlaps and collapse repetition.
+        trim_fillers: bool, also remove hesitation sounds in English and Vietnamese.
+        topic_map_workers: int, chunk groups of a long transcript whose candidate
+            topics are requested concurrently (the rate limiter still applies).
     
     The flow follows these steps:
     1. Get YouTube URL from user
-    2. Extract transcript from the video
-    3. Identify key topics in the transcript
-    4. Map: Process each topic independently to generate Q&A pairs (BatchNode)
-    5. Reduce: Combine all processed topics
-    6. Create HTML output to visualize the summary
+    2. Extract transcript from the video and normalize its captions
+    3. Chunk and index the transcript for retrieval
+       (near-duplicates of summarized videos: reuse that summary, then straight to step 6 or 5;
+       short transcripts: topics and Q&A in one call, then straight to step 6)
+    4. Identify key topics in the transcript (map-reduce over chunks for long videos)
+    5. Map: Process each topic independently to generate Q&A pairs (BatchNode),
+       sending each topic the cached transcript prefix or only the chunks relevant to it
+    6. Reduce: Combine all processed topics
+    7. Create HTML output to visualize the summary
     """
+    if use_async and streaming:
+        raise ValueError("Streaming topic identification is not available in the async flow")
+
     # Create nodes
     get_url_node = GetYouTubeURLNode()
-    extract_transcript_node = ExtractTranscriptNode(max_retries=2)
-    identify_topics_node = IdentifyTopicsNode(max_retries=2)
+    extract_transcript_node = AsyncExtractTranscriptNode(max_retries=2) if use_async else ExtractTranscriptNode(max_retries=2)
+    normalize_transcript_node = NormalizeTranscriptNode(trim_fillers=trim_fillers)
+    chunk_transcript_node = ChunkTranscriptNode()
     
     # Map phase: Process each topic in batch
-    topic_batch_node = TopicBatchNode(max_retries=2)
+    layout = {"prompt_layout": prompt_layout, "cache_discount": cache_discount}
+    if use_async:
+        topic_batch_node = AsyncTopicBatchNode(max_workers=max_workers, max_retries=2, **layout)
+    elif max_workers > 1:
+        topic_batch_node = ParallelTopicBatchNode(max_workers=max_workers, max_retries=2, **layout)
+    else:
+        topic_batch_node = TopicBatchNode(max_retries=2, **layout)
+
+    if use_async:
+        identify_topics_node = AsyncIdentifyTopicsNode(
+            hierarchical_threshold=hierarchical_threshold, max_workers=topic_map_workers, max_retries=2
+        )
+    elif streaming:
+        identify_topics_node = StreamingTopicsNode(
+            qa_node=topic_batch_node, max_workers=max(1, max_workers), map_workers=topic_map_workers,
+            hierarchical_threshold=hierarchical_threshold, max_retries=2
+        )
+    else:
+        identify_topics_node = IdentifyTopicsNode(
+            hierarchical_threshold=hierarchical_threshold, max_workers=topic_map_workers, max_retries=2
+        )
     
     # Reduce phase: Combine results
     combine_results_node = CombineResultsNode()
     
     # Final output
-    create_html_node = CreateHTMLNode()
+    create_html_node = AsyncCreateHTMLNode() if use_async else CreateHTMLNode()
     
     # Connect nodes in sequence according to MapReduce pattern
-    get_url_node >> extract_transcript_node >> identify_topics_node
+    get_url_node >> extract_transcript_node
+    if normalize_transcript:
+        extract_transcript_node >> normalize_transcript_node >> chunk_transcript_node
+    else:
+        extract_transcript_node >> chunk_transcript_node
     identify_topics_node >> topic_batch_node >> combine_results_node
     combine_results_node >> create_html_node
-    
-    # Create flow starting with input node
-    return Flow(start=get_url_node)
 
-# Create the flow for easy import in main.py
-youtube_summarizer_flow = create_youtube_summarizer_flow()
\ No newline at end of file
+    # Streaming topic identification already ran the map phase
+    identify_topics_node - "streamed" >> combine_results_node
+
+    # Re-uploads and clips of summarized videos reuse that summary
+    summarize_from = chunk_transcript_node
+    if near_duplicate_threshold > 0:
+        near_duplicate_node = NearDuplicateNode(threshold=near_duplicate_threshold)
+        chunk_transcript_node >> near_duplicate_node
+        near_duplicate_node - "duplicate" >> combine_results_node
+        near_duplicate_node - "qa" >> topic_batch_node
+        summarize_from = near_duplicate_node
+
+    # Short transcripts try the single-call fast path first
+    if single_call_threshold > 0:
+        single_call_class = AsyncSingleCallSummaryNode if use_async else SingleCallSummaryNode
+        single_call_node = single_call_class(max_tokens=single_call_threshold, max_retries=2)
+        summarize_from >> single_call_node >> combine_results_node
+        single_call_node - "qa" >> topic_batch_node
+        single_call_node - "full" >> identify_topics_node
+    else:
+        summarize_from >> identify_topics_node
+    
+    # Create flow starting with input node; nodes record trace spans when a RunTracer is active
+    flow_class = AsyncFlow if use_async else Flow
+    if not interactive:
+        return instrument_flow(flow_class(start=extract_transcript_node))
+    return instrument_flow(flow_class(start=get_url_node))
@@ -1,4 +1,9 @@
-from flow import create_youtube_summarizer_flow
+from flow import create_youtube_summarizer_flow, create_shared_store, flow_options_from_env, run_flow
+from utils.llm_cache import get_llm_cache
+from utils.model_router import get_model_router
+from utils.rate_limiter import get_rate_limiter
+from utils.tracing import RunTracer
+import argparse
 import os
 import logging
 
@@ -22,6 +27,18 @@ def main():
     5. Reduce: Combine all processed topics
     6. Creates an HTML page visualizing the summary
     """
+    parser = argparse.ArgumentParser(description="YouTube Video Summarizer")
+    parser.add_argument("--batch", metavar="FILE", help="summarize every URL in FILE ('-' for stdin) instead of prompting")
+    parser.add_argument("--concurrency", type=int, default=4, help="maximum pipelines running at once in batch mode")
+    parser.add_argument("--ledger", default="bulk_ledger.jsonl", help="job ledger used to resume batch runs")
+    parser.add_argument("--output-dir", default=".", help="directory for generated HTML files in batch mode")
+    parser.add_argument("--resummarize", action="store_true",
+                        help="re-run every checkpointed video, reusing the stages that did not change")
+    parser.add_argument("--force", action="append", choices=["topics", "qa", "html"], default=[],
+                        help="with --resummarize, recompute this stage even if its checkpoint is valid (repeatable); "
+                             "topics and qa include single-call summaries of short videos")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("YouTube Video Summarizer (MapReduce Pattern)")
     print("=" * 60)
@@ -34,26 +51,30 @@ def main():
         print("  Linux/Mac: export OPENAI_API_KEY=your_api_key")
         return
     
+    flow_options = flow_options_from_env()
+
+    if args.batch:
+        from bulk import run_bulk
+        run_bulk(args.batch, args.concurrency, args.ledger, args.output_dir, flow_options)
+        return
+
+    if args.resummarize:
+        from bulk import resummarize_all
+        resummarize_all(args.concurrency, args.ledger, args.output_dir, flow_options, args.force)
+        return
+
     # Initialize the shared store
-    shared = {
-        "url": "",
-        "video_id": "",
-        "title": "",
-        "transcript": "",
-        "thumbnail_url": "",  # New field for the video thumbnail
-        "topics": [],
-        "processed_topics": [],  # New field for MapReduce pattern
-        "html": "",
-        "output_file": ""
-    }
+    shared = create_shared_store()
 
     # Create and run the flow
     logger.info("Creating YouTube summarizer flow with MapReduce pattern")
-    youtube_flow = create_youtube_summarizer_flow()
+    youtube_flow = create_youtube_summarizer_flow(**flow_options)
     
+    tracer = RunTracer("youtube_summarizer")
     try:
         logger.info("Starting flow execution")
-        youtube_flow.run(shared)
+        with tracer:
+            run_flow(youtube_flow, shared)
         
         # Print a success message with the output location
         if shared.get("output_file") and os.path.exists(shared["output_file"]):
@@ -65,10 +86,74 @@ def main():
             print(f"- Processed {len(shared['topics'])} topics")
             qa_count = sum(len(topic.get('questions', [])) for topic in shared['topics'])
             print(f"- Generated {qa_count} questions and answers")
+            if shared.get("route"):
+                print(f"- Route: {shared['route']}")
+            duplicate = shared.get("duplicate_of")
+            if duplicate:
+                print(f"- Reused the summary of {duplicate['kind']} {duplicate['video_id']} "
+                      f"(similarity {duplicate['jaccard']:.2f})")
+
+            normalization = shared.get("normalization_stats")
+            if normalization:
+                print(f"- Normalized transcript from {normalization['raw_tokens']} to {normalization['tokens']} tokens "
+                      f"({normalization['reduction']:.0%} fewer)")
+
+            token_stats = shared.get("map_token_stats")
+            if token_stats and token_stats.get("shared_prefix"):
+                print(f"- Map phase sent the full transcript as a shared, cacheable prefix "
+                      f"({token_stats['sent_tokens']} transcript tokens)")
+            elif token_stats:
+                print(f"- Map phase sent {token_stats['sent_tokens']} transcript tokens "
+                      f"instead of {token_stats['unchunked_tokens']} "
+                      f"(saved {token_stats['saved_tokens']})")
+
+            stream_stats = shared.get("stream_stats")
+            if stream_stats:
+                print(f"- First topic after {stream_stats.get('first_topic_seconds', 0):.2f}s, "
+                      f"first Q&A after {stream_stats.get('first_qa_seconds', 0):.2f}s")
+
+            cache = get_llm_cache()
+            if cache:
+                stats = cache.stats()
+                print(f"- LLM cache: {stats['hits']} hits, {stats['misses']} misses")
+
+            limits = get_rate_limiter().metrics()
+            print(f"- LLM requests: {limits['requests']}, throttled {limits['throttled']} "
+                  f"({limits['throttle_seconds']}s), retries {limits['retries']}")
+
+            routing = get_model_router().metrics()
+            tiers = ", ".join(f"{tier['model']} {tier['calls']} calls {tier['seconds']}s ${tier['cost_usd']:.4f}"
+                              for tier in routing["tiers"].values() if tier["calls"])
+            if tiers:
+                escalations = sum(routing["escalations"].values())
+                print(f"- Models: {tiers}; escalated {escalations} weak responses")
     except Exception as e:
         logger.error(f"Flow execution failed: {e}")
         print(f"\nError: {e}")
         print("Failed to complete the video summarization process.")
+    finally:
+        report_trace(tracer, shared)
+
+def report_trace(tracer, shared):
+    """Print per-node timings and write the run trace as JSON (and to OpenTelemetry if enabled)."""
+    if os.environ.get("TRACE_DISABLE") == "1":
+        return
+    tracer.root.attributes["video_id"] = shared.get("video_id")
+    print("\nTiming by node:")
+    for name, seconds, totals in tracer.node_summary():
+        print(f"- {name:<24} {seconds:>7.2f}s  llm calls {totals['llm_calls']}, "
+              f"tokens {totals['prompt_tokens']}+{totals['completion_tokens']} "
+              f"({totals['cached_prompt_tokens']} cached), "
+              f"cache hits {totals['cache_hits']}, retries {totals['retries'] + totals['llm_retries']}")
+    totals = tracer.root.totals()
+    if totals["prompt_tokens"]:
+        print(f"Prompt tokens: {totals['prompt_tokens']}, of which {totals['cached_prompt_tokens']} "
+              f"({totals['cached_prompt_tokens'] / totals['prompt_tokens']:.0%}) served from the provider's prompt cache")
+        print(f"Estimated LLM cost: ${totals.get('llm_cost_usd', 0):.4f}")
+    path = tracer.save(os.environ.get("TRACE_DIR", "runs"))
+    print(f"Trace written to {path}")
+    if os.environ.get("TRACE_OTEL") == "1" and not tracer.emit_otel():
+        print("TRACE_OTEL=1 but opentelemetry is not installed; skipped span export")
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,35 @@
 from pocketflow import Node, BatchNode
-from utils.youtube_utils import extract_video_id, get_transcript, get_video_title, get_thumbnail_url
-from utils.llm_utils import call_llm, extract_topics_from_llm_response
-from utils.html_utils import generate_html, save_html
-import yaml
+from utils.concurrency import map_bounded
+from utils.youtube_utils import extract_video_id, get_transcript_segments, get_video_title, get_thumbnail_url
+from utils.chunk_utils import (
+    BM25Index, chunk_segments, dedupe_topics, estimate_tokens, format_chunks, format_timestamp,
+    group_chunks, locate_chunk, select_chunks
+)
+from utils.llm_utils import call_llm_stream, extract_topics_from_llm_response
+from utils.model_router import call_routed_llm, get_model_router
+from utils.checkpoint import code_version, fingerprint
+from utils.near_duplicate import transcript_signature
+from utils.transcript_normalize import normalize_segments
+from utils import chunk_utils, html_utils, model_router, structured_output
+from utils.stream_parse import IncrementalYAMLListParser
+from utils.structured_output import (
+    QUESTIONS_SCHEMA, SUMMARY_SCHEMA, TOPICS_SCHEMA, format_instructions, json_mode_enabled, parse_structured,
+    response_format_params
+)
+from utils.html_utils import iter_html, save_html, write_css_asset
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import os
+import time
+
+# Question of the placeholder Q&A a topic gets when its questions could not be generated
+QA_ERROR_QUESTION = "Error generating questions"
+
+def summary_complete(topics):
+    """Whether a summary is worth keeping: it has topics and none of them is missing its Q&A."""
+    return bool(topics) and not any(
+        qa.get("question") == QA_ERROR_QUESTION for topic in topics for qa in topic.get("questions") or []
+    )
 
 class GetYouTubeURLNode(Node):
     def exec(self, _):
@@ -25,54 +52,362 @@ class ExtractTranscriptNode(Node):
         if not video_id:
             raise ValueError(f"Could not extract video ID from URL: {url}")
             
-        transcript = get_transcript(video_id)
-        if not transcript:
+        result = get_transcript_segments(video_id)
+        if not result:
             raise ValueError(f"Could not get transcript for video ID: {video_id}")
+        language, segments = result
             
         title = get_video_title(video_id)
         thumbnail_url = get_thumbnail_url(video_id)
-        return video_id, transcript, title, thumbnail_url
+        return video_id, language, segments, title, thumbnail_url
         
     def post(self, shared, prep_res, exec_res):
-        video_id, transcript, title, thumbnail_url = exec_res
+        video_id, language, segments, title, thumbnail_url = exec_res
         shared["video_id"] = video_id
-        shared["transcript"] = transcript
+        shared["language"] = language
+        shared["transcript_segments"] = segments
+        shared["transcript"] = segments.text()
         shared["title"] = title
         shared["thumbnail_url"] = thumbnail_url
-        shared["output_file"] = f"video_summary_{video_id}.html"
+        shared["output_file"] = os.path.join(shared.get("output_dir", ""), f"video_summary_{video_id}.html")
         return "default"
 
-class IdentifyTopicsNode(Node):
+class NormalizeTranscriptNode(Node):
+    """
+    Clean the captions before any prompt is built: strip non-speech tags, drop the
+    words rolling auto-generated captions repeat, collapse repeated phrases and,
+    with trim_fillers, remove hesitation sounds (English and Vietnamese).
+    Segments keep their timestamps, so chunks still link to the video.
+    """
+    def __init__(self, trim_fillers=False, **kwargs):
+        super().__init__(**kwargs)
+        self.trim_fillers = trim_fillers
+
     def prep(self, shared):
-        """Get transcript from shared store."""
-        return shared["transcript"], shared["title"]
-        
+        return shared.get("transcript_segments"), shared.get("language", "")
+
     def exec(self, inputs):
-        """Identify key topics in the video."""
-        transcript, title = inputs
-        
-        # Create prompt for topic identification
-        prompt = f"""
-        Analyze the following transcript from a YouTube video titled "{title}" and identify 3-5 main topics.
-        For each topic, provide a brief summary.
+        segments, language = inputs
+        if not segments:
+            return None
+        return normalize_segments(segments, language, self.trim_fillers)
+
+    def post(self, shared, prep_res, exec_res):
+        if exec_res is None:
+            return "default"
+        segments, stats = exec_res
+        shared["transcript_segments"] = segments
+        shared["transcript"] = segments.text()
+        shared["normalization_stats"] = stats
+        print(f"Normalized transcript: {stats['raw_tokens']} -> {stats['tokens']} tokens "
+              f"({stats['reduction']:.0%} fewer)")
+        return "default"
+
+class ChunkTranscriptNode(Node):
+    """Split the transcript into timestamped, token-budgeted chunks and index them for retrieval."""
+    def __init__(self, chunk_tokens=400, **kwargs):
+        super().__init__(**kwargs)
+        self.chunk_tokens = chunk_tokens
+
+    def prep(self, shared):
+        """Get caption segments, or wrap the plain transcript when segments are missing."""
+        segments = shared.get("transcript_segments")
+        if not segments:
+            segments = [{"text": shared["transcript"], "start": 0.0, "duration": 0.0}]
+        return segments
+
+    def exec(self, segments):
+        """Chunk the segments and build a BM25 index over the chunks."""
+        chunks = chunk_segments(segments, self.chunk_tokens)
+        return chunks, BM25Index(chunks)
+
+    def post(self, shared, prep_res, exec_res):
+        chunks, index = exec_res
+        shared["chunks"] = chunks
+        shared["chunk_index"] = index
+        return "default"
+
+class NearDuplicateNode(Node):
+    """
+    Reuse the summary of a near-duplicate video (re-upload, mirror or clip) from the
+    MinHash/LSH index in shared["near_duplicates"].
+
+    Returns "duplicate" when a summarized video with transcript similarity of at
+    least threshold has complete Q&A (go straight to CombineResultsNode), "qa"
+    when only Q&A has to be filled in: for duplicates with failed Q&A, and for
+    clips (transcript mostly contained in a summarized video), whose topics are
+    reused but answered from their own transcript. Returns "default" otherwise.
+    """
+    def __init__(self, threshold=0.7, **kwargs):
+        super().__init__(**kwargs)
+        self.threshold = threshold
+
+    def prep(self, shared):
+        return shared.get("near_duplicates"), shared["video_id"], shared["transcript"]
+
+    def exec(self, inputs):
+        """Fingerprint the transcript and find the most similar summarized video."""
+        index, video_id, transcript = inputs
+        if index is None:
+            return None
+        signature, shingles = transcript_signature(transcript)
+        for match in index.query(signature, shingles, exclude=video_id):
+            if not match.has_summary:
+                continue
+            if match.jaccard >= self.threshold:
+                return signature, shingles, match, "duplicate"
+            if match.containment >= self.threshold:
+                return signature, shingles, match, "clip"
+        return signature, shingles, None, None
+
+    def post(self, shared, prep_res, exec_res):
+        if exec_res is None:
+            return "default"
+        index, video_id, _ = prep_res
+        signature, shingles, match, kind = exec_res
+        index.add(video_id, signature, shingles)
+        summary = index.get_summary(match.video_id) if match else None
+        if not summary:
+            return "default"
+
+        topics = [{key: value for key, value in topic.items() if key != "start"} for topic in summary]
+        if kind == "clip":
+            # Keep the topics this clip talks about; their Q&A is regenerated from the clip
+            chunks, chunk_index = shared.get("chunks"), shared.get("chunk_index")
+            topics = [
+                {"topic": topic["topic"], "summary": topic.get("summary", "")}
+                for topic in topics
+                if not chunks or locate_chunk(chunk_index, chunks, f"{topic['topic']} {topic.get('summary', '')}")
+            ]
+            if not topics:
+                return "default"
+        else:
+            for topic in topics:
+                if any(q.get("question") == QA_ERROR_QUESTION for q in topic.get("questions", [])):
+                    topic["questions"] = []
+
+        shared["duplicate_of"] = {"video_id": match.video_id, "jaccard": round(match.jaccard, 3),
+                                  "containment": round(match.containment, 3), "kind": kind}
+        shared["topics"] = topics
+        print(f"Reusing the summary of {kind} {match.video_id} "
+              f"(similarity {match.jaccard:.2f}, containment {match.containment:.2f})")
+        if all(topic.get("questions") for topic in topics):
+            shared["processed_topics"] = topics
+            shared["route"] = kind
+            return "duplicate"
+        shared["route"] = f"{kind}+qa"
+        return "qa"
+
+# Attempt number of the item being executed. PocketFlow keeps it in self.cur_retry,
+# one attribute per node, but the map phase runs many items on the same node at
+# once; each item runs in its own context (map_bounded, gather_bounded, streamed
+# Q&A), so a context variable gives every item its own count.
+_current_attempt = contextvars.ContextVar("current_attempt", default=0)
+
+class CheckpointedNode(Node):
+    """
+    Node whose outputs are checkpointed per video when shared["checkpoints"] holds a CheckpointStore.
+
+    The checkpoint fingerprint covers the shared inputs the node reads, its
+    settings and the source code of the node (prompts included) plus its
+    declared dependencies. When a re-run finds a matching fingerprint, the stored
+    outputs are restored into shared and the node is skipped.
+    """
+    checkpoint_stage = None
+    checkpoint_inputs = ()
+    checkpoint_outputs = ()
+    checkpoint_params = ()
+    checkpoint_dependencies = ()
+
+    @property
+    def cur_retry(self):
+        """Attempt number of the current item (0 on the first try), set by the retry loop in _exec."""
+        return _current_attempt.get()
+
+    @cur_retry.setter
+    def cur_retry(self, value):
+        _current_attempt.set(value)
+
+    def checkpoint_fingerprint(self, shared):
+        classes = [cls for cls in type(self).__mro__ if cls.__module__ == __name__]
+        version = code_version(*dict.fromkeys(classes), *self.checkpoint_dependencies)
+        params = {name: getattr(self, name) for name in self.checkpoint_params}
+        inputs = [shared.get(key) for key in self.checkpoint_inputs]
+        return fingerprint(self.checkpoint_stage, version, params, inputs)
+
+    @property
+    def model_routing(self):
+        """Models the router sends each stage to, so a routing change invalidates LLM stages."""
+        return get_model_router().signature()
+
+    def checkpoint_valid(self, shared, entry):
+        """Hook for extra validity checks on a matching checkpoint."""
+        return True
+
+    def load_checkpoint(self, shared):
+        """
+        Restore the stage's outputs into shared if its checkpoint matches.
+        Returns (restored, action, fingerprint); fingerprint is None when checkpoints are off.
+        """
+        store, video_id = shared.get("checkpoints"), shared.get("video_id")
+        if not store or not video_id:
+            return False, None, None
+
+        stage_fingerprint = self.checkpoint_fingerprint(shared)
+        entry = store.get_stage(video_id, self.checkpoint_stage)
+        if entry and entry["fingerprint"] == stage_fingerprint and self.checkpoint_valid(shared, entry):
+            print(f"Reusing checkpointed '{self.checkpoint_stage}' stage")
+            shared.update(entry["outputs"])
+            return True, entry["action"], stage_fingerprint
+        return False, None, stage_fingerprint
+
+    def save_checkpoint(self, shared, stage_fingerprint, action):
+        """Store the stage's outputs under the fingerprint computed before it ran."""
+        if stage_fingerprint is None:
+            return
+        outputs = {key: shared.get(key) for key in self.checkpoint_outputs}
+        shared["checkpoints"].save_stage(
+            shared["video_id"], self.checkpoint_stage, stage_fingerprint, outputs, action, shared.get("url")
+        )
+
+    def _run(self, shared):
+        restored, action, stage_fingerprint = self.load_checkpoint(shared)
+        if restored:
+            return action
+        action = super()._run(shared)
+        self.save_checkpoint(shared, stage_fingerprint, action)
+        return action
+
+def transcript_prefix(transcript, title):
+    """
+    Opening of every prompt that carries the full transcript: topic identification,
+    the single-call summary and shared-prefix Q&A. Prompts put their task after it,
+    so a provider-side prompt cache can serve the transcript to all of them after
+    the first call.
+    """
+    return f"""
+        Below is the transcript of a YouTube video titled "{title}".
 
         TRANSCRIPT:
         {transcript}
+        """
+
+def excerpt_prefix(excerpt, title):
+    """Opening of a Q&A prompt that carries only the transcript chunks most relevant to its topic."""
+    return f"""
+        Below are the parts of the transcript of a YouTube video titled "{title}" that are most relevant to one of its topics.
 
-        Format your response as YAML:
-        ```yaml
-        topics:
-          - topic: "Topic 1 Title"
-            summary: "Brief summary of Topic 1"
-          - topic: "Topic 2 Title"
-            summary: "Brief summary of Topic 2"
-          - topic: "Topic 3 Title"
-            summary: "Brief summary of Topic 3"
-        ```
+        TRANSCRIPT PARTS:
+        {excerpt}
         """
+
+class IdentifyTopicsNode(CheckpointedNode):
+    """
+    Identify the main topics of the video.
+
+    Transcripts above hierarchical_threshold tokens are handled map-reduce style:
+    candidate topics are extracted from groups of chunks in parallel, then merged
+    and deduplicated into the final 3-5 topics in a small reduce prompt. Up to
+    max_workers groups are in flight at once, so latency stays about flat as
+    transcripts grow; the shared rate limiter caps the actual request rate.
+    """
+    checkpoint_stage = "topics"
+    checkpoint_inputs = ("transcript", "title")
+    checkpoint_outputs = ("topics", "transcript_prefix_sent")
+    checkpoint_params = ("hierarchical_threshold", "group_tokens", "model_routing")
+    checkpoint_dependencies = (model_router, structured_output, transcript_prefix)
+
+    def __init__(self, hierarchical_threshold=12000, group_tokens=6000, max_workers=32, **kwargs):
+        super().__init__(**kwargs)
+        self.hierarchical_threshold = hierarchical_threshold
+        self.group_tokens = group_tokens
+        self.max_workers = max_workers
+
+    def prep(self, shared):
+        """Get transcript and its chunks from shared store."""
+        return shared["transcript"], shared["title"], shared.get("chunks")
         
-        response = call_llm(prompt)
+    def exec(self, inputs):
+        """Identify key topics in the video."""
+        transcript, title, chunks = inputs
+        if estimate_tokens(transcript) > self.hierarchical_threshold:
+            return self.exec_hierarchical(transcript, title, chunks)
+        
+        # Retries bypass the cache so a bad cached response is not replayed
+        json_mode = json_mode_enabled()
+        response = call_routed_llm(
+            "topics", self.build_prompt(transcript, title, json_mode),
+            use_cache=self.cur_retry == 0, **response_format_params(json_mode)
+        )
         return extract_topics_from_llm_response(response)
+
+    def build_prompt(self, transcript, title, json_mode=False):
+        """Create prompt for topic identification."""
+        return transcript_prefix(transcript, title) + f"""
+        Identify 3-5 main topics of this video. For each topic, provide a brief summary.
+
+        {format_instructions(TOPICS_SCHEMA, json_mode, indent="        ")}
+        """
+
+    def exec_hierarchical(self, transcript, title, chunks):
+        """Map: candidate topics per group of chunks in parallel. Reduce: merge into 3-5 topics."""
+        if not chunks:
+            chunks = chunk_segments([{"text": transcript, "start": 0.0, "duration": 0.0}])
+        groups = group_chunks(chunks, self.group_tokens)
+        use_cache = self.cur_retry == 0
+        json_mode = json_mode_enabled()
+        format_params = response_format_params(json_mode)
+
+        def candidates_for(group):
+            prompt = self.build_candidates_prompt(group, title, json_mode)
+            return extract_topics_from_llm_response(
+                call_routed_llm("topic_candidates", prompt, use_cache=use_cache, **format_params)
+            )
+
+        candidates = [topic for topics in map_bounded(candidates_for, groups, self.max_workers) for topic in topics]
+        candidates = dedupe_topics(candidates)
+        if len(candidates) <= 5:
+            return candidates
+
+        reduce_prompt = self.build_reduce_prompt(candidates, title, json_mode)
+        topics = extract_topics_from_llm_response(
+            call_routed_llm("topic_reduce", reduce_prompt, use_cache=use_cache, **format_params)
+        )
+        return self.reduced_topics(topics, candidates)
+
+    def build_candidates_prompt(self, group, title, json_mode=False):
+        """Create the map prompt: candidate topics of one group of chunks."""
+        return f"""
+        Below is one part ({format_timestamp(group[0]['start'])} - {format_timestamp(group[-1]['end'])}) of the transcript of a YouTube video titled "{title}".
+        Identify 1-3 main topics discussed in this part. For each topic, provide a brief summary.
+
+        TRANSCRIPT PART:
+        {format_chunks(group)}
+
+        {format_instructions(TOPICS_SCHEMA, json_mode, example=[{"topic": "Topic Title", "summary": "Brief summary of the topic"}], indent="        ")}
+        """
+
+    def build_reduce_prompt(self, candidates, title, json_mode=False):
+        """Create the reduce prompt: merge candidate topics into the 3-5 main topics."""
+        import yaml
+        candidate_yaml = yaml.safe_dump({"topics": candidates}, allow_unicode=True, sort_keys=False)
+        return f"""
+        The following candidate topics were extracted from consecutive parts of a YouTube video titled "{title}".
+        Merge overlapping candidates and select the 3-5 main topics of the whole video.
+        For each topic, provide a brief summary covering all the parts it appears in.
+
+        CANDIDATE TOPICS:
+        {candidate_yaml}
+
+        {format_instructions(TOPICS_SCHEMA, json_mode, indent="        ")}
+        """
+
+    def reduced_topics(self, topics, candidates):
+        """Return the reduce step's topics, or the first candidates if it failed."""
+        if not topics:
+            print("Reduce step failed, falling back to the first deduplicated candidate topics")
+            topics = candidates[:5]
+        return topics
         
     def post(self, shared, prep_res, exec_res):
         # Initialize topics with empty questions list
@@ -81,86 +416,360 @@ class IdentifyTopicsNode(Node):
             topic["questions"] = []
             
         shared["topics"] = topics
+        if estimate_tokens(shared["transcript"]) <= self.hierarchical_threshold:
+            shared["transcript_prefix_sent"] = True
         return "default"
 
-class TopicBatchNode(BatchNode):
+class TopicBatchNode(CheckpointedNode, BatchNode):
+    """
+    Map phase: 2-3 Q&A pairs per topic, one LLM call each.
+
+    Each prompt opens with either the full transcript, as the same prefix the
+    topic identification call sent (prompt_layout "shared_prefix"), or only the
+    chunks most relevant to the topic ("retrieval"), and ends with the topic.
+    A provider prompt cache bills a repeated prefix at (1 - cache_discount), so
+    "auto" sends the shared prefix when the transcript is already cached and
+    that costs less than context_tokens of uncached excerpts per topic: short
+    transcripts or large discounts. Long transcripts keep using retrieval.
+    """
+    checkpoint_stage = "qa"
+    checkpoint_inputs = ("topics", "transcript", "transcript_prefix_sent")
+    checkpoint_outputs = ("processed_topics", "map_token_stats")
+    checkpoint_params = ("context_tokens", "prompt_layout", "cache_discount", "model_routing")
+    checkpoint_dependencies = (model_router, chunk_utils, structured_output, transcript_prefix, excerpt_prefix)
+
+    def __init__(self, context_tokens=1500, prompt_layout="auto", cache_discount=0.5, **kwargs):
+        super().__init__(**kwargs)
+        if prompt_layout not in ("auto", "shared_prefix", "retrieval"):
+            raise ValueError(f"Unknown prompt layout: {prompt_layout}")
+        self.context_tokens = context_tokens
+        self.prompt_layout = prompt_layout
+        self.cache_discount = cache_discount
+
     def prep(self, shared):
-        """Return topics as an iterable for batch processing."""
-        topics = shared["topics"]
-        transcript = shared["transcript"]
-        
-        # For each topic, we'll pass both the topic and the transcript
-        return [(topic, transcript) for topic in topics]
+        """
+        Return topics as an iterable for batch processing.
+        Each topic is paired with the prompt prefix its Q&A task is appended to.
+        Topics that already have Q&A (from the single-call fast path) get None.
+        """
+        transcript, title, chunks = shared["transcript"], shared["title"], shared.get("chunks")
+        shared_prefix = self.uses_shared_prefix(transcript, chunks, shared.get("transcript_prefix_sent", False))
+        return [
+            (topic, None if topic.get("questions") else
+             self.topic_prefix(topic, transcript, title, chunks, shared.get("chunk_index"), shared_prefix))
+            for topic in shared["topics"]
+        ]
+
+    def uses_shared_prefix(self, transcript, chunks, prefix_sent):
+        """Whether every topic's prompt opens with the full transcript rather than its own excerpt."""
+        if not chunks or self.prompt_layout == "shared_prefix":
+            return True
+        if self.prompt_layout == "retrieval" or not prefix_sent:
+            return False
+        return estimate_tokens(transcript) * (1 - self.cache_discount) < self.context_tokens
+
+    def topic_prefix(self, topic, transcript, title, chunks=None, index=None, shared_prefix=True):
+        """Return the prompt text sent before a topic's task: the shared transcript prefix, or its most relevant chunks."""
+        if shared_prefix or not chunks:
+            return transcript_prefix(transcript, title)
+        query = f"{topic['topic']} {topic['summary']}"
+        return excerpt_prefix(format_chunks(select_chunks(index, chunks, query, self.context_tokens)), title)
     
     def exec(self, batch_item):
         """Process a single topic to generate Q&A pairs."""
-        topic, transcript = batch_item
-        
-        # Generate Q&A pairs for this specific topic
-        topic_prompt = f"""
-        Based on this transcript portion about "{topic['topic']}", generate 2-3 insightful questions and answers.
-        
+        topic, prefix = batch_item
+        if prefix is None:
+            return topic
+        json_mode = json_mode_enabled()
+        response = call_routed_llm(
+            "qa", self.build_prompt(topic, prefix, json_mode),
+            use_cache=self.cur_retry == 0, **response_format_params(json_mode)
+        )
+        return self.add_questions(topic, response)
+
+    def build_prompt(self, topic, prefix, json_mode=False):
+        """Create the Q&A prompt for one topic: the transcript prefix, then the topic-specific task."""
+        return prefix + f"""
+        Generate 2-3 insightful questions and answers about the following topic of this video, based on the transcript above.
+
         TOPIC: {topic['topic']}
         SUMMARY: {topic['summary']}
-        
-        TRANSCRIPT:
-        {transcript}
-        
-        Format your response as YAML:
-        ```yaml
-        questions:
-          - question: "First question about {topic['topic']}?"
-            answer: "Comprehensive answer to the first question."
-          - question: "Second question about {topic['topic']}?"
-            answer: "Comprehensive answer to the second question."
-        ```
+
+        {format_instructions(QUESTIONS_SCHEMA, json_mode, example=[
+            {"question": f"First question about {topic['topic']}?", "answer": "Comprehensive answer to the first question."},
+            {"question": f"Second question about {topic['topic']}?", "answer": "Comprehensive answer to the second question."},
+        ], indent="        ")}
         """
+
+    def add_questions(self, topic, response):
+        """Parse the Q&A response into topic["questions"], with a placeholder when nothing parses."""
+        result = parse_structured(response, QUESTIONS_SCHEMA)
+        if result.items:
+            topic["questions"] = result.items
+        else:
+            print(f"Error processing Q&A for topic '{topic['topic']}': no questions found in the response")
+            topic["questions"] = [{"question": QA_ERROR_QUESTION, "answer": "Please try again."}]
         
-        response = call_llm(topic_prompt)
-        try:
-            # Extract YAML content
-            if "```yaml" in response:
-                yaml_content = response.split("```yaml")[1].split("```")[0].strip()
-            elif "```" in response:
-                yaml_content = response.split("```")[1].split("```")[0].strip()
-            else:
-                yaml_content = response.strip()
-            
-            qa_data = yaml.safe_load(yaml_content)
-            
-            # Update topic with questions
-            if isinstance(qa_data, dict) and "questions" in qa_data:
-                topic["questions"] = qa_data["questions"]
-            
-        except Exception as e:
-            print(f"Error processing Q&A for topic '{topic['topic']}': {e}")
-            topic["questions"] = [{"question": "Error generating questions", "answer": "Please try again."}]
-        
+        return topic
+
+    def exec_fallback(self, batch_item, exc):
+        """Keep the batch going when a single topic fails after all retries."""
+        topic, _ = batch_item
+        print(f"Failed to generate Q&A for topic '{topic['topic']}': {exc}")
+        topic["questions"] = [{"question": QA_ERROR_QUESTION, "answer": "Please try again."}]
         return topic
     
     def post(self, shared, prep_res, exec_res_list):
         """Store the processed topics with their Q&A pairs."""
         shared["processed_topics"] = exec_res_list
+        shared_prefix = self.uses_shared_prefix(shared["transcript"], shared.get("chunks"),
+                                                shared.get("transcript_prefix_sent", False))
+        record_map_token_stats(shared, [prefix for _, prefix in prep_res if prefix is not None], shared_prefix)
+        return "default"
+
+def record_map_token_stats(shared, prefixes, shared_prefix):
+    """Record how many transcript tokens the map phase sent versus the full transcript, and in which layout."""
+    full_tokens = estimate_tokens(shared["transcript"])
+    sent_tokens = sum(estimate_tokens(prefix) for prefix in prefixes)
+    shared["map_token_stats"] = {
+        "full_transcript_tokens": full_tokens,
+        "unchunked_tokens": full_tokens * len(prefixes),
+        "sent_tokens": sent_tokens,
+        "saved_tokens": full_tokens * len(prefixes) - sent_tokens,
+        "shared_prefix": shared_prefix,
+    }
+
+class ParallelTopicBatchNode(TopicBatchNode):
+    """
+    TopicBatchNode that processes topics concurrently on a bounded thread pool.
+    Results keep the original topic order, and each topic keeps its own retries.
+    """
+    def __init__(self, max_workers=4, **kwargs):
+        super().__init__(**kwargs)
+        self.max_workers = max_workers
+
+    def _exec(self, items):
+        # Node._exec runs retries and exec_fallback for a single item
+        run_item = super(BatchNode, self)._exec
+        return map_bounded(run_item, items, self.max_workers)
+
+class StreamingTopicsNode(IdentifyTopicsNode):
+    """
+    Identify topics from a streamed completion and start Q&A generation for each
+    topic as soon as it has been parsed, overlapping the two LLM stages.
+
+    Returns the "streamed" action when the map phase is already done, so the flow
+    can skip TopicBatchNode. Long transcripts take the hierarchical path and
+    return "default", leaving Q&A to the map phase.
+    """
+    checkpoint_outputs = ("topics", "processed_topics", "stream_stats", "map_token_stats", "transcript_prefix_sent")
+    checkpoint_params = ("hierarchical_threshold", "group_tokens", "qa_settings", "model_routing")
+
+    @property
+    def qa_settings(self):
+        """The Q&A node's settings and code, which shape the streamed processed_topics."""
+        classes = [cls for cls in type(self.qa_node).__mro__ if cls.__module__ == __name__]
+        return {
+            "context_tokens": self.qa_node.context_tokens,
+            "prompt_layout": self.qa_node.prompt_layout,
+            "cache_discount": self.qa_node.cache_discount,
+            "version": code_version(*dict.fromkeys(classes), *self.qa_node.checkpoint_dependencies),
+        }
+
+    def __init__(self, qa_node=None, max_workers=4, map_workers=32, **kwargs):
+        super().__init__(max_workers=map_workers, **kwargs)
+        self.qa_workers = max_workers
+        self.qa_node = qa_node or TopicBatchNode(max_retries=2)
+
+    def prep(self, shared):
+        """Get transcript, chunks and chunk index from shared store."""
+        return shared["transcript"], shared["title"], shared.get("chunks"), shared.get("chunk_index")
+
+    def exec(self, inputs):
+        """Stream topics and run Q&A for each one on a bounded pool while the stream continues."""
+        transcript, title, chunks, index = inputs
+        if estimate_tokens(transcript) > self.hierarchical_threshold:
+            return self.exec_hierarchical(transcript, title, chunks), None, None, {}
+
+        start = time.perf_counter()
+        stats = {}
+        topics, prefixes, futures, parts = [], [], [], []
+        # The identification prompt below sends the transcript prefix before any topic is parsed
+        shared_prefix = stats["shared_prefix"] = self.qa_node.uses_shared_prefix(transcript, chunks, prefix_sent=True)
+        parser = IncrementalYAMLListParser("topics")
+        # Node._exec gives each topic the Q&A node's retries and fallback
+        run_qa = super(BatchNode, self.qa_node)._exec
+
+        def on_qa_done(_):
+            stats.setdefault("first_qa_seconds", time.perf_counter() - start)
+
+        with ThreadPoolExecutor(max_workers=self.qa_workers) as pool:
+            def submit(topic):
+                valid = TOPICS_SCHEMA.validate([topic])
+                if not valid:
+                    return
+                topic = valid[0]
+                stats.setdefault("first_topic_seconds", time.perf_counter() - start)
+                topic["questions"] = []
+                prefix = self.qa_node.topic_prefix(topic, transcript, title, chunks, index, shared_prefix)
+                future = pool.submit(contextvars.copy_context().run, run_qa, (topic, prefix))
+                future.add_done_callback(on_qa_done)
+                topics.append(topic)
+                prefixes.append(prefix)
+                futures.append(future)
+
+            # YAML rather than JSON mode: it completes line by line, so topics can be parsed mid-stream
+            prompt = self.build_prompt(transcript, title, json_mode=False)
+            # Topics are used as they stream in, so they go to the model a cascade would end on
+            model = get_model_router().stream_model("topics", estimate_tokens(prompt))
+            for delta in call_llm_stream(prompt, model=model, use_cache=self.cur_retry == 0):
+                parts.append(delta)
+                for topic in parser.feed(delta):
+                    submit(topic)
+            for topic in parser.close():
+                submit(topic)
+            if not topics:
+                # The stream did not parse incrementally; fall back to the whole response
+                for topic in extract_topics_from_llm_response("".join(parts)):
+                    submit(topic)
+
+            processed = [future.result() for future in futures]
+
+        stats["total_seconds"] = time.perf_counter() - start
+        return topics, processed, prefixes, stats
+
+    def post(self, shared, prep_res, exec_res):
+        topics, processed, prefixes, stats = exec_res
+        if processed is None:
+            return super().post(shared, prep_res, topics)
+
+        shared["topics"] = topics
+        shared["processed_topics"] = processed
+        shared["stream_stats"] = stats
+        shared["transcript_prefix_sent"] = True
+        record_map_token_stats(shared, prefixes, stats["shared_prefix"])
+        return "streamed"
+
+class SingleCallSummaryNode(CheckpointedNode):
+    """
+    Fast path for short transcripts: topics and their Q&A in one structured LLM call
+    instead of 1 + N round trips.
+
+    Returns "default" when every topic came back with Q&A, "qa" when the topics
+    are usable but some lack Q&A (TopicBatchNode fills in only those), and
+    "full" when the transcript is over max_tokens or too few topics were parsed.
+    """
+    checkpoint_stage = "single_call"
+    checkpoint_inputs = ("transcript", "title")
+    checkpoint_outputs = ("topics", "processed_topics", "route", "transcript_prefix_sent")
+    checkpoint_params = ("max_tokens", "min_topics", "model_routing")
+    checkpoint_dependencies = (model_router, structured_output, transcript_prefix)
+
+    def __init__(self, max_tokens=4000, min_topics=2, **kwargs):
+        super().__init__(**kwargs)
+        self.max_tokens = max_tokens
+        self.min_topics = min_topics
+
+    def prep(self, shared):
+        """Get transcript and title from shared store."""
+        return shared["transcript"], shared["title"]
+
+    def exec(self, inputs):
+        """Summarize topics and Q&A in one call, or return None for long transcripts."""
+        transcript, title = inputs
+        if estimate_tokens(transcript) > self.max_tokens:
+            return None
+
+        json_mode = json_mode_enabled()
+        response = call_routed_llm(
+            "single_call", self.build_prompt(transcript, title, json_mode),
+            use_cache=self.cur_retry == 0, **response_format_params(json_mode)
+        )
+        return parse_structured(response, SUMMARY_SCHEMA).items
+
+    def build_prompt(self, transcript, title, json_mode=False):
+        """Create the prompt for topics with Q&A in one call."""
+        return transcript_prefix(transcript, title) + f"""
+        Identify 3-5 main topics of this video. For each topic, provide a brief summary and 2-3 insightful questions with answers.
+
+        {format_instructions(SUMMARY_SCHEMA, json_mode, indent="        ")}
+        """
+
+    def post(self, shared, prep_res, exec_res):
+        if exec_res is None:
+            shared["route"] = "map_reduce"
+            return "full"
+        shared["transcript_prefix_sent"] = True
+        if len(exec_res) < self.min_topics:
+            print(f"Single-call summary returned {len(exec_res)} topics, falling back to the full flow")
+            shared["route"] = "map_reduce"
+            return "full"
+
+        shared["topics"] = exec_res
+        missing = sum(1 for topic in exec_res if not topic["questions"])
+        if missing:
+            print(f"Single-call summary left {missing} topics without Q&A, generating them separately")
+            shared["route"] = "single_call+qa"
+            return "qa"
+        shared["processed_topics"] = exec_res
+        shared["route"] = "single_call"
         return "default"
 
 class CombineResultsNode(Node):
     def prep(self, shared):
-        """Get processed topics from shared store."""
-        return shared["processed_topics"]
+        """Get processed topics, and the transcript chunks used to timestamp them, from shared store."""
+        return shared["processed_topics"], shared.get("chunks"), shared.get("chunk_index")
     
-    def exec(self, processed_topics):
+    def exec(self, inputs):
         """Combine and organize all processed topics."""
-        # This is a simple passthrough since our topics are already processed
-        # In a more complex scenario, we might do additional processing here
+        processed_topics, chunks, index = inputs
+        # Anchor each topic at the transcript chunk that matches it best, for deep links
+        if chunks and index:
+            for topic in processed_topics:
+                chunk = locate_chunk(index, chunks, f"{topic['topic']} {topic.get('summary', '')}")
+                if chunk is not None:
+                    topic["start"] = chunk["start"]
         return processed_topics
     
     def post(self, shared, prep_res, exec_res):
-        """Store combined topics back to shared store."""
+        """Store combined topics back to shared store, and, when complete, in the near-duplicate index for reuse and in the summary store."""
         shared["topics"] = exec_res
+        # Summaries with failed Q&A are not kept, or near-duplicates would reuse them, and bulk
+        # runs and the server would never redo them
+        complete = summary_complete(exec_res)
+        index = shared.get("near_duplicates")
+        if index is not None and shared.get("video_id") and complete:
+            index.set_summary(shared["video_id"], exec_res)
+        summaries = shared.get("summaries")
+        if summaries is not None and shared.get("video_id") and complete:
+            summaries.save(shared["video_id"], shared.get("title"), exec_res, url=shared.get("url"),
+                           thumbnail_url=shared.get("thumbnail_url"), language=shared.get("language"))
         print(f"Successfully processed {len(exec_res)} topics with Q&A pairs")
         return "default"
 
-class CreateHTMLNode(Node):
+class CreateHTMLNode(CheckpointedNode):
+    """
+    Stream the summary page straight to the output file.
+    Pages link to one shared stylesheet written next to them (inline_css=True embeds it instead).
+    """
+    checkpoint_stage = "html"
+    checkpoint_inputs = ("topics", "title", "video_id", "thumbnail_url", "output_file")
+    checkpoint_params = ("inline_css",)
+    checkpoint_dependencies = (html_utils,)
+
+    def __init__(self, inline_css=False, **kwargs):
+        super().__init__(**kwargs)
+        self.inline_css = inline_css
+
+    def checkpoint_valid(self, shared, entry):
+        """A page that was deleted since the checkpoint has to be rendered again."""
+        return os.path.exists(shared["output_file"])
+
+    def save_checkpoint(self, shared, stage_fingerprint, action):
+        """Checkpoint only a page that was written; a failed write is retried on the next run."""
+        if shared.get("html_saved"):
+            super().save_checkpoint(shared, stage_fingerprint, action)
+
     def prep(self, shared):
         """Get topics, title, and thumbnail URL from shared store."""
         return shared["topics"], shared["title"], shared["output_file"], shared["video_id"], shared["thumbnail_url"]
@@ -169,18 +778,18 @@ class CreateHTMLNode(Node):
         """Generate HTML for the video summary."""
         topics, title, output_file, video_id, thumbnail_url = inputs
         
-        # Generate HTML
-        html_content = generate_html(title, topics, video_id, thumbnail_url)
+        css_href = None
+        if not self.inline_css:
+            css_href = os.path.basename(write_css_asset(os.path.dirname(output_file) or "."))
         
-        # Save HTML to file
-        success = save_html(html_content, output_file)
+        # Render and save HTML chunk by chunk, without building the page in memory
+        success = save_html(iter_html(title, topics, video_id, thumbnail_url, css_href), output_file)
         
-        return html_content, output_file, success
+        return output_file, success
         
     def post(self, shared, prep_res, exec_res):
-        html_content, output_file, success = exec_res
-        
-        shared["html"] = html_content
+        output_file, success = exec_res
+        shared["html_saved"] = success
         
         if success:
             print(f"\nSummary successfully generated and saved to {output_file}")
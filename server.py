@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+from flow import create_youtube_summarizer_flow, create_shared_store, flow_options_from_env
+from nodes import summary_complete
+from utils.html_utils import SUMMARY_CSS, iter_html
+from utils.summary_store import get_summary_store
+from utils.youtube_utils import extract_video_id
+
+logger = logging.getLogger(__name__)
+
+class SummaryService:
+    """
+    Runs the summarizer pipeline for incoming URLs.
+
+    Concurrent requests for the same video_id share a single pipeline execution:
+    the first request starts it and every other waiter awaits the same future.
+    Recently finished summaries are kept in a small in-memory LRU, and videos
+    summarized before (by this or any other process) are served from the
+    summary store without running the pipeline.
+
+    Summaries whose Q&A failed are returned but neither kept nor stored, so the
+    next request for the video runs the pipeline again.
+
+    Every pipeline gets its own flow (nodes keep per-run state, and building a
+    flow is cheap). A sync flow runs on a pool of max_pipelines threads; an
+    async flow (use_async=True) runs on the server's event loop, with at most
+    max_pipelines pipelines in progress.
+    """
+    def __init__(self, flow_options=None, max_pipelines=4, output_dir="results", result_cache_size=256):
+        self.flow_options = {**(flow_options or {}), "interactive": False}
+        self.use_async = bool(self.flow_options.get("use_async"))
+        self.output_dir = output_dir
+        self.summaries = get_summary_store()
+        self.result_cache_size = result_cache_size
+        self._executor = ThreadPoolExecutor(max_workers=max_pipelines, thread_name_prefix="pipeline")
+        self._pipeline_slots = asyncio.Semaphore(max_pipelines)
+        self._inflight = {}
+        self._results = OrderedDict()
+        self.stats = {"requests": 0, "pipelines": 0, "coalesced": 0, "result_hits": 0, "stored_hits": 0,
+                      "incomplete": 0, "failures": 0}
+
+    async def summarize(self, url):
+        """Return the summary for url, joining an in-flight run for the same video if there is one."""
+        self.stats["requests"] += 1
+        video_id = extract_video_id(url)
+        if not video_id:
+            raise ValueError(f"Could not extract video ID from URL: {url}")
+
+        if video_id in self._results:
+            self._results.move_to_end(video_id)
+            self.stats["result_hits"] += 1
+            return self._results[video_id]
+
+        stored = self._stored_result(video_id)
+        if stored is not None:
+            self.stats["stored_hits"] += 1
+            self._remember(video_id, stored)
+            return stored
+
+        future = self._inflight.get(video_id)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[video_id] = future
+        self.stats["pipelines"] += 1
+        try:
+            if self.use_async:
+                async with self._pipeline_slots:
+                    result = await self._run_pipeline_async(url)
+            else:
+                result = await loop.run_in_executor(self._executor, self._run_pipeline, url)
+            future.set_result(result)
+            if summary_complete(result["topics"]):
+                self._remember(video_id, result)
+            else:
+                self.stats["incomplete"] += 1
+        except Exception as e:
+            self.stats["failures"] += 1
+            future.set_exception(e)
+        finally:
+            del self._inflight[video_id]
+        return await future
+
+    def _run_pipeline(self, url):
+        shared = create_shared_store(url)
+        shared["output_dir"] = self.output_dir
+        start = time.perf_counter()
+        create_youtube_summarizer_flow(**self.flow_options).run(shared)
+        return self._result(shared, start)
+
+    async def _run_pipeline_async(self, url):
+        shared = create_shared_store(url)
+        shared["output_dir"] = self.output_dir
+        start = time.perf_counter()
+        await create_youtube_summarizer_flow(**self.flow_options).run_async(shared)
+        return self._result(shared, start)
+
+    def _result(self, shared, start):
+        return {
+            "video_id": shared["video_id"],
+            "title": shared["title"],
+            "thumbnail_url": shared["thumbnail_url"],
+            "topics": shared["topics"],
+            "output_file": shared["output_file"],
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+
+    def _stored_result(self, video_id):
+        """A result from the summary store, or None if the video was not summarized yet."""
+        start = time.perf_counter()
+        record = self.summaries.get(video_id) if self.summaries is not None else None
+        if record is None:
+            return None
+        output_file = os.path.join(self.output_dir, f"video_summary_{video_id}.html")
+        return {
+            "video_id": video_id,
+            "title": record["title"],
+            "thumbnail_url": record["thumbnail_url"],
+            "topics": record["topics"],
+            "output_file": output_file if os.path.exists(output_file) else None,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+
+    def search(self, text, limit=10):
+        """Ranked full-text search over stored summaries."""
+        if self.summaries is None:
+            return []
+        return [hit.to_dict() for hit in self.summaries.search(text, limit)]
+
+    def summarized(self, video_ids):
+        """The subset of video_ids with a stored summary."""
+        if self.summaries is None:
+            return set()
+        return self.summaries.summarized(video_ids)
+
+    def _remember(self, video_id, result):
+        self._results[video_id] = result
+        self._results.move_to_end(video_id)
+        while len(self._results) > self.result_cache_size:
+            self._results.popitem(last=False)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+class SummaryServer:
+    """
+    Minimal asyncio HTTP/1.1 front end for SummaryService.
+
+    GET /summarize?url=<youtube url>[&format=html]   JSON summary, or the page streamed as HTML
+    GET /summary.css                                 shared stylesheet for streamed pages
+    GET /search?q=<text>[&limit=10]                  ranked full-text search over stored summaries
+    GET /summarized?video_id=<id>[&video_id=<id>...] which videos already have a summary
+    GET /stats                                       request / pipeline / coalescing counters
+    GET /health                                      liveness check
+    """
+    def __init__(self, service):
+        self.service = service
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            # Headers are not used; read up to the blank line that ends them
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.split()
+            if len(parts) < 2 or parts[0] != "GET":
+                await self._send(writer, 405, {"error": "only GET is supported"})
+                return
+            await self.route(writer, urlsplit(parts[1]))
+        except Exception as e:
+            logger.exception("Request failed")
+            await self._send(writer, 500, {"error": str(e)})
+        finally:
+            writer.close()
+
+    async def route(self, writer, target):
+        query = parse_qs(target.query)
+        if target.path == "/health":
+            await self._send(writer, 200, {"status": "ok"})
+        elif target.path == "/stats":
+            await self._send(writer, 200, {**self.service.stats, "inflight": len(self.service._inflight)})
+        elif target.path == "/summary.css":
+            await self._send_body(writer, 200, "text/css; charset=utf-8", SUMMARY_CSS.encode("utf-8"))
+        elif target.path == "/search":
+            try:
+                limit = int(query.get("limit", ["10"])[0])
+            except ValueError:
+                await self._send(writer, 400, {"error": "limit must be an integer"})
+                return
+            await self._send(writer, 200, {"results": self.service.search(query.get("q", [""])[0], limit)})
+        elif target.path == "/summarized":
+            video_ids = query.get("video_id", [])
+            done = self.service.summarized(video_ids)
+            await self._send(writer, 200, {video_id: video_id in done for video_id in video_ids})
+        elif target.path == "/summarize":
+            url = query.get("url", [""])[0]
+            try:
+                result = await self.service.summarize(url)
+            except ValueError as e:
+                await self._send(writer, 400, {"error": str(e)})
+                return
+            except Exception as e:
+                await self._send(writer, 502, {"error": str(e)})
+                return
+            if query.get("format", ["json"])[0] == "html":
+                await self._stream_html(writer, result)
+            else:
+                await self._send(writer, 200, result)
+        else:
+            await self._send(writer, 404, {"error": "not found"})
+
+    async def _send(self, writer, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        await self._send_body(writer, status, "application/json", body)
+
+    async def _send_body(self, writer, status, content_type, body):
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def _stream_html(self, writer, result):
+        """Send the rendered page with chunked transfer encoding as it is generated."""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/html; charset=utf-8\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        chunks = iter_html(result["title"], result["topics"], result["video_id"], result["thumbnail_url"], "/summary.css")
+        for chunk in chunks:
+            data = chunk.encode("utf-8")
+            writer.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            500: "Internal Server Error", 502: "Bad Gateway"}
+
+async def start_server(service, host="127.0.0.1", port=8000):
+    """Start serving and return the asyncio server (port=0 picks a free port)."""
+    return await asyncio.start_server(SummaryServer(service).handle, host, port)
+
+def main():
+    parser = argparse.ArgumentParser(description="YouTube Video Summarizer HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-pipelines", type=int, default=4, help="pipelines running at once")
+    parser.add_argument("--output-dir", default="results")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    os.makedirs(args.output_dir, exist_ok=True)
+    service = SummaryService(flow_options_from_env(), args.max_pipelines, args.output_dir)
+
+    async def serve():
+        server = await start_server(service, args.host, args.port)
+        logger.info(f"Serving on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import sys
+import time
+from utils.chunk_utils import format_timestamp
+from utils.html_utils import write_css_asset
+from utils.summary_store import get_summary_store
+from utils.youtube_utils import extract_video_id
+
+def _video_id(value):
+    """Accept a video ID or any YouTube URL."""
+    return extract_video_id(value) or value
+
+def check(store, values, as_json=False):
+    """Print which videos were already summarized; returns the exit status (1 if any was not)."""
+    start = time.perf_counter()
+    video_ids = [_video_id(value) for value in values]
+    done = store.summarized(video_ids)
+    elapsed = time.perf_counter() - start
+    if as_json:
+        print(json.dumps({video_id: video_id in done for video_id in video_ids}))
+    else:
+        for video_id in video_ids:
+            print(f"{video_id:<12} {'done' if video_id in done else 'missing'}")
+        print(f"{len(done)}/{len(video_ids)} summarized, checked in {elapsed * 1000:.2f} ms", file=sys.stderr)
+    return 0 if len(done) == len(set(video_ids)) else 1
+
+def search(store, text, limit=10, as_json=False):
+    """Print ranked search results; returns the exit status (1 if nothing matched)."""
+    start = time.perf_counter()
+    hits = store.search(text, limit)
+    elapsed = time.perf_counter() - start
+    if as_json:
+        print(json.dumps([hit.to_dict() for hit in hits], ensure_ascii=False))
+    else:
+        for rank, hit in enumerate(hits, 1):
+            at = f" at {format_timestamp(int(hit.start))}" if hit.start is not None else ""
+            print(f"{rank:>3}. {hit.video_id}  {hit.title}\n     {hit.topic or ''}{at}")
+        print(f"{len(hits)} results in {elapsed * 1000:.2f} ms", file=sys.stderr)
+    return 0 if hits else 1
+
+def render(store, value, output=None, inline_css=False):
+    """Render a stored summary to an HTML file; returns the exit status."""
+    video_id = _video_id(value)
+    output = output or f"video_summary_{video_id}.html"
+    css_href = None
+    if not inline_css:
+        css_href = os.path.basename(write_css_asset(os.path.dirname(output) or "."))
+    if not store.write_html(video_id, output, css_href):
+        print(f"No stored summary for {video_id}", file=sys.stderr)
+        return 1
+    print(output)
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up, search and render stored video summaries")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+    check_parser = commands.add_parser("check", help="tell whether videos were already summarized")
+    check_parser.add_argument("videos", nargs="+", metavar="VIDEO", help="video IDs or URLs")
+    search_parser = commands.add_parser("search", help="ranked full-text search over titles, topics and Q&A")
+    search_parser.add_argument("query", nargs="+")
+    search_parser.add_argument("--limit", type=int, default=10)
+    html_parser = commands.add_parser("html", help="render a stored summary as an HTML page")
+    html_parser.add_argument("video", metavar="VIDEO", help="video ID or URL")
+    html_parser.add_argument("--output", help="page to write (default video_summary_<id>.html)")
+    html_parser.add_argument("--inline-css", action="store_true", help="embed the stylesheet in the page")
+    commands.add_parser("count", help="number of stored summaries")
+    args = parser.parse_args()
+
+    store = get_summary_store()
+    if store is None:
+        print("The summary store is disabled (SUMMARY_DB_DISABLE=1).", file=sys.stderr)
+        return 2
+    if args.command == "check":
+        return check(store, args.videos, args.json)
+    if args.command == "search":
+        return search(store, " ".join(args.query), args.limit, args.json)
+    if args.command == "html":
+        return render(store, args.video, args.output, args.inline_css)
+    print(len(store))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,7 @@
-from openai import OpenAI
-import os
-
 # Learn more about calling the LLM: https://the-pocket.github.io/PocketFlow/utility_function/llm.html
-def call_llm(prompt):    
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
-    r = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return r.choices[0].message.content
-    
+# Kept for compatibility; the implementation lives in utils/llm_utils.py and uses the shared client.
+from utils.llm_utils import call_llm
+
 if __name__ == "__main__":
     prompt = "What is the meaning of life?"
     print(call_llm(prompt))
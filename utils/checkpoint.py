@@ -0,0 +1,105 @@
+import hashlib
+import inspect
+import json
+import os
+import re
+import threading
+
+def fingerprint(*parts):
+    """Stable hash of JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# Source hash per object. Source only changes with a new process, and inspect.getsource
+# re-parses the whole module on every call, which is slow and not safe to run on
+# several threads at once, so each object is hashed once, under a lock.
+_source_versions = {}
+_source_versions_lock = threading.Lock()
+
+def _source_version(obj):
+    version = _source_versions.get(obj)
+    if version is None:
+        with _source_versions_lock:
+            version = _source_versions.get(obj)
+            if version is None:
+                try:
+                    source = inspect.getsource(obj)
+                except (OSError, TypeError):
+                    source = repr(obj)
+                version = _source_versions[obj] = fingerprint(source)
+    return version
+
+def code_version(*objects):
+    """
+    Hash the source code of classes, functions or modules.
+    Editing a prompt or template changes the version and invalidates checkpoints built with it.
+    """
+    return fingerprint(*(_source_version(obj) for obj in objects))[:16]
+
+class CheckpointStore:
+    """
+    Per-video checkpoints of pipeline stage outputs.
+
+    Each stage is stored with a fingerprint of its inputs and code version, so a
+    re-run can tell which stages are still valid. Layout:
+        <root>/<video_id>.json  {"url": ..., "stages": {stage: {"fingerprint", "outputs", "action"}}}
+    """
+    def __init__(self, root=os.path.join(".cache", "checkpoints")):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, video_id):
+        if not re.fullmatch(r"[0-9A-Za-z_-]+", video_id or ""):
+            raise ValueError(f"Invalid video ID: {video_id!r}")
+        return os.path.join(self.root, f"{video_id}.json")
+
+    def load(self, video_id):
+        """Return the checkpoint record of a video, or an empty record."""
+        try:
+            with open(self._path(video_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"video_id": video_id, "url": None, "stages": {}}
+
+    def get_stage(self, video_id, stage):
+        return self.load(video_id)["stages"].get(stage)
+
+    def save_stage(self, video_id, stage, stage_fingerprint, outputs, action=None, url=None):
+        """Store a stage's outputs; written atomically so readers never see partial files."""
+        with self._lock:
+            record = self.load(video_id)
+            record["url"] = url or record.get("url")
+            record["stages"][stage] = {"fingerprint": stage_fingerprint, "outputs": outputs, "action": action}
+            self._write(video_id, record)
+
+    def drop_stage(self, video_id, stage):
+        """Invalidate one stage so the next run recomputes it."""
+        with self._lock:
+            record = self.load(video_id)
+            if record["stages"].pop(stage, None) is not None:
+                self._write(video_id, record)
+
+    def _write(self, video_id, record):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(video_id)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def videos(self):
+        """Return (video_id, url) for every checkpointed video."""
+        if not os.path.isdir(self.root):
+            return []
+        result = []
+        for name in sorted(os.listdir(self.root)):
+            if name.endswith(".json"):
+                record = self.load(name[:-len(".json")])
+                result.append((record["video_id"], record.get("url")))
+        return result
+
+def get_checkpoint_store():
+    """Return the checkpoint store from CHECKPOINT_DIR, or None with CHECKPOINT_DISABLE=1."""
+    if os.environ.get("CHECKPOINT_DISABLE") == "1":
+        return None
+    return CheckpointStore(os.environ.get("CHECKPOINT_DIR", os.path.join(".cache", "checkpoints")))
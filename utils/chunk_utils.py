@@ -0,0 +1,206 @@
+import math
+import re
+from collections import Counter
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_encoding = None
+
+def estimate_tokens(text):
+    """
+    Estimate the number of prompt tokens in text.
+    Uses tiktoken when it is installed, otherwise ~4 characters per token.
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def tokenize(text):
+    """Lowercase word tokens used for lexical scoring."""
+    return _WORD_RE.findall(text.lower())
+
+def format_timestamp(seconds):
+    """Format seconds as m:ss or h:mm:ss."""
+    seconds = int(seconds or 0)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+def _split_segment(segment, max_tokens):
+    """Split a caption segment that is larger than max_tokens on word boundaries."""
+    words = segment["text"].split()
+    start = float(segment.get("start", 0) or 0)
+    duration = float(segment.get("duration", 0) or 0)
+    step = max(1, len(words) * max_tokens // max(1, estimate_tokens(segment["text"])))
+    pieces = []
+    for i in range(0, len(words), step):
+        offset = duration * i / len(words)
+        pieces.append({
+            "text": " ".join(words[i:i + step]),
+            "start": start + offset,
+            "duration": duration * min(step, len(words) - i) / len(words),
+        })
+    return pieces
+
+def chunk_segments(segments, max_tokens=400):
+    """
+    Group caption segments into consecutive windows of at most max_tokens.
+
+    Args:
+        segments: list of dict with 'text', 'start' and 'duration' keys, or a SegmentArray
+        max_tokens: int, token budget per chunk
+
+    Returns:
+        list of dict with 'index', 'start', 'end', 'text' and 'tokens' keys.
+        For a SegmentArray, chunks made of whole segments also get 'segments':
+        their [first, last) segment index range.
+    """
+    chunks = []
+    texts, tokens, start, end = [], 0, None, 0.0
+    # Segment index range of the current chunk, or None once it contains a split piece
+    span = None
+    text_range = getattr(segments, "text_range", None)
+
+    def flush():
+        if texts:
+            chunk = {"index": len(chunks), "start": start, "end": end, "tokens": tokens}
+            if text_range and span:
+                # Decode the chunk in one pass from the segment buffer instead of joining pieces
+                chunk["text"] = text_range(*span)
+                chunk["segments"] = list(span)
+            else:
+                chunk["text"] = " ".join(texts)
+            chunks.append(chunk)
+
+    for i, segment in enumerate(segments):
+        pieces = [segment]
+        if estimate_tokens(segment["text"]) > max_tokens:
+            pieces = _split_segment(segment, max_tokens)
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece["text"]) + 1
+            if texts and tokens + piece_tokens > max_tokens:
+                flush()
+                texts, tokens, start = [], 0, None
+            piece_start = float(piece.get("start", 0) or 0)
+            if start is None:
+                start = piece_start
+                span = (i, i)
+            texts.append(piece["text"])
+            tokens += piece_tokens
+            end = piece_start + float(piece.get("duration", 0) or 0)
+            span = (span[0], i + 1) if span and len(pieces) == 1 else None
+    flush()
+    return chunks
+
+class BM25Index:
+    """Okapi BM25 index over transcript chunks, for offline topic-to-chunk retrieval."""
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(tokenize(chunk["text"])) for chunk in chunks]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+        doc_freqs = Counter()
+        for tf in self.term_freqs:
+            doc_freqs.update(tf.keys())
+        n = len(chunks)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in doc_freqs.items()
+        }
+
+    def scores(self, query):
+        """Return the BM25 score of every chunk for the query."""
+        terms = set(tokenize(query))
+        results = []
+        for tf, length in zip(self.term_freqs, self.lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_length) if self.avg_length else self.k1
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            results.append(score)
+        return results
+
+def select_chunks(index, chunks, query, token_budget=1500):
+    """
+    Pick the chunks most relevant to query until token_budget is spent.
+    Chunks are returned in transcript order so the excerpt reads naturally.
+    """
+    scores = index.scores(query)
+    ranked = sorted(range(len(chunks)), key=lambda i: (-scores[i], i))
+    selected, used = [], 0
+    for i in ranked:
+        if selected and used + chunks[i]["tokens"] > token_budget:
+            continue
+        selected.append(i)
+        used += chunks[i]["tokens"]
+        if used >= token_budget:
+            break
+    return [chunks[i] for i in sorted(selected)]
+
+def locate_chunk(index, chunks, query):
+    """Return the chunk most relevant to query, or None when no chunk shares a term with it."""
+    if not chunks:
+        return None
+    scores = index.scores(query)
+    best = max(range(len(chunks)), key=lambda i: (scores[i], -i))
+    return chunks[best] if scores[best] > 0 else None
+
+def group_chunks(chunks, max_tokens=6000):
+    """Group consecutive chunks into lists of at most max_tokens (at least one chunk each)."""
+    groups, current, used = [], [], 0
+    for chunk in chunks:
+        if current and used + chunk["tokens"] > max_tokens:
+            groups.append(current)
+            current, used = [], 0
+        current.append(chunk)
+        used += chunk["tokens"]
+    if current:
+        groups.append(current)
+    return groups
+
+def dedupe_topics(topics, threshold=0.6):
+    """
+    Drop topics whose title is a near-duplicate of an earlier one
+    (word-set Jaccard similarity >= threshold). Order is preserved.
+    """
+    kept, kept_words = [], []
+    for topic in topics:
+        if not isinstance(topic, dict) or not topic.get("topic"):
+            continue
+        words = set(tokenize(str(topic["topic"])))
+        duplicate = any(
+            words and len(words & other) / len(words | other) >= threshold
+            for other in kept_words
+        )
+        if not duplicate:
+            kept.append(topic)
+            kept_words.append(words)
+    return kept
+
+def format_chunks(chunks):
+    """Render chunks as timestamped transcript excerpts for a prompt."""
+    return "\n".join(f"[{format_timestamp(chunk['start'])}] {chunk['text']}" for chunk in chunks)
+
+if __name__ == "__main__":
+    # Chunk a synthetic transcript and retrieve chunks for a query
+    test_segments = [
+        {"text": f"segment {i} talks about {'python' if i % 7 == 0 else 'cooking'} recipes", "start": i * 3.0, "duration": 3.0}
+        for i in range(200)
+    ]
+    test_chunks = chunk_segments(test_segments, max_tokens=60)
+    test_index = BM25Index(test_chunks)
+    relevant = select_chunks(test_index, test_chunks, "python programming", token_budget=120)
+    print(f"{len(test_chunks)} chunks, selected {len(relevant)} for 'python programming'")
+    print(format_chunks(relevant)[:300])
@@ -0,0 +1,37 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+def map_bounded(fn, items, max_workers=4):
+    """
+    Apply fn to every item using at most max_workers threads.
+
+    Results are returned in the same order as items. Each call runs in a copy
+    of the caller's context so context-local state follows the work into the pool.
+    """
+    items = list(items or [])
+    if max_workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+
+    def run(item, ctx):
+        return ctx.run(fn, item)
+
+    contexts = [contextvars.copy_context() for _ in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(run, items, contexts))
+
+async def gather_bounded(fn, items, max_workers=4):
+    """
+    Await fn(item) for every item with at most max_workers calls in flight.
+
+    The async counterpart of map_bounded: results keep the order of items, and
+    each call runs as its own task with a copy of the caller's context.
+    """
+    items = list(items or [])
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+
+    async def run(item):
+        async with semaphore:
+            return await fn(item)
+
+    return await asyncio.gather(*(run(item) for item in items))
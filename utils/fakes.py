@@ -0,0 +1,76 @@
+import hashlib
+import random
+import threading
+import time
+from utils.youtube_utils import TranscriptUnavailable
+
+# Offline stand-ins for external services, used by benchmarks, load tests and fleet dry runs.
+# The LLM counterpart is the OpenAI-compatible stub in benchmarks/stub_openai_server.py.
+
+FAKE_VOCABULARY = [
+    "python", "database", "network", "cooking", "travel", "music", "finance", "history",
+    "physics", "design", "marketing", "health", "garden", "camera", "language", "economy",
+]
+
+class FakeTranscript:
+    """A transcript entry as returned by FakeTranscriptBackend.list_transcripts()."""
+    def __init__(self, language_code, is_generated, segments):
+        self.language_code = language_code
+        self.is_generated = is_generated
+        self._segments = segments
+
+    def fetch(self):
+        return [dict(segment) for segment in self._segments]
+
+class FakeTranscriptBackend:
+    """
+    Deterministic transcript backend for offline runs.
+
+    Each video_id always yields the same synthetic captions. A missing_rate share
+    of videos has no transcript, and an error_rate share of calls fails with a
+    transient ConnectionError (repeatably, when a seed is given).
+    """
+    def __init__(self, n_segments=300, latency=0.0, missing_rate=0.0, error_rate=0.0, seed=None):
+        self.n_segments = n_segments
+        self.latency = latency
+        self.missing_rate = missing_rate
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _rng(self, video_id):
+        seed = int(hashlib.sha256(video_id.encode("utf-8")).hexdigest()[:16], 16)
+        return random.Random(seed)
+
+    def segments(self, video_id):
+        """Synthetic captions where consecutive stretches of the video cover one subject each."""
+        rng = self._rng(video_id)
+        subjects = rng.sample(FAKE_VOCABULARY, 5)
+        segments = []
+        for i in range(self.n_segments):
+            subject = subjects[i * len(subjects) // self.n_segments]
+            words = " ".join(rng.choice(FAKE_VOCABULARY) for _ in range(6))
+            segments.append({"text": f"talking about {subject} {words}", "start": i * 4.0, "duration": 4.0})
+        return segments
+
+    def list_transcripts(self, video_id):
+        with self._lock:
+            self.calls += 1
+            failed = self.error_rate and self._random.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if failed:
+            raise ConnectionError("injected transient transcript error")
+        if self.missing_rate and self._rng(video_id).random() < self.missing_rate:
+            raise TranscriptUnavailable(f"Transcripts are disabled for {video_id}")
+        return [FakeTranscript("en", False, self.segments(video_id))]
+
+def fake_video_ids(count, seed=0):
+    """Return count distinct, valid-looking 11 character video IDs."""
+    rng = random.Random(seed)
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-"
+    ids = set()
+    while len(ids) < count:
+        ids.add("".join(rng.choice(alphabet) for _ in range(11)))
+    return sorted(ids)
@@ -1,179 +1,278 @@
-def generate_html(title, topics, video_id=None, thumbnail_url=None):
+import contextlib
+import os
+import tempfile
+from utils.chunk_utils import format_timestamp
+
+# Shared stylesheet: inlined once per page, or written once as a file that pages link to
+SUMMARY_CSS = """
+body {
+    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+    line-height: 1.6;
+    color: #333;
+    max-width: 900px;
+    margin: 0 auto;
+    padding: 20px;
+    background-color: #f8f9fa;
+}
+header {
+    text-align: center;
+    margin-bottom: 30px;
+    padding-bottom: 20px;
+    border-bottom: 2px solid #e9ecef;
+}
+.video-container {
+    display: flex;
+    flex-direction: column;
+    align-items: center;
+    margin-bottom: 20px;
+    background-color: white;
+    border-radius: 8px;
+    padding: 20px;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+}
+.thumbnail {
+    width: 100%;
+    max-width: 640px;
+    border-radius: 8px;
+    margin-bottom: 15px;
+    box-shadow: 0 4px 8px rgba(0,0,0,0.2);
+}
+.video-info {
+    text-align: center;
+    width: 100%;
+}
+.watch-button {
+    display: inline-block;
+    background-color: #ff0000;
+    color: white;
+    padding: 10px 20px;
+    text-decoration: none;
+    border-radius: 4px;
+    margin-top: 10px;
+    font-weight: bold;
+    transition: background-color 0.3s;
+}
+.watch-button:hover {
+    background-color: #cc0000;
+}
+h1 {
+    color: #2c3e50;
+    margin-bottom: 10px;
+}
+.subtitle {
+    color: #6c757d;
+    font-style: italic;
+}
+h2 {
+    color: #3498db;
+    margin-top: 30px;
+    border-bottom: 1px solid #eee;
+    padding-bottom: 5px;
+}
+.topic {
+    background-color: white;
+    border-radius: 8px;
+    padding: 20px;
+    margin-bottom: 25px;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+}
+.timestamp {
+    display: inline-block;
+    color: #c4302b;
+    font-size: 0.9em;
+    text-decoration: none;
+    margin-bottom: 8px;
+}
+.question {
+    background-color: #e8f4fc;
+    border-left: 4px solid #3498db;
+    padding: 10px 15px;
+    margin: 15px 0;
+    border-radius: 0 4px 4px 0;
+}
+.answer {
+    background-color: #f8f9fa;
+    border-left: 4px solid #2ecc71;
+    padding: 10px 15px;
+    margin: 15px 0 15px 20px;
+    border-radius: 0 4px 4px 0;
+}
+footer {
+    text-align: center;
+    margin-top: 30px;
+    padding-top: 20px;
+    border-top: 1px solid #e9ecef;
+    color: #6c757d;
+    font-size: 0.9em;
+}
+.topics-container {
+    margin-top: 30px;
+}
+"""
+
+CSS_FILENAME = "summary.css"
+
+# Page templates as format strings, built once at import time
+_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title} - Summary</title>
+    {style}
+</head>
+<body>
+    <header>
+        <h1>{title}</h1>
+        <p class="subtitle">Video Summary</p>
+    </header>
+"""
+_VIDEO = """    <div class="video-container">
+        <img src="{thumbnail_url}" alt="Video thumbnail" class="thumbnail" onerror="this.onerror=null; this.src='https://img.youtube.com/vi/{video_id}/hqdefault.jpg';">
+        <div class="video-info">
+            <a href="https://www.youtube.com/watch?v={video_id}" target="_blank" class="watch-button">Watch on YouTube</a>
+        </div>
+    </div>
+"""
+# Per-topic templates are filled once per topic or Q&A, so they use positional
+# %-formatting, several times faster than str.format with keyword arguments
+_TOPIC_START = """        <div class="topic">
+            <h2>%s</h2>
+%s            <p>%s</p>
+"""  # topic, timestamp, summary
+_TIMESTAMP = """            <a href="https://www.youtube.com/watch?v=%s&amp;t=%ds" target="_blank" class="timestamp">&#9654; %s</a>
+"""  # video_id, seconds, label
+_QA = """            <div class="question">
+                <strong>Q:</strong> %s
+            </div>
+            <div class="answer">
+                <strong>A:</strong> %s
+            </div>
+"""  # question, answer
+_TOPIC_END = "        </div>\n"
+_TOPICS_START = '    <div class="topics-container">\n'
+_FOOT = """    </div>
+    <footer>
+        Generated by YouTube Video Summarizer
+    </footer>
+</body>
+</html>
+"""
+_INLINE_STYLE = f"<style>{SUMMARY_CSS}</style>"
+
+def _text(value):
+    """HTML-escape a field for element content or attribute values (as html.escape(value, quote=True))."""
+    if value is None:
+        return ""
+    return (str(value).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            .replace('"', "&quot;").replace("'", "&#x27;"))
+
+def iter_html(title, topics, video_id=None, thumbnail_url=None, css_href=None):
     """
-    Generate HTML page for video summary.
-    
+    Render the video summary page as a stream of HTML chunks.
+
     Args:
         title: str, video title
-        topics: list of dict, each containing:
+        topics: iterable of dict, each containing:
             - topic: str, the topic name
             - summary: str, summary of the topic
+            - start: float, seconds into the video where the topic is discussed (optional)
             - questions: list of dict, each with 'question' and 'answer' keys
         video_id: str, the YouTube video ID (optional)
         thumbnail_url: str, URL to the video thumbnail (optional)
+        css_href: str, link to a shared stylesheet instead of inlining the CSS (optional)
     """
-    html = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{title} - Summary</title>
-        <style>
-            body {{
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                line-height: 1.6;
-                color: #333;
-                max-width: 900px;
-                margin: 0 auto;
-                padding: 20px;
-                background-color: #f8f9fa;
-            }}
-            header {{
-                text-align: center;
-                margin-bottom: 30px;
-                padding-bottom: 20px;
-                border-bottom: 2px solid #e9ecef;
-            }}
-            .video-container {{
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-                margin-bottom: 20px;
-                background-color: white;
-                border-radius: 8px;
-                padding: 20px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }}
-            .thumbnail {{
-                width: 100%;
-                max-width: 640px;
-                border-radius: 8px;
-                margin-bottom: 15px;
-                box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-            }}
-            .video-info {{
-                text-align: center;
-                width: 100%;
-            }}
-            .watch-button {{
-                display: inline-block;
-                background-color: #ff0000;
-                color: white;
-                padding: 10px 20px;
-                text-decoration: none;
-                border-radius: 4px;
-                margin-top: 10px;
-                font-weight: bold;
-                transition: background-color 0.3s;
-            }}
-            .watch-button:hover {{
-                background-color: #cc0000;
-            }}
-            h1 {{
-                color: #2c3e50;
-                margin-bottom: 10px;
-            }}
-            .subtitle {{
-                color: #6c757d;
-                font-style: italic;
-            }}
-            h2 {{
-                color: #3498db;
-                margin-top: 30px;
-                border-bottom: 1px solid #eee;
-                padding-bottom: 5px;
-            }}
-            .topic {{
-                background-color: white;
-                border-radius: 8px;
-                padding: 20px;
-                margin-bottom: 25px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }}
-            .question {{
-                background-color: #e8f4fc;
-                border-left: 4px solid #3498db;
-                padding: 10px 15px;
-                margin: 15px 0;
-                border-radius: 0 4px 4px 0;
-            }}
-            .answer {{
-                background-color: #f8f9fa;
-                border-left: 4px solid #2ecc71;
-                padding: 10px 15px;
-                margin: 15px 0 15px 20px;
-                border-radius: 0 4px 4px 0;
-            }}
-            footer {{
-                text-align: center;
-                margin-top: 30px;
-                padding-top: 20px;
-                border-top: 1px solid #e9ecef;
-                color: #6c757d;
-                font-size: 0.9em;
-            }}
-            .topics-container {{
-                margin-top: 30px;
-            }}
-        </style>
-    </head>
-    <body>
-        <header>
-            <h1>{title}</h1>
-            <p class="subtitle">Video Summary</p>
-        </header>
-    """
-    
+    if css_href:
+        style = f'<link rel="stylesheet" href="{_text(css_href)}">'
+    else:
+        style = _INLINE_STYLE
+    yield _HEAD.format(title=_text(title), style=style)
+
     # Add video thumbnail and link if available
     if thumbnail_url and video_id:
-        html += f"""
-        <div class="video-container">
-            <img src="{thumbnail_url}" alt="Video thumbnail" class="thumbnail" onerror="this.onerror=null; this.src='https://img.youtube.com/vi/{video_id}/hqdefault.jpg';">
-            <div class="video-info">
-                <a href="https://www.youtube.com/watch?v={video_id}" target="_blank" class="watch-button">Watch on YouTube</a>
-            </div>
-        </div>
-        """
-    
-    # Add topics section
-    html += '<div class="topics-container">'
-    
+        yield _VIDEO.format(thumbnail_url=_text(thumbnail_url), video_id=_text(video_id))
+
+    yield _TOPICS_START
+    escaped_video_id = _text(video_id) if video_id else None
     for topic in topics:
-        html += f"""
-        <div class="topic">
-            <h2>{topic['topic']}</h2>
-            <p>{topic['summary']}</p>
-        """
-        
-        if 'questions' in topic and topic['questions']:
-            for qa in topic['questions']:
-                html += f"""
-                <div class="question">
-                    <strong>Q:</strong> {qa['question']}
-                </div>
-                <div class="answer">
-                    <strong>A:</strong> {qa['answer']}
-                </div>
-                """
-            
-        html += "</div>"
-    
-    html += """
-        </div>
-        <footer>
-            Generated by YouTube Video Summarizer
-        </footer>
-    </body>
-    </html>
+        timestamp = ""
+        if escaped_video_id and topic.get('start') is not None:
+            seconds = int(topic['start'])
+            timestamp = _TIMESTAMP % (escaped_video_id, seconds, format_timestamp(seconds))
+        # One chunk per topic: far fewer chunks to yield, batch and write than one per Q&A
+        parts = [_TOPIC_START % (_text(topic.get('topic')), timestamp, _text(topic.get('summary')))]
+        for qa in topic.get('questions') or []:
+            parts.append(_QA % (_text(qa.get('question')), _text(qa.get('answer'))))
+        parts.append(_TOPIC_END)
+        yield "".join(parts)
+    yield _FOOT
+
+def generate_html(title, topics, video_id=None, thumbnail_url=None, css_href=None):
     """
-    
-    return html
+    Generate HTML page for video summary as a single string.
+    See iter_html() for the arguments; prefer it with save_html() for large pages.
+    """
+    return "".join(iter_html(title, topics, video_id, thumbnail_url, css_href))
+
+@contextlib.contextmanager
+def _replace_atomically(filename):
+    """
+    Open a temporary file next to filename for writing, and move it into place
+    once the block completes. Readers see the old file or the new one, never a
+    partial write; on error the temporary file is removed and filename is untouched.
+    """
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=os.path.splitext(filename)[1],
+                               dir=os.path.dirname(os.path.abspath(filename)))
+    try:
+        with open(fd, 'w', encoding='utf-8') as f:
+            yield f
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, filename)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+def write_css_asset(directory="."):
+    """
+    Write the shared stylesheet next to the pages that link to it.
+    The file is only rewritten when its content differs, and replaced in one
+    step so concurrent pipelines never serve a partly written stylesheet.
+    Returns the file path.
+    """
+    path = os.path.join(directory, CSS_FILENAME)
+    try:
+        with open(path, encoding='utf-8') as f:
+            if f.read() == SUMMARY_CSS:
+                return path
+    except OSError:
+        pass
+    with _replace_atomically(path) as f:
+        f.write(SUMMARY_CSS)
+    return path
 
-def save_html(html_content, filename="video_summary.html"):
-    """Save HTML content to a file."""
+def save_html(html_content, filename="video_summary.html", buffer_size=64 * 1024):
+    """
+    Save HTML content to a file. Accepts a string or an iterable of chunks
+    (e.g. from iter_html), which are written in batches of about buffer_size characters.
+    The page is written to a temporary file that replaces filename once complete,
+    so a failed write never leaves a truncated page behind.
+    """
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        with _replace_atomically(filename) as f:
+            if isinstance(html_content, str):
+                f.write(html_content)
+            else:
+                batch, size = [], 0
+                for chunk in html_content:
+                    batch.append(chunk)
+                    size += len(chunk)
+                    if size >= buffer_size:
+                        f.write("".join(batch))
+                        batch, size = [], 0
+                f.write("".join(batch))
         return True
     except Exception as e:
         print(f"Error saving HTML: {e}")
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class LLMCache:
+    """
+    Content-addressed on-disk cache for LLM responses.
+
+    Entries are keyed by a hash of model + prompt + parameters and stored in SQLite,
+    which serializes writers across processes. The cache is bounded by entry count
+    and total size (least recently used entries are evicted first), and entries
+    older than ttl seconds are treated as misses.
+    """
+    def __init__(self, path, max_entries=10000, max_bytes=200 * 1024 * 1024, ttl=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+
+    def _connect(self):
+        """Return this thread's connection (sqlite3 connections are not shared across threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(model, prompt, params=None):
+        """Hash model, prompt and call parameters into a stable cache key."""
+        payload = json.dumps(
+            {"model": model, "prompt": prompt, "params": params or {}},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached response for key, or None on a miss."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and self.ttl is not None and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row:
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def put(self, key, value):
+        """Store a response and evict entries beyond the configured limits."""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        if self.ttl is not None:
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # Walk entries from least to most recently used until we are back under both limits
+        to_delete = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", to_delete)
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        """Return hit/miss counters for this process and the current cache size."""
+        with self._connect() as conn:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": count,
+            "bytes": total,
+        }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache():
+    """
+    Return the process-wide LLM cache configured from environment variables,
+    or None when caching is disabled with LLM_CACHE_DISABLE=1.
+    """
+    global _cache
+    if os.environ.get("LLM_CACHE_DISABLE") == "1":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            ttl = os.environ.get("LLM_CACHE_TTL", str(30 * 24 * 3600))
+            _cache = LLMCache(
+                os.environ.get("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.db")),
+                max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "10000")),
+                max_bytes=int(float(os.environ.get("LLM_CACHE_MAX_MB", "200")) * 1024 * 1024),
+                ttl=float(ttl) if ttl else None,
+            )
+        return _cache
+
+if __name__ == "__main__":
+    # Exercise the cache against a temporary database
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(os.path.join(tmp, "cache.db"), max_entries=2)
+        keys = [LLMCache.make_key("gpt-4o", f"prompt {i}") for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, f"response {i}")
+        print(f"Evicted oldest entry: {cache.get(keys[0]) is None}")
+        print(f"Newest entry: {cache.get(keys[2])}")
+        print(f"Stats: {cache.stats()}")
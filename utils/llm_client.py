@@ -0,0 +1,143 @@
+import asyncio
+import itertools
+import os
+import threading
+
+# Connection pool and timeout settings shared by every LLM call in the process
+POOL_SIZE = int(os.environ.get("LLM_POOL_SIZE", "20"))
+TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "120"))
+CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", "10"))
+KEEPALIVE_EXPIRY = float(os.environ.get("LLM_KEEPALIVE_EXPIRY", "60"))
+
+# Connections per client; larger pools are split across several clients
+SHARD_SIZE = 32
+
+_clients = []
+_rotation = None
+_ssl_context = None
+_async_clients = {}
+_lock = threading.Lock()
+
+# httpx and openai take most of the process's import time, so they are only
+# imported when the first client is created; cached runs never import them
+
+def _http_settings(pool_size=POOL_SIZE):
+    global _ssl_context
+    import httpx
+    if _ssl_context is None:
+        # Loading the CA bundle takes ~30ms, so every shard shares one context
+        _ssl_context = httpx.create_ssl_context()
+    return {
+        "verify": _ssl_context,
+        "limits": httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(TIMEOUT, connect=CONNECT_TIMEOUT),
+    }
+
+def _client_kwargs():
+    # OPENAI_BASE_URL points the client at any OpenAI-compatible server, e.g. a local stub
+    # Retries are owned by utils/rate_limiter.py so they share one budget and backoff
+    return {
+        "api_key": os.environ.get("OPENAI_API_KEY"),
+        "base_url": os.environ.get("OPENAI_BASE_URL") or None,
+        "max_retries": 0,
+    }
+
+def _shard_sizes():
+    # httpcore rescans a whole pool whenever a request starts or ends, which is
+    # quadratic in its connections, so large pools are split into small ones
+    shards = -(-POOL_SIZE // SHARD_SIZE)
+    return [POOL_SIZE // shards + (i < POOL_SIZE % shards) for i in range(shards)]
+
+def get_client():
+    """
+    Return a process-wide OpenAI client.
+    All threads share the same HTTP connection pools, so connections and TLS
+    sessions are reused; pools over SHARD_SIZE connections are split across
+    several clients, handed out in turn.
+    """
+    global _rotation
+    if _rotation is None:
+        import httpx
+        from openai import OpenAI
+        with _lock:
+            if _rotation is None:
+                _clients[:] = [
+                    OpenAI(http_client=httpx.Client(**_http_settings(size)), **_client_kwargs())
+                    for size in _shard_sizes()
+                ]
+                _rotation = itertools.cycle(_clients)
+    return next(_rotation)
+
+def _async_state():
+    """Return (client rotation, request slots) for the running event loop."""
+    import httpx
+    from openai import AsyncOpenAI
+    loop = asyncio.get_running_loop()
+    with _lock:
+        state = _async_clients.get(loop)
+        if state is None or loop.is_closed():
+            # Drop clients of loops that have since been closed
+            for other in [l for l in _async_clients if l.is_closed()]:
+                del _async_clients[other]
+            clients = [
+                AsyncOpenAI(http_client=httpx.AsyncClient(**_http_settings(size)), **_client_kwargs())
+                for size in _shard_sizes()
+            ]
+            state = _async_clients[loop] = (itertools.cycle(clients), asyncio.Semaphore(POOL_SIZE), clients)
+    return state
+
+def get_async_client():
+    """
+    Return an AsyncOpenAI client for the running event loop.
+    Async connection pools are bound to their loop, so each loop gets its own
+    clients, sharded like get_client()'s.
+    """
+    return next(_async_state()[0])
+
+def get_async_request_slots():
+    """
+    Return the running loop's semaphore admitting at most LLM_POOL_SIZE requests at once.
+    Requests beyond the pool size wait here instead of queueing inside httpcore,
+    where every queued request is rescanned against every connection.
+    """
+    return _async_state()[1]
+
+def _close_async_clients(loop, clients):
+    """Close async clients on the loop their connection pools are bound to."""
+    if loop.is_closed():
+        # Nothing can run on the loop any more; its connections closed with it
+        return
+
+    async def close_all():
+        await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+    if not loop.is_running():
+        loop.run_until_complete(close_all())
+        return
+    try:
+        current = asyncio.get_running_loop()
+    except RuntimeError:
+        current = None
+    if current is loop:
+        # Called from the loop itself, which cannot be blocked on: close in the background
+        loop.create_task(close_all())
+    else:
+        asyncio.run_coroutine_threadsafe(close_all(), loop).result()
+
+def reset_clients():
+    """Close and forget the shared clients (e.g. after changing the environment in tests)."""
+    global _rotation
+    with _lock:
+        for client in _clients:
+            client.close()
+        _clients.clear()
+        _rotation = None
+        async_clients = [(loop, state[2]) for loop, state in _async_clients.items()]
+        _async_clients.clear()
+    # Outside the lock: closing may wait on another thread's loop, which may be creating clients
+    for loop, clients in async_clients:
+        _close_async_clients(loop, clients)
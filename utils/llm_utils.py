@@ -1,48 +1,169 @@
 import os
-from openai import OpenAI
-import yaml
+import time
+from utils.llm_cache import LLMCache, get_llm_cache
+from utils.llm_client import get_async_client, get_async_request_slots, get_client
+from utils.chunk_utils import estimate_tokens
+from utils.rate_limiter import acall_with_retries, call_with_retries, get_rate_limiter, get_retry_policy
+from utils.structured_output import TOPICS_SCHEMA, parse_structured
+from utils.tracing import record_llm_call
 
-def call_llm(prompt):
-    """Call an LLM with the given prompt."""
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
+DEFAULT_MODEL = "gpt-4o"
+
+def _lookup_cache(model, prompt, params, use_cache):
+    """Return (cache, cache_key, cached_response); cache is None when caching is disabled."""
+    cache = get_llm_cache()
+    if not cache:
+        return None, None, None
+    cache_key = LLMCache.make_key(model, prompt, params)
+    cached = cache.get(cache_key) if use_cache else None
+    if cached is not None:
+        record_llm_call(cache_hit=True)
+    return cache, cache_key, cached
+
+def _estimate_request_tokens(prompt, params):
+    """Prompt tokens plus the completion budget, charged to the tokens/min limiter up front."""
+    return estimate_tokens(prompt) + params.get("max_tokens", 1000)
+
+def _settle_usage(limiter, estimated, response, started):
+    """Correct the limiter with the real token usage and attribute the call to the current trace span."""
+    usage = getattr(response, "usage", None)
+    limiter.settle(estimated, getattr(usage, "total_tokens", None))
+    # Providers with prompt caching report the prefix tokens served from cache
+    details = getattr(usage, "prompt_tokens_details", None)
+    record_llm_call(
+        prompt_tokens=getattr(usage, "prompt_tokens", 0),
+        completion_tokens=getattr(usage, "completion_tokens", 0),
+        seconds=time.perf_counter() - started,
+        cached_prompt_tokens=getattr(details, "cached_tokens", 0),
+    )
+
+def _require_api_key():
+    if not os.environ.get("OPENAI_API_KEY"):
         raise ValueError("OPENAI_API_KEY environment variable not set")
-        
-    client = OpenAI(api_key=api_key)
-    
+
+def call_llm(prompt, model=DEFAULT_MODEL, use_cache=True, **params):
+    """
+    Call an LLM with the given prompt.
+
+    Responses are served from the on-disk cache when an identical
+    model + prompt + params call has been made before. Pass use_cache=False
+    to force a fresh call (the new response still replaces the cached one).
+    """
+    cache, cache_key, cached = _lookup_cache(model, prompt, params, use_cache)
+    if cached is not None:
+        return cached
+    _require_api_key()
+
+    limiter = get_rate_limiter()
+    estimated = _estimate_request_tokens(prompt, params)
+    started = time.perf_counter()
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}]
+        response = call_with_retries(
+            lambda: get_client().chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                **params
+            ),
+            limiter, get_retry_policy(), estimated,
         )
-        return response.choices[0].message.content
+        _settle_usage(limiter, estimated, response, started)
+        content = response.choices[0].message.content
     except Exception as e:
         print(f"Error calling LLM: {e}")
         return None
 
-def extract_topics_from_llm_response(response):
-    """Extract structured topic data from LLM YAML response."""
+    if cache and content is not None:
+        cache.put(cache_key, content)
+    return content
+
+async def acall_llm(prompt, model=DEFAULT_MODEL, use_cache=True, **params):
+    """Async version of call_llm using the shared async client."""
+    cache, cache_key, cached = _lookup_cache(model, prompt, params, use_cache)
+    if cached is not None:
+        return cached
+    _require_api_key()
+
+    async def send():
+        async with get_async_request_slots():
+            return await get_async_client().chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                **params
+            )
+
+    limiter = get_rate_limiter()
+    estimated = _estimate_request_tokens(prompt, params)
+    started = time.perf_counter()
     try:
-        # Extract YAML content if wrapped in code blocks
-        if "```yaml" in response:
-            yaml_content = response.split("```yaml")[1].split("```")[0].strip()
-        elif "```" in response:
-            yaml_content = response.split("```")[1].split("```")[0].strip()
-        else:
-            yaml_content = response.strip()
-        
-        # Parse YAML
-        data = yaml.safe_load(yaml_content)
-        
-        # Validate expected structure
-        if not isinstance(data, dict) or "topics" not in data:
-            raise ValueError("Response does not contain expected 'topics' key")
-            
-        return data["topics"]
+        response = await acall_with_retries(send, limiter, get_retry_policy(), estimated)
+        _settle_usage(limiter, estimated, response, started)
+        content = response.choices[0].message.content
     except Exception as e:
-        print(f"Error parsing LLM response: {e}")
+        print(f"Error calling LLM: {e}")
+        return None
+
+    if cache and content is not None:
+        cache.put(cache_key, content)
+    return content
+
+def call_llm_stream(prompt, model=DEFAULT_MODEL, use_cache=True, **params):
+    """
+    Stream an LLM completion, yielding text pieces as they arrive.
+
+    Shares the response cache with call_llm: a cached response is yielded in one
+    piece, and a completed stream is stored for later calls. Errors are raised
+    rather than swallowed so the calling node can retry.
+    """
+    cache, cache_key, cached = _lookup_cache(model, prompt, params, use_cache)
+    if cached is not None:
+        yield cached
+        return
+    _require_api_key()
+
+    # Only opening the stream is retried; a failure mid-stream is left to the calling node
+    limiter = get_rate_limiter()
+    estimated = _estimate_request_tokens(prompt, params)
+    started = time.perf_counter()
+    stream = call_with_retries(
+        lambda: get_client().chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True,
+            **params
+        ),
+        limiter, get_retry_policy(), estimated,
+    )
+    parts = []
+    try:
+        for event in stream:
+            if not event.choices:
+                continue
+            delta = event.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+    finally:
+        # Streamed chunks carry no usage, so the limiter is settled with estimated tokens,
+        # also when the stream breaks off or the caller stops reading
+        prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens("".join(parts))
+        limiter.settle(estimated, prompt_tokens + completion_tokens)
+
+    content = "".join(parts)
+    record_llm_call(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        seconds=time.perf_counter() - started,
+    )
+    if cache and parts:
+        cache.put(cache_key, content)
+
+def extract_topics_from_llm_response(response):
+    """Extract structured topic data from an LLM JSON or YAML response, salvaging malformed output."""
+    result = parse_structured(response, TOPICS_SCHEMA)
+    if result.method == "failed":
+        print("Error parsing LLM response: no topics found")
         print(f"Raw response: {response}")
-        return []
+    return result.items
 
 if __name__ == "__main__":
     # Test the LLM call with a simple prompt
@@ -0,0 +1,222 @@
+import os
+import threading
+from utils.chunk_utils import estimate_tokens
+from utils.llm_utils import DEFAULT_MODEL, acall_llm, call_llm
+from utils.structured_output import QUESTIONS_SCHEMA, SUMMARY_SCHEMA, TOPICS_SCHEMA, parse_structured
+from utils.tracing import span
+
+# Model tiers, cheapest first, with list prices in USD per million prompt and completion tokens
+FAST_MODEL = "gpt-4o-mini"
+DEFAULT_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+# LLM stages and the schema their responses are checked against
+STAGE_SCHEMAS = {
+    "single_call": SUMMARY_SCHEMA,
+    "topics": TOPICS_SCHEMA,
+    "topic_candidates": TOPICS_SCHEMA,
+    "topic_reduce": TOPICS_SCHEMA,
+    "qa": QUESTIONS_SCHEMA,
+}
+ROUTES = ("cascade", "fast", "strong")
+
+# Answers shorter than this are taken as a sign of a weak response
+MIN_ANSWER_CHARS = 20
+
+class ModelTier:
+    """One model the router can send a call to, with its prices per million tokens."""
+    def __init__(self, name, model, prompt_price, completion_price):
+        self.name = name
+        self.model = model
+        self.prompt_price = prompt_price
+        self.completion_price = completion_price
+
+    def cost(self, prompt_tokens, completion_tokens):
+        return (prompt_tokens * self.prompt_price + completion_tokens * self.completion_price) / 1e6
+
+    def __repr__(self):
+        return f"ModelTier({self.name!r}, {self.model!r})"
+
+def assess(stage, response):
+    """
+    Return why a stage's response is not good enough to keep, or None when it is.
+
+    Responses must parse cleanly (salvaged output means the model broke the
+    format) and have the shape the prompt asked for: enough topics with
+    summaries, and Q&A with substantive answers.
+    """
+    result = parse_structured(response, STAGE_SCHEMAS[stage])
+    if result.method == "failed":
+        return "unparseable output"
+    if result.method == "salvaged":
+        return "malformed output"
+    items = result.items
+    min_items = 1 if stage in ("topic_candidates", "qa") else 2
+    if len(items) < min_items:
+        return f"{len(items)} {STAGE_SCHEMAS[stage].list_key}, expected at least {min_items}"
+    if stage == "qa":
+        if any(len(item["answer"]) < MIN_ANSWER_CHARS for item in items):
+            return "short answers"
+        return None
+    if not all(item.get("summary") for item in items):
+        return "topics without summaries"
+    if stage == "single_call" and not any(item.get("questions") for item in items):
+        return "no questions"
+    return None
+
+class ModelRouter:
+    """
+    Picks the model for each LLM call by stage and prompt size, cheapest tier first.
+
+    A stage routed "cascade" first goes to the fast tier; when the response fails
+    assess() it is retried on the strong tier. "fast" and "strong" pin a stage to
+    one tier. Prompts over fast_max_tokens skip the fast tier, since small
+    models lose track of long transcripts. Every call opens an "llm" trace span
+    recording the stage, tier, model and outcome, and adds its cost (llm_cost_usd);
+    metrics() sums calls, latency, tokens and cost per tier for the process.
+    """
+    def __init__(self, fast, strong, routes=None, default_route="cascade", fast_max_tokens=16000):
+        for route in [default_route, *(routes or {}).values()]:
+            if route not in ROUTES:
+                raise ValueError(f"Unknown model route: {route}")
+        self.fast = fast
+        self.strong = strong
+        self.routes = dict(routes or {})
+        self.default_route = default_route
+        self.fast_max_tokens = fast_max_tokens
+        self._lock = threading.Lock()
+        self._tiers = {tier.name: {"calls": 0, "cache_hits": 0, "seconds": 0.0, "prompt_tokens": 0,
+                                   "completion_tokens": 0, "cost_usd": 0.0} for tier in (fast, strong)}
+        self._decisions = {}
+        self._escalations = {}
+
+    def signature(self):
+        """The routing configuration, for checkpoint fingerprints."""
+        return {
+            "fast": self.fast.model, "strong": self.strong.model, "routes": self.routes,
+            "default_route": self.default_route, "fast_max_tokens": self.fast_max_tokens,
+        }
+
+    def tiers_for(self, stage, prompt_tokens):
+        """The tiers a stage's call tries, in order."""
+        route = self.routes.get(stage, self.default_route)
+        if route == "strong" or (route == "cascade" and prompt_tokens > self.fast_max_tokens):
+            return [self.strong]
+        if route == "fast":
+            return [self.fast]
+        return [self.fast, self.strong]
+
+    def stream_model(self, stage, prompt_tokens):
+        """Model for a streamed call, which cannot be checked before it is used: the last tier it would try."""
+        return self.tiers_for(stage, prompt_tokens)[-1].model
+
+    def call(self, stage, prompt, use_cache=True, **params):
+        """call_llm() through the stage's tiers; returns the first acceptable response, or the last one."""
+        tiers = self.tiers_for(stage, estimate_tokens(prompt))
+        response = None
+        for i, tier in enumerate(tiers):
+            with span(f"llm {stage}", "llm", detached=True, stage=stage, tier=tier.name, model=tier.model) as call_span:
+                response = call_llm(prompt, model=tier.model, use_cache=use_cache, **params)
+                if self._settle(stage, tier, tiers[i + 1:], response, call_span):
+                    break
+        return response
+
+    async def acall(self, stage, prompt, use_cache=True, **params):
+        """Async version of call()."""
+        tiers = self.tiers_for(stage, estimate_tokens(prompt))
+        response = None
+        for i, tier in enumerate(tiers):
+            with span(f"llm {stage}", "llm", detached=True, stage=stage, tier=tier.name, model=tier.model) as call_span:
+                response = await acall_llm(prompt, model=tier.model, use_cache=use_cache, **params)
+                if self._settle(stage, tier, tiers[i + 1:], response, call_span):
+                    break
+        return response
+
+    def _settle(self, stage, tier, remaining, response, call_span):
+        """Record one call and decide whether its response is kept. Returns True to stop the cascade."""
+        counters = call_span.counters
+        cost = tier.cost(counters["prompt_tokens"], counters["completion_tokens"])
+        call_span.add(llm_cost_usd=cost)
+        reason = assess(stage, response) if remaining else None
+        call_span.attributes["outcome"] = f"escalated: {reason}" if reason else "accepted"
+        with self._lock:
+            metrics = self._tiers[tier.name]
+            metrics["calls"] += 1
+            metrics["cache_hits"] += counters["cache_hits"]
+            metrics["seconds"] += counters["llm_seconds"]
+            metrics["prompt_tokens"] += counters["prompt_tokens"]
+            metrics["completion_tokens"] += counters["completion_tokens"]
+            metrics["cost_usd"] += cost
+            if not reason:
+                decisions = self._decisions.setdefault(stage, {})
+                decisions[tier.name] = decisions.get(tier.name, 0) + 1
+            else:
+                self._escalations[stage] = self._escalations.get(stage, 0) + 1
+        if reason:
+            print(f"Escalating {stage} from {tier.model} to {remaining[0].model}: {reason}")
+        return not reason
+
+    def metrics(self):
+        """
+        Per-tier calls, LLM seconds, tokens and cost, which tier produced each
+        stage's kept responses, and how often each stage escalated.
+        """
+        with self._lock:
+            tiers = {}
+            for tier in (self.fast, self.strong):
+                values = dict(self._tiers[tier.name])
+                values.update(model=tier.model, seconds=round(values["seconds"], 3),
+                              cost_usd=round(values["cost_usd"], 6))
+                tiers[tier.name] = values
+            return {
+                "tiers": tiers,
+                "decisions": {stage: dict(counts) for stage, counts in self._decisions.items()},
+                "escalations": dict(self._escalations),
+            }
+
+def _tier(name, model):
+    """Tier for model, priced from LLM_<NAME>_PRICE ("prompt,completion" per million tokens) or DEFAULT_PRICES."""
+    price = os.environ.get(f"LLM_{name.upper()}_PRICE")
+    prompt_price, completion_price = (map(float, price.split(",")) if price
+                                      else DEFAULT_PRICES.get(model, DEFAULT_PRICES[DEFAULT_MODEL]))
+    return ModelTier(name, model, prompt_price, completion_price)
+
+def _parse_routes(value):
+    """Parse LLM_ROUTES, e.g. "topics=strong,qa=cascade"."""
+    routes = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        stage, _, route = entry.partition("=")
+        if stage.strip() not in STAGE_SCHEMAS:
+            raise ValueError(f"Unknown LLM stage in LLM_ROUTES: {stage}")
+        routes[stage.strip()] = route.strip()
+    return routes
+
+_routers = {}
+_routers_lock = threading.Lock()
+
+def get_model_router():
+    """Return the process-wide router configured from the environment (one per configuration)."""
+    config = tuple(os.environ.get(key, "") for key in (
+        "LLM_FAST_MODEL", "LLM_STRONG_MODEL", "LLM_ROUTING", "LLM_ROUTES", "LLM_FAST_MAX_TOKENS",
+        "LLM_FAST_PRICE", "LLM_STRONG_PRICE",
+    ))
+    with _routers_lock:
+        if config not in _routers:
+            _routers[config] = ModelRouter(
+                fast=_tier("fast", os.environ.get("LLM_FAST_MODEL", FAST_MODEL)),
+                strong=_tier("strong", os.environ.get("LLM_STRONG_MODEL", DEFAULT_MODEL)),
+                routes=_parse_routes(os.environ.get("LLM_ROUTES", "")),
+                default_route=os.environ.get("LLM_ROUTING", "cascade"),
+                fast_max_tokens=int(os.environ.get("LLM_FAST_MAX_TOKENS", "16000")),
+            )
+        return _routers[config]
+
+def call_routed_llm(stage, prompt, use_cache=True, **params):
+    """call_llm() on the model the process-wide router picks for the stage, escalating weak responses."""
+    return get_model_router().call(stage, prompt, use_cache=use_cache, **params)
+
+async def acall_routed_llm(stage, prompt, use_cache=True, **params):
+    """Async version of call_routed_llm()."""
+    return await get_model_router().acall(stage, prompt, use_cache=use_cache, **params)
@@ -0,0 +1,239 @@
+import contextlib
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from array import array
+
+# One-permutation MinHash over word shingles, banded for LSH: two transcripts land
+# in the same bucket of at least one band with probability 1 - (1 - J^ROWS)^BANDS,
+# which is about 50% at Jaccard similarity 0.5 and over 99% at 0.75.
+SHINGLE_WORDS = 4
+NUM_PERM = 64  # signature length, a power of two
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)
+_A, _B = _rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)
+_BIN_BITS = NUM_PERM.bit_length() - 1
+_WORD_RE = re.compile(r"\w+")
+_EMPTY = 0xFFFFFFFF
+
+def shingle_hashes(text, k=SHINGLE_WORDS):
+    """Set of 32-bit hashes of the k-word shingles of text (case and punctuation ignored)."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < k:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + k]).encode("utf-8")) for i in range(len(words) - k + 1)}
+
+def minhash(hashes):
+    """
+    MinHash signature (NUM_PERM uint32 values) of a set of shingle hashes.
+
+    Uses one-permutation hashing: every shingle is hashed once and only updates
+    the minimum of the bin picked by its low bits, instead of NUM_PERM separate
+    permutations. Empty bins copy the next non-empty bin (rotation densification),
+    so short transcripts still get comparable signatures.
+    """
+    mins = [None] * NUM_PERM
+    for x in hashes:
+        h = (_A * x + _B) % _PRIME
+        b = h & (NUM_PERM - 1)
+        v = (h >> _BIN_BITS) & _EMPTY
+        if mins[b] is None or v < mins[b]:
+            mins[b] = v
+    if all(m is None for m in mins):
+        return array("I", [_EMPTY] * NUM_PERM)
+    signature = array("I", [0] * NUM_PERM)
+    for i in range(NUM_PERM):
+        j, offset = i, 0
+        while mins[j] is None:
+            j, offset = (j + 1) % NUM_PERM, offset + 1
+        signature[i] = mins[j] if not offset else (mins[j] + offset * 0x9E3779B1) & _EMPTY
+    return signature
+
+def transcript_signature(text):
+    """Return (signature, shingle count) for a transcript."""
+    hashes = shingle_hashes(text)
+    return minhash(hashes), len(hashes)
+
+def band_keys(signature):
+    """One signed 64-bit bucket key per LSH band."""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f"<B{ROWS}I", band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+def estimate_jaccard(a, b):
+    """Share of equal MinHash values, an unbiased estimate of the shingle sets' Jaccard similarity."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+class Match:
+    """
+    An indexed video similar to a query transcript.
+
+    jaccard estimates the similarity of the two shingle sets; containment
+    estimates the share of the query's shingles found in this video (near 1
+    when the query is a clip of it).
+    """
+    def __init__(self, video_id, jaccard, containment, has_summary):
+        self.video_id = video_id
+        self.jaccard = jaccard
+        self.containment = containment
+        self.has_summary = has_summary
+
+    def __repr__(self):
+        return f"Match({self.video_id!r}, jaccard={self.jaccard:.2f}, containment={self.containment:.2f})"
+
+class NearDuplicateIndex:
+    """
+    Persistent MinHash/LSH index of transcript fingerprints, with the summary of each video once it exists.
+
+    Lookups read the LSH bucket of each band (one indexed query), then compare
+    the full signatures of the candidates, so their cost does not grow with the
+    number of indexed videos. The SQLite file can be shared by threads and by
+    fleet worker processes.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS docs ("
+                " id INTEGER PRIMARY KEY,"
+                " video_id TEXT UNIQUE NOT NULL,"
+                " shingles INTEGER NOT NULL,"
+                " signature BLOB NOT NULL,"
+                " summary TEXT,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bands ("
+                " key INTEGER NOT NULL,"
+                " doc INTEGER NOT NULL,"
+                " PRIMARY KEY (key, doc)) WITHOUT ROWID"
+            )
+
+    def _connect(self):
+        """Return this thread's connection (sqlite3 connections are not shared across threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def add(self, video_id, signature, shingles):
+        """Index (or re-index) a video's transcript signature, keeping any stored summary."""
+        self.add_many([(video_id, signature, shingles)])
+
+    def add_many(self, entries):
+        """Index many (video_id, signature, shingle count) entries in one transaction."""
+        now = time.time()
+        rows = []
+        with self._transaction() as conn:
+            for video_id, signature, shingles in entries:
+                old = conn.execute("SELECT id, signature FROM docs WHERE video_id = ?", (video_id,)).fetchone()
+                if old:
+                    doc = old[0]
+                    conn.executemany("DELETE FROM bands WHERE key = ? AND doc = ?",
+                                     [(key, doc) for key in band_keys(array("I", old[1]))])
+                    conn.execute("UPDATE docs SET shingles = ?, signature = ?, updated_at = ? WHERE id = ?",
+                                 (shingles, signature.tobytes(), now, doc))
+                else:
+                    doc = conn.execute(
+                        "INSERT INTO docs (video_id, shingles, signature, updated_at) VALUES (?, ?, ?, ?)",
+                        (video_id, shingles, signature.tobytes(), now),
+                    ).lastrowid
+                rows.extend((key, doc) for key in band_keys(signature))
+            # Inserting in key order keeps B-tree page writes local
+            rows.sort()
+            conn.executemany("INSERT OR IGNORE INTO bands (key, doc) VALUES (?, ?)", rows)
+
+    def query(self, signature, shingles, exclude=None, limit=5):
+        """Return up to limit Matches sharing an LSH bucket with the signature, most similar first."""
+        conn = self._connect()
+        keys = band_keys(signature)
+        docs = [row[0] for row in conn.execute(
+            f"SELECT DISTINCT doc FROM bands WHERE key IN ({','.join('?' * len(keys))})", keys
+        )]
+        if not docs:
+            return []
+        matches = []
+        for video_id, other_shingles, other_signature, has_summary in conn.execute(
+            f"SELECT video_id, shingles, signature, summary IS NOT NULL FROM docs"
+            f" WHERE id IN ({','.join('?' * len(docs))})", docs
+        ):
+            if video_id == exclude:
+                continue
+            jaccard = estimate_jaccard(signature, array("I", other_signature))
+            # |A & B| = J * |A | B| = J * (|A| + |B|) / (1 + J)
+            overlap = jaccard * (shingles + other_shingles) / (1 + jaccard)
+            containment = min(1.0, overlap / shingles) if shingles else 0.0
+            matches.append(Match(video_id, jaccard, containment, bool(has_summary)))
+        matches.sort(key=lambda m: (-m.jaccard, -m.containment, m.video_id))
+        return matches[:limit]
+
+    def set_summary(self, video_id, topics):
+        """Store the finished summary (topics with Q&A) of an indexed video."""
+        with self._transaction() as conn:
+            conn.execute("UPDATE docs SET summary = ?, updated_at = ? WHERE video_id = ?",
+                         (json.dumps(topics, ensure_ascii=False), time.time(), video_id))
+
+    def get_summary(self, video_id):
+        """Return the stored summary of a video, or None."""
+        row = self._connect().execute("SELECT summary FROM docs WHERE video_id = ?", (video_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_near_duplicate_index():
+    """Return the process-wide index at NEAR_DUP_INDEX, or None with NEAR_DUP_DISABLE=1."""
+    if os.environ.get("NEAR_DUP_DISABLE") == "1":
+        return None
+    path = os.environ.get("NEAR_DUP_INDEX", os.path.join(".cache", "near_duplicates.db"))
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = NearDuplicateIndex(path)
+        return _indexes[path]
+
+if __name__ == "__main__":
+    # A re-upload with slightly different captions and a clip of the same talk
+    import tempfile
+    rng = random.Random(0)
+    words = [rng.choice(["cache", "latency", "profile", "memory", "thread", "lock", "queue", "disk"])
+             for _ in range(3000)]
+    original = " ".join(words)
+    reupload = " ".join(w if rng.random() > 0.02 else "um" for w in words)
+    clip = " ".join(words[:2000])
+    with tempfile.TemporaryDirectory() as tmp:
+        index = NearDuplicateIndex(os.path.join(tmp, "index.db"))
+        index.add("original", *transcript_signature(original))
+        for name, text in (("re-upload", reupload), ("clip", clip)):
+            print(name, index.query(*transcript_signature(text)))
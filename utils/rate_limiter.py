@@ -0,0 +1,231 @@
+import asyncio
+import email.utils
+import os
+import random
+import threading
+import time
+from utils.tracing import record_llm_retry
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+class RateLimiter:
+    """
+    Client-side token-bucket limiter for requests/min and tokens/min budgets.
+
+    One limiter is shared by every thread and event loop in the process, so
+    concurrent flows draw from the same budget. A Retry-After from the server
+    pauses all callers, not just the one that received it, which avoids a
+    thundering herd of immediate retries.
+    """
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.acquired = 0
+        self.throttled = 0
+        self.throttle_seconds = 0.0
+        self.retries = 0
+        self.server_throttles = 0
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _reserve(self, tokens):
+        """Take budget for one request if available, else return the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            tokens = min(tokens, self.tpm) if self.tpm else tokens
+            wait = self._paused_until - now
+            if self.rpm and self._requests < 1:
+                wait = max(wait, (1 - self._requests) * 60 / self.rpm)
+            if self.tpm and self._tokens < tokens:
+                wait = max(wait, (tokens - self._tokens) * 60 / self.tpm)
+            if wait > 0:
+                return wait
+            if self.rpm:
+                self._requests -= 1
+            if self.tpm:
+                self._tokens -= tokens
+            self.acquired += 1
+            return 0.0
+
+    def _enter_queue(self):
+        with self._lock:
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def _leave_queue(self, waited):
+        with self._lock:
+            self.queue_depth -= 1
+            if waited > 0:
+                self.throttled += 1
+                self.throttle_seconds += waited
+
+    def acquire(self, tokens=0):
+        """Block until the request fits the budget."""
+        self._enter_queue()
+        waited = 0.0
+        try:
+            while True:
+                wait = self._reserve(tokens)
+                if wait <= 0:
+                    return
+                time.sleep(wait)
+                waited += wait
+        finally:
+            self._leave_queue(waited)
+
+    async def acquire_async(self, tokens=0):
+        """Wait, without blocking the event loop, until the request fits the budget."""
+        self._enter_queue()
+        waited = 0.0
+        try:
+            while True:
+                wait = self._reserve(tokens)
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+                waited += wait
+        finally:
+            self._leave_queue(waited)
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """Correct the token bucket once the real usage of a request is known."""
+        if self.tpm and actual_tokens is not None:
+            with self._lock:
+                self._tokens = min(self.tpm, self._tokens + estimated_tokens - actual_tokens)
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def pause(self, seconds):
+        """Hold every caller for the given seconds (e.g. from a Retry-After header)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.server_throttles += 1
+
+    def metrics(self):
+        """Return a snapshot of queue-depth and throttle metrics."""
+        with self._lock:
+            return {
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "requests": self.acquired,
+                "throttled": self.throttled,
+                "throttle_seconds": round(self.throttle_seconds, 3),
+                "retries": self.retries,
+                "server_throttles": self.server_throttles,
+            }
+
+def retry_after_seconds(exc):
+    """Read Retry-After / retry-after-ms from an API error's response, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        # HTTP-date form
+        parsed = email.utils.parsedate_to_datetime(value)
+        return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+def is_retryable(exc):
+    """Rate limits, server errors, timeouts and connection failures are retried."""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    name = type(exc).__name__
+    return "Timeout" in name or "Connection" in name
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, honoring server Retry-After hints."""
+    def __init__(self, max_attempts=5, base_delay=1.0, max_delay=60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, exc):
+        hint = retry_after_seconds(exc)
+        if hint is not None:
+            return min(hint, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+def _before_retry(limiter, policy, attempt, exc):
+    """Return the seconds to wait before retrying, or re-raise if the error is final."""
+    if attempt == policy.max_attempts - 1 or not is_retryable(exc):
+        raise exc
+    delay = policy.delay(attempt, exc)
+    limiter.record_retry()
+    record_llm_retry()
+    if getattr(exc, "status_code", None) == 429:
+        limiter.pause(delay)
+    print(f"LLM call failed ({exc.__class__.__name__}), retrying in {delay:.1f}s")
+    return delay
+
+def call_with_retries(fn, limiter, policy, tokens=0):
+    """Call fn() under the rate limiter, retrying retryable errors with backoff."""
+    for attempt in range(policy.max_attempts):
+        limiter.acquire(tokens)
+        try:
+            return fn()
+        except Exception as e:
+            delay = _before_retry(limiter, policy, attempt, e)
+        time.sleep(delay)
+
+async def acall_with_retries(fn, limiter, policy, tokens=0):
+    """Async version of call_with_retries; fn() returns an awaitable."""
+    for attempt in range(policy.max_attempts):
+        await limiter.acquire_async(tokens)
+        try:
+            return await fn()
+        except Exception as e:
+            delay = _before_retry(limiter, policy, attempt, e)
+        await asyncio.sleep(delay)
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Return the process-wide limiter configured from LLM_RPM / LLM_TPM (0 = unlimited)."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(
+                requests_per_minute=int(os.environ.get("LLM_RPM", "500")),
+                tokens_per_minute=int(os.environ.get("LLM_TPM", "300000")),
+            )
+        return _limiter
+
+def get_retry_policy():
+    """Return the retry policy configured from LLM_MAX_ATTEMPTS / LLM_BACKOFF_BASE / LLM_BACKOFF_MAX."""
+    return RetryPolicy(
+        max_attempts=int(os.environ.get("LLM_MAX_ATTEMPTS", "5")),
+        base_delay=float(os.environ.get("LLM_BACKOFF_BASE", "1")),
+        max_delay=float(os.environ.get("LLM_BACKOFF_MAX", "60")),
+    )
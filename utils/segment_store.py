@@ -0,0 +1,187 @@
+import bisect
+import mmap
+import os
+import struct
+from array import array
+
+# File layout, all little-endian and 8-byte aligned so the arrays can be mapped in place:
+#   header   magic, segment count n, text size in bytes
+#   float64  starts[n], durations[n]
+#   uint64   byte_offsets[n + 1], char_offsets[n + 1]
+#   bytes    UTF-8 text of all segments joined by SEPARATOR
+_MAGIC = b"YTSEG001"
+_HEADER = struct.Struct("<8sQQ")
+SEPARATOR = " "
+
+class SegmentArray:
+    """
+    Caption segments stored as one contiguous UTF-8 buffer plus offset and timestamp arrays.
+
+    Loaded from disk the arrays and text are memory-mapped, so concurrent jobs on
+    the same video share one copy in the page cache. Slicing by segment index,
+    time range or character range returns views over the same buffers. Iterating
+    yields {"text", "start", "duration"} dicts like the raw caption segments.
+    """
+    def __init__(self, text, starts, durations, byte_offsets, char_offsets, lo=0, hi=None, _mmap=None):
+        self._text = text
+        self._starts = starts
+        self._durations = durations
+        self._byte_offsets = byte_offsets
+        self._char_offsets = char_offsets
+        self._lo = lo
+        self._hi = len(starts) if hi is None else hi
+        self._mmap = _mmap
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Build an in-memory SegmentArray from a list of caption segment dicts."""
+        if isinstance(segments, SegmentArray):
+            return segments
+        starts, durations = array("d"), array("d")
+        byte_offsets, char_offsets = array("Q", [0]), array("Q", [0])
+        parts = []
+        byte_pos = char_pos = 0
+        for segment in segments:
+            text = segment["text"].replace("\n", " ")
+            starts.append(float(segment.get("start", 0) or 0))
+            durations.append(float(segment.get("duration", 0) or 0))
+            encoded = (text + SEPARATOR).encode("utf-8")
+            parts.append(encoded)
+            byte_pos += len(encoded)
+            char_pos += len(text) + len(SEPARATOR)
+            byte_offsets.append(byte_pos)
+            char_offsets.append(char_pos)
+        return cls(b"".join(parts), starts, durations, byte_offsets, char_offsets)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a file written by save()."""
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"Truncated segment file: {path}")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n, text_size = _HEADER.unpack_from(mm, 0)
+        if magic != _MAGIC or size != _HEADER.size + 8 * (4 * n + 2) + text_size:
+            mm.close()
+            raise ValueError(f"Not a segment file: {path}")
+        view = memoryview(mm)
+        pos = _HEADER.size
+
+        def take(count, fmt):
+            nonlocal pos
+            part = view[pos:pos + 8 * count].cast(fmt)
+            pos += 8 * count
+            return part
+
+        starts, durations = take(n, "d"), take(n, "d")
+        byte_offsets, char_offsets = take(n + 1, "Q"), take(n + 1, "Q")
+        return cls(view[pos:pos + text_size], starts, durations, byte_offsets, char_offsets, _mmap=mm)
+
+    def save(self, path):
+        """Write the segments in the mappable format (atomically, via a temporary file)."""
+        compact = self if (self._lo, self._hi) == (0, len(self._starts)) else SegmentArray.from_segments(self)
+        n = len(compact)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, n, len(compact._text)))
+            for values, fmt in ((compact._starts, "d"), (compact._durations, "d"),
+                                (compact._byte_offsets, "Q"), (compact._char_offsets, "Q")):
+                f.write(array(fmt, values).tobytes() if not isinstance(values, array) else values.tobytes())
+            f.write(compact._text)
+        os.replace(tmp_path, path)
+
+    def __len__(self):
+        return self._hi - self._lo
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            lo, hi, step = i.indices(len(self))
+            if step != 1:
+                raise ValueError("SegmentArray slices must be contiguous")
+            return self._view(self._lo + lo, self._lo + max(lo, hi))
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("segment index out of range")
+        j = self._lo + i
+        return {"text": self._decode(j, j + 1), "start": self._starts[j], "duration": self._durations[j]}
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def _view(self, lo, hi):
+        return SegmentArray(self._text, self._starts, self._durations, self._byte_offsets, self._char_offsets,
+                            lo, hi, self._mmap)
+
+    def _decode(self, lo, hi):
+        """Text of absolute segments [lo, hi) joined by SEPARATOR."""
+        if lo >= hi:
+            return ""
+        end = self._byte_offsets[hi] - len(SEPARATOR.encode("utf-8"))
+        return str(self._text[self._byte_offsets[lo]:end], "utf-8")
+
+    def text(self):
+        """The segments' text joined by spaces, decoded in one pass from the buffer."""
+        return self._decode(self._lo, self._hi)
+
+    def text_range(self, lo, hi):
+        """Text of segments [lo, hi) relative to this view."""
+        return self._decode(self._lo + lo, self._lo + min(hi, len(self)))
+
+    @property
+    def start(self):
+        return self._starts[self._lo] if len(self) else 0.0
+
+    @property
+    def end(self):
+        if not len(self):
+            return 0.0
+        return self._starts[self._hi - 1] + self._durations[self._hi - 1]
+
+    def index_at(self, seconds):
+        """Index (relative to this view) of the segment playing at the given time."""
+        i = bisect.bisect_right(self._starts, seconds, self._lo, self._hi) - 1
+        return max(i, self._lo) - self._lo
+
+    def slice_time(self, start, end):
+        """View of the segments overlapping [start, end) seconds."""
+        lo = self._lo + self.index_at(start)
+        if lo < self._hi and self._starts[lo] + self._durations[lo] <= start:
+            lo += 1
+        hi = bisect.bisect_left(self._starts, end, lo, self._hi)
+        return self._view(lo, hi)
+
+    def slice_chars(self, start, end):
+        """View of the segments overlapping characters [start, end) of text()."""
+        base = self._char_offsets[self._lo]
+        lo = bisect.bisect_right(self._char_offsets, base + start, self._lo, self._hi + 1) - 1
+        hi = bisect.bisect_left(self._char_offsets, base + end, lo + 1, self._hi + 1)
+        return self._view(max(lo, self._lo), min(hi, self._hi))
+
+    def to_list(self):
+        """Plain list of segment dicts (e.g. for JSON)."""
+        return list(self)
+
+    def close(self):
+        """Release the memory map (views created from this array become unusable)."""
+        if self._mmap is not None:
+            for part in (self._text, self._starts, self._durations, self._byte_offsets, self._char_offsets):
+                part.release()
+            self._mmap.close()
+            self._mmap = None
+
+if __name__ == "__main__":
+    # Round-trip through a mapped file and slice by time and character range
+    import tempfile
+    segments = [{"text": f"segment {i} xin chào", "start": i * 2.0, "duration": 2.0} for i in range(10)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "en.seg")
+        SegmentArray.from_segments(segments).save(path)
+        mapped = SegmentArray.load(path)
+        print(f"{len(mapped)} segments, {mapped.end:.0f}s: {mapped.text()[:40]}...")
+        print(f"3s-7s: {mapped.slice_time(3, 7).text()}")
+        print(f"chars 20-30: {mapped.slice_chars(20, 30).text()}")
+        mapped.close()
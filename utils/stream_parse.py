@@ -0,0 +1,132 @@
+import re
+
+_ITEM_RE = re.compile(r"^(\s*)- ")
+
+_YAML_LOADER = None
+
+def load_yaml(text):
+    """yaml.safe_load through the C loader when libyaml is available."""
+    # PyYAML is imported on first use: with JSON mode most runs never parse YAML
+    global _YAML_LOADER
+    import yaml
+    if _YAML_LOADER is None:
+        # libyaml's C loader is an order of magnitude faster than the pure-Python one
+        _YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(text, Loader=_YAML_LOADER)
+
+class IncrementalYAMLListParser:
+    """
+    Incrementally parse a YAML list (e.g. `topics:` or `questions:`) from a streamed LLM response.
+
+    Text is fed in arbitrary pieces. A list item is emitted as soon as it is known
+    to be complete: when the next item starts, the list ends or the code fence closes.
+
+        parser = IncrementalYAMLListParser("topics")
+        for delta in stream:
+            for item in parser.feed(delta):
+                ...
+        for item in parser.close():
+            ...
+    """
+    def __init__(self, list_key, quiet=False):
+        self.list_key = list_key
+        self.quiet = quiet
+        self._pending = ""      # text not yet split into complete lines
+        self._in_list = False
+        self._done = False
+        self._item_indent = None
+        self._item_lines = []
+
+    def feed(self, text):
+        """Add streamed text and return the list items completed by it."""
+        if self._done:
+            return []
+        self._pending += text
+        *lines, self._pending = self._pending.split("\n")
+        items = []
+        for line in lines:
+            item = self._process_line(line)
+            if item is not None:
+                items.append(item)
+            if self._done:
+                break
+        return items
+
+    def close(self):
+        """Flush the remaining text at the end of the stream and return any last item."""
+        items = []
+        if not self._done and self._pending:
+            item = self._process_line(self._pending)
+            if item is not None:
+                items.append(item)
+        self._pending = ""
+        item = self._finish_item()
+        if item is not None:
+            items.append(item)
+        self._done = True
+        return items
+
+    def _process_line(self, line):
+        stripped = line.strip()
+        if not self._in_list:
+            if stripped == f"{self.list_key}:" or stripped.startswith(f"{self.list_key}:"):
+                self._in_list = True
+            return None
+
+        if stripped.startswith("```"):
+            self._done = True
+            return self._finish_item()
+        if not stripped:
+            if self._item_lines:
+                self._item_lines.append(line)
+            return None
+
+        indent = len(line) - len(line.lstrip())
+        match = _ITEM_RE.match(line)
+        if match and (self._item_indent is None or indent == self._item_indent):
+            finished = self._finish_item()
+            self._item_indent = indent
+            self._item_lines = [line]
+            return finished
+        if self._item_indent is not None and indent <= self._item_indent:
+            # Dedent back to (or above) the list level ends the list
+            self._done = True
+            return self._finish_item()
+        if self._item_lines:
+            self._item_lines.append(line)
+        return None
+
+    def _finish_item(self):
+        if not self._item_lines:
+            return None
+        import yaml
+        block = "\n".join(l[self._item_indent:] for l in self._item_lines)
+        self._item_lines = []
+        try:
+            data = load_yaml(block)
+        except yaml.YAMLError as e:
+            if not self.quiet:
+                print(f"Skipping unparseable streamed item: {e}")
+            return None
+        if isinstance(data, list) and data:
+            return data[0]
+        return None
+
+if __name__ == "__main__":
+    # Feed a response a few characters at a time
+    response = """Here you go:
+```yaml
+topics:
+  - topic: "First"
+    summary: "Summary of the first topic"
+  - topic: "Second"
+    summary: >
+      A folded summary
+      over two lines
+```"""
+    parser = IncrementalYAMLListParser("topics")
+    for i in range(0, len(response), 7):
+        for item in parser.feed(response[i:i + 7]):
+            print(f"Completed after {i + 7} chars: {item}")
+    for item in parser.close():
+        print(f"Completed at close: {item}")
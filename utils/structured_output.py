@@ -0,0 +1,225 @@
+import json
+import os
+import re
+import textwrap
+from utils.stream_parse import IncrementalYAMLListParser, load_yaml
+
+_FENCE_RE = re.compile(r"```[ \t]*([A-Za-z]*)[ \t]*\n(.*?)(?:```|\Z)", re.DOTALL)
+_KEY_VALUE_RE = re.compile(r"""^\s*(-\s+)?["']?([A-Za-z_]+)["']?\s*:\s*(.*?)\s*,?\s*$""")
+
+class Schema:
+    """
+    Expected shape of a structured response: a mapping with one list of items.
+
+    Items must be mappings containing the required fields; optional fields are
+    filled with defaults. Field values are coerced to strings, except nested
+    fields, which hold lists validated against their own schema.
+    """
+    def __init__(self, list_key, required, optional=None, nested=None, example=None):
+        self.list_key = list_key
+        self.required = tuple(required)
+        self.optional = dict(optional or {})
+        self.nested = dict(nested or {})
+        self.example = example or []
+
+    @property
+    def fields(self):
+        return self.required + tuple(self.optional)
+
+    def validate(self, data):
+        """Return the valid items of data (the mapping or the bare list), or None if it has no such list."""
+        if isinstance(data, dict):
+            data = data.get(self.list_key)
+        if not isinstance(data, list):
+            return None
+        items = []
+        for raw in data:
+            if not isinstance(raw, dict):
+                continue
+            item = {}
+            for field in self.required:
+                value = raw.get(field)
+                if value is None or isinstance(value, (dict, list)) or not str(value).strip():
+                    break
+                item[field] = str(value).strip()
+            else:
+                for field, default in self.optional.items():
+                    value = raw.get(field, default)
+                    item[field] = default if value is None or isinstance(value, (dict, list)) else str(value).strip()
+                for field, schema in self.nested.items():
+                    item[field] = schema.validate(raw.get(field)) or []
+                items.append(item)
+        return items
+
+TOPICS_SCHEMA = Schema(
+    "topics", required=("topic",), optional={"summary": ""},
+    example=[{"topic": f"Topic {i} Title", "summary": f"Brief summary of Topic {i}"} for i in (1, 2, 3)],
+)
+QUESTIONS_SCHEMA = Schema(
+    "questions", required=("question", "answer"),
+    example=[{"question": "First question?", "answer": "Comprehensive answer to the first question."},
+             {"question": "Second question?", "answer": "Comprehensive answer to the second question."}],
+)
+SUMMARY_SCHEMA = Schema(
+    "topics", required=("topic",), optional={"summary": ""}, nested={"questions": QUESTIONS_SCHEMA},
+    example=[
+        {"topic": f"Topic {i} Title", "summary": f"Brief summary of Topic {i}", "questions": QUESTIONS_SCHEMA.example}
+        for i in (1, 2)
+    ],
+)
+
+class ParseResult:
+    """Validated items plus how they were obtained: "json", "yaml", "salvaged" or "failed"."""
+    def __init__(self, items, method):
+        self.items = items
+        self.method = method
+
+    def __repr__(self):
+        return f"ParseResult({len(self.items)} items, {self.method!r})"
+
+def json_mode_enabled():
+    """Ask for JSON (with response_format json_object) unless LLM_JSON_MODE=0."""
+    return os.environ.get("LLM_JSON_MODE", "1") != "0"
+
+def response_format_params(json_mode):
+    """call_llm() parameters that request structured JSON output."""
+    return {"response_format": {"type": "json_object"}} if json_mode else {}
+
+def format_instructions(schema, json_mode, example=None, indent=""):
+    """
+    The 'Format your response as ...' block of a prompt, with an example in the
+    requested format. Lines after the first are prefixed with indent to line up
+    with the surrounding prompt.
+    """
+    payload = {schema.list_key: example or schema.example}
+    if json_mode:
+        block = f"Format your response as a JSON object:\n{json.dumps(payload, indent=2, ensure_ascii=False)}"
+    else:
+        lines = _yaml_list_lines(schema.list_key, payload[schema.list_key])
+        block = "Format your response as YAML:\n```yaml\n" + "\n".join(lines) + "\n```"
+    return textwrap.indent(block, indent).lstrip()
+
+def _yaml_list_lines(key, items):
+    """YAML lines for a list of mappings, in the layout used by the prompts."""
+    lines = [f"{key}:"]
+    for item in items:
+        for i, (field, value) in enumerate(item.items()):
+            lead = "  - " if i == 0 else "    "
+            if isinstance(value, list):
+                nested = _yaml_list_lines(field, value)
+                lines.append(lead + nested[0])
+                lines.extend("    " + line for line in nested[1:])
+            else:
+                lines.append(f"{lead}{field}: {json.dumps(value, ensure_ascii=False)}")
+    return lines
+
+def _payload(response):
+    """Return the text inside the first fenced code block (closed or not), or the whole response."""
+    if "```" not in response:
+        return response.strip()
+    match = _FENCE_RE.search(response)
+    return match.group(2).strip() if match else response.strip()
+
+def _close_json(text):
+    """
+    Repair truncated JSON: drop a dangling key or partial value and close open
+    strings, arrays and objects. Returns None when nothing parseable remains.
+    """
+    stack, in_string, escaped = [], False, False
+    last_safe = None  # (end index, closers) after the last complete value
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            last_safe = (i + 1, "".join(reversed(stack)))
+        elif ch == ",":
+            last_safe = (i, "".join(reversed(stack)))
+    if last_safe is None:
+        return None
+    end, closers = last_safe
+    return text[:end].rstrip().rstrip(",") + closers
+
+def _salvage_key_values(text, schema):
+    """
+    Last resort: rebuild items line by line from `key: value` / `"key": "value"` pairs
+    of the schema's fields, tolerating broken quoting and indentation.
+    """
+    items, current = [], {}
+    for line in text.splitlines():
+        match = _KEY_VALUE_RE.match(line)
+        if not match or match.group(2) not in schema.fields:
+            continue
+        starts_item, key, value = match.group(1), match.group(2), match.group(3)
+        if current and (starts_item or key == schema.fields[0] or key in current):
+            items.append(current)
+            current = {}
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+            value = value[1:-1]
+        current[key] = value.replace('\\"', '"')
+    if current:
+        items.append(current)
+    return schema.validate(items) or []
+
+def parse_structured(response, schema):
+    """
+    Parse an LLM response into the schema's list of items without another LLM round trip.
+
+    Tries a JSON fast path, then YAML (C loader), then salvage: repairing
+    truncated JSON, parsing YAML list items one by one and finally rebuilding
+    items from key/value lines. Returns a ParseResult.
+    """
+    if not response:
+        return ParseResult([], "failed")
+    text = _payload(response)
+
+    if text[:1] in "{[":
+        try:
+            items = schema.validate(json.loads(text))
+            if items is not None:
+                return ParseResult(items, "json")
+        except ValueError:
+            pass
+    import yaml
+    try:
+        items = schema.validate(load_yaml(text))
+        if items is not None:
+            return ParseResult(items, "yaml")
+    except yaml.YAMLError:
+        pass
+
+    if text[:1] in "{[":
+        repaired = _close_json(text)
+        if repaired:
+            try:
+                items = schema.validate(json.loads(repaired))
+                if items:
+                    return ParseResult(items, "salvaged")
+            except ValueError:
+                pass
+    else:
+        parser = IncrementalYAMLListParser(schema.list_key, quiet=True)
+        items = schema.validate(parser.feed(text + "\n") + parser.close())
+        if items:
+            return ParseResult(items, "salvaged")
+
+    items = _salvage_key_values(text, schema)
+    return ParseResult(items, "salvaged" if items else "failed")
+
+if __name__ == "__main__":
+    # A truncated JSON response and a YAML response with broken quoting
+    truncated = '{"topics": [{"topic": "Intro", "summary": "Setting up"}, {"topic": "Deploy", "summ'
+    broken = 'topics:\n  - topic: "Quotes "inside" quotes"\n    summary: fine\n  - topic: Second\n    summary: ok: yes'
+    print(parse_structured(truncated, TOPICS_SCHEMA).items)
+    print(parse_structured(broken, TOPICS_SCHEMA).items)
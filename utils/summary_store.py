@@ -0,0 +1,272 @@
+import contextlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from utils.html_utils import iter_html, save_html
+
+# Ranking weights of the full-text columns (title, topic names, topic summaries, Q&A)
+COLUMN_WEIGHTS = (4.0, 3.0, 1.5, 1.0)
+_TERM_RE = re.compile(r"\w+")
+
+def match_query(text):
+    """
+    FTS5 query for free text: every word must match, as a prefix for the last one.
+    Words are quoted, so FTS5 operators and punctuation in the text are taken literally.
+    """
+    terms = _TERM_RE.findall(text)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+def _fold(text):
+    """Lowercase text without diacritics, as the FTS tokenizer compares words."""
+    text = text.lower()
+    if text.isascii():
+        return text
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+def _fts_columns(title, topics):
+    """Text of the full-text columns for one summary."""
+    names, summaries, qa = [], [], []
+    for topic in topics:
+        names.append(topic.get("topic") or "")
+        summaries.append(topic.get("summary") or "")
+        for pair in topic.get("questions") or []:
+            qa.append(f"{pair.get('question') or ''} {pair.get('answer') or ''}")
+    return title or "", "\n".join(names), "\n".join(summaries), "\n".join(qa)
+
+def best_topic(topics, text):
+    """
+    The topic whose name, summary and Q&A contain the most words of text, or None
+    if none does. As in match_query(), the last word may be the start of a word.
+    """
+    terms = [_fold(term) for term in _TERM_RE.findall(text)]
+    if not terms:
+        return None
+    *whole, prefix = terms
+    best, best_count = None, 0
+    for topic in topics:
+        words = set(_TERM_RE.findall(_fold(" ".join(_fts_columns("", [topic])[1:]))))
+        count = sum(1 for term in whole if term in words)
+        count += prefix in words or any(word.startswith(prefix) for word in words)
+        if count > best_count:
+            best, best_count = topic, count
+    return best
+
+class SearchHit:
+    """
+    A summary matching a search, with its BM25 score (lower is better) and the
+    topic that matches best, whose start links into the video.
+    """
+    def __init__(self, video_id, title, score, topic=None, start=None):
+        self.video_id = video_id
+        self.title = title
+        self.score = score
+        self.topic = topic
+        self.start = start
+
+    def to_dict(self):
+        return {"video_id": self.video_id, "title": self.title, "score": round(self.score, 4),
+                "topic": self.topic, "start": self.start}
+
+    def __repr__(self):
+        return f"SearchHit({self.video_id!r}, score={self.score:.2f})"
+
+class SummaryStore:
+    """
+    Finished summaries as structured records, with an FTS5 index over their text.
+
+    Each video has one row (title, thumbnail, language and the topics with their
+    Q&A as JSON) keyed by video_id, so "was this video summarized?" is one
+    primary-key lookup. Titles, topic names, topic summaries and Q&A are indexed
+    for ranked search (BM25, weighted by COLUMN_WEIGHTS); diacritics are folded,
+    so "bo nho" finds "bộ nhớ". The index is contentless: the text lives only in
+    the records, which keeps the file about half the size. Pages are rendered
+    from the record on demand. The SQLite file can be shared by threads and by
+    fleet worker processes.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                " id INTEGER PRIMARY KEY,"
+                " video_id TEXT UNIQUE NOT NULL,"
+                " url TEXT,"
+                " title TEXT,"
+                " thumbnail_url TEXT,"
+                " language TEXT,"
+                " topics TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS summary_text USING fts5("
+                " title, topics, summaries, qa,"
+                " content = '', tokenize = 'unicode61 remove_diacritics 2')"
+            )
+
+    def _connect(self):
+        """Return this thread's connection (sqlite3 connections are not shared across threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    def save(self, video_id, title, topics, url=None, thumbnail_url=None, language=None):
+        """Store (or replace) the summary of a video."""
+        self.save_many([{"video_id": video_id, "title": title, "topics": topics, "url": url,
+                         "thumbnail_url": thumbnail_url, "language": language}])
+
+    def save_many(self, records):
+        """Store many summaries (dicts with the arguments of save()) in one transaction."""
+        now = time.time()
+        with self._transaction() as conn:
+            for record in records:
+                video_id, title, topics = record["video_id"], record.get("title"), record["topics"]
+                self._delete(conn, video_id)
+                doc = conn.execute(
+                    "INSERT INTO summaries (video_id, url, title, thumbnail_url, language, topics, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (video_id, record.get("url"), title, record.get("thumbnail_url"), record.get("language"),
+                     json.dumps(topics, ensure_ascii=False), now),
+                ).lastrowid
+                conn.execute("INSERT INTO summary_text (rowid, title, topics, summaries, qa) VALUES (?, ?, ?, ?, ?)",
+                             (doc, *_fts_columns(title, topics)))
+
+    def delete(self, video_id):
+        """Remove a video's summary; returns whether there was one."""
+        with self._transaction() as conn:
+            return self._delete(conn, video_id)
+
+    def _delete(self, conn, video_id):
+        old = conn.execute("SELECT id, title, topics FROM summaries WHERE video_id = ?", (video_id,)).fetchone()
+        if old is None:
+            return False
+        doc, title, topics = old
+        conn.execute("DELETE FROM summaries WHERE id = ?", (doc,))
+        # A contentless index forgets a row when given the exact text it indexed for it
+        conn.execute("INSERT INTO summary_text (summary_text, rowid, title, topics, summaries, qa)"
+                     " VALUES ('delete', ?, ?, ?, ?, ?)", (doc, *_fts_columns(title, json.loads(topics))))
+        return True
+
+    def has(self, video_id):
+        """Whether the video was already summarized."""
+        return self._connect().execute(
+            "SELECT 1 FROM summaries WHERE video_id = ?", (video_id,)
+        ).fetchone() is not None
+
+    def summarized(self, video_ids):
+        """The subset of video_ids that were already summarized."""
+        video_ids = list(video_ids)
+        conn = self._connect()
+        found = set()
+        # Stay below SQLite's limit on bound parameters per statement
+        for i in range(0, len(video_ids), 500):
+            batch = video_ids[i:i + 500]
+            found.update(row[0] for row in conn.execute(
+                f"SELECT video_id FROM summaries WHERE video_id IN ({','.join('?' * len(batch))})", batch
+            ))
+        return found
+
+    def get(self, video_id):
+        """Return a video's summary record (video_id, url, title, thumbnail_url, language, topics, updated_at), or None."""
+        row = self._connect().execute(
+            "SELECT video_id, url, title, thumbnail_url, language, topics, updated_at FROM summaries"
+            " WHERE video_id = ?", (video_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ("video_id", "url", "title", "thumbnail_url", "language", "topics", "updated_at")
+        record = dict(zip(keys, row))
+        record["topics"] = json.loads(record["topics"])
+        return record
+
+    def search(self, text, limit=10):
+        """
+        Return up to limit SearchHits for free text, best match first.
+        Every word has to match; the last one may be the start of a word.
+        """
+        query = match_query(text)
+        if query is None:
+            return []
+        weights = ", ".join(map(str, COLUMN_WEIGHTS))
+        conn = self._connect()
+        # Rank in the index first, so only the returned rows' records are read and parsed
+        ranked = conn.execute(
+            f"SELECT rowid, bm25(summary_text, {weights}) AS score FROM summary_text"
+            f" WHERE summary_text MATCH ? ORDER BY score LIMIT ?",
+            (query, limit),
+        ).fetchall()
+        hits = []
+        for doc, score in ranked:
+            video_id, title, topics = conn.execute(
+                "SELECT video_id, title, topics FROM summaries WHERE id = ?", (doc,)
+            ).fetchone()
+            topic = best_topic(json.loads(topics), text)
+            hits.append(SearchHit(video_id, title, score, topic and topic.get("topic"), topic and topic.get("start")))
+        return hits
+
+    def iter_html(self, video_id, css_href=None):
+        """Render a stored summary as a stream of HTML chunks (see html_utils.iter_html), or None if missing."""
+        record = self.get(video_id)
+        if record is None:
+            return None
+        return iter_html(record["title"], record["topics"], record["video_id"], record["thumbnail_url"], css_href)
+
+    def write_html(self, video_id, filename, css_href=None):
+        """Render a stored summary to a file; returns False if it is missing or cannot be written."""
+        chunks = self.iter_html(video_id, css_href)
+        return chunks is not None and save_html(chunks, filename)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_summary_store():
+    """Return the process-wide store at SUMMARY_DB, or None with SUMMARY_DB_DISABLE=1."""
+    if os.environ.get("SUMMARY_DB_DISABLE") == "1":
+        return None
+    path = os.environ.get("SUMMARY_DB", "summaries.db")
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = SummaryStore(path)
+        return _stores[path]
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SummaryStore(os.path.join(tmp, "summaries.db"))
+        store.save("abc123def45", "Caching in practice", [
+            {"topic": "Cache eviction", "summary": "LRU versus LFU under skewed traffic",
+             "questions": [{"question": "When does LFU win?", "answer": "When popularity is stable."}]},
+        ])
+        store.save("vi000000001", "Bộ nhớ đệm", [
+            {"topic": "Bộ nhớ đệm", "summary": "Độ trễ và bộ nhớ", "questions": []},
+        ])
+        print("has:", store.has("abc123def45"), store.has("missing0000"))
+        for query in ("evict", "lfu popularity", "bo nho"):
+            print(query, "->", [hit.to_dict() for hit in store.search(query)])
@@ -0,0 +1,262 @@
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+class Span:
+    """One timed unit of work (run, node, batch item or attempt) with LLM counters."""
+    def __init__(self, name, kind, parent=None, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.attributes = dict(attributes or {})
+        self.children = []
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration = None
+        self.error = None
+        self.counters = {
+            "llm_calls": 0,
+            "prompt_tokens": 0,
+            "cached_prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cache_hits": 0,
+            "retries": 0,
+            "llm_retries": 0,
+            "llm_seconds": 0.0,
+        }
+        self._lock = threading.Lock()
+        if parent:
+            with parent._lock:
+                parent.children.append(self)
+
+    def add(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+
+    def finish(self, error=None):
+        self.duration = time.perf_counter() - self._start
+        if error is not None:
+            self.error = f"{error.__class__.__name__}: {error}"
+
+    def totals(self):
+        """Counters summed over this span and all of its descendants."""
+        totals = dict(self.counters)
+        for child in self.children:
+            for key, value in child.totals().items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "span_id": self.span_id,
+            "start_time": self.start_time,
+            "duration": round(self.duration, 6) if self.duration is not None else None,
+            "error": self.error,
+            "attributes": self.attributes,
+            "counters": self.counters,
+            "totals": self.totals(),
+            "children": [child.to_dict() for child in self.children],
+        }
+
+class span:
+    """
+    Context manager that opens a child of the current span (no-op when no run is traced).
+    With detached=True a span is opened even outside a traced run, unattached to any
+    tree, so the caller can still read the counters of the work done inside it.
+    """
+    def __init__(self, name, kind, detached=False, **attributes):
+        self.name, self.kind, self.attributes = name, kind, attributes
+        self.detached = detached
+        self.span = None
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is None and not self.detached:
+            return None
+        self.span = Span(self.name, self.kind, parent, self.attributes)
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.span is not None:
+            self.span.finish(exc)
+            _current_span.reset(self._token)
+        return False
+
+def current_span():
+    """Return the innermost active span, or None outside a traced run."""
+    return _current_span.get()
+
+def record_llm_call(prompt_tokens=0, completion_tokens=0, cache_hit=False, seconds=0.0, cached_prompt_tokens=0):
+    """
+    Attribute one LLM call to the current span.
+    cached_prompt_tokens is the part of prompt_tokens the provider served from its prompt cache.
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.add(
+            llm_calls=1,
+            prompt_tokens=prompt_tokens or 0,
+            cached_prompt_tokens=cached_prompt_tokens or 0,
+            completion_tokens=completion_tokens or 0,
+            cache_hits=1 if cache_hit else 0,
+            llm_seconds=seconds,
+        )
+
+def record_llm_retry():
+    """Attribute one transport-level LLM retry (rate limit, server error) to the current span."""
+    current = _current_span.get()
+    if current is not None:
+        current.add(llm_retries=1)
+
+class RunTracer:
+    """
+    Collects the span tree of one pipeline run.
+
+        tracer = RunTracer("youtube_summarizer")
+        with tracer:
+            flow.run(shared)
+        tracer.save("runs")
+    """
+    def __init__(self, name, **attributes):
+        self.run_id = uuid.uuid4().hex
+        self.root = Span(name, "run", attributes=attributes)
+
+    def __enter__(self):
+        self.root = Span(self.root.name, "run", attributes=self.root.attributes)
+        self._token = _current_span.set(self.root)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.root.finish(exc)
+        _current_span.reset(self._token)
+        return False
+
+    def to_dict(self):
+        return {"run_id": self.run_id, **self.root.to_dict()}
+
+    def save(self, directory):
+        """Write the run as structured JSON and return the file path."""
+        os.makedirs(directory, exist_ok=True)
+        label = self.root.attributes.get("video_id") or "run"
+        path = os.path.join(directory, f"trace_{label}_{int(self.root.start_time)}_{self.run_id[:8]}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    def node_summary(self):
+        """Return (name, seconds, totals) for each node span, in execution order."""
+        return [
+            (child.name, child.duration or 0.0, child.totals())
+            for child in self.root.children
+            if child.kind == "node"
+        ]
+
+    def emit_otel(self):
+        """
+        Re-emit the span tree through the OpenTelemetry API, if it is installed.
+        Returns False when opentelemetry is not available.
+        """
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            return False
+        otel_tracer = trace.get_tracer("youtube_summarizer")
+
+        def emit(node, context=None):
+            start_ns = int(node.start_time * 1e9)
+            otel_span = otel_tracer.start_span(node.name, context=context, start_time=start_ns)
+            otel_span.set_attribute("kind", node.kind)
+            for key, value in {**node.attributes, **node.counters}.items():
+                if isinstance(value, (str, bool, int, float)):
+                    otel_span.set_attribute(key, value)
+            if node.error:
+                otel_span.set_attribute("error", node.error)
+            child_context = trace.set_span_in_context(otel_span)
+            for child in node.children:
+                emit(child, child_context)
+            otel_span.end(end_time=start_ns + int((node.duration or 0) * 1e9))
+
+        emit(self.root)
+        return True
+
+_traced_classes = {}
+
+def _traced_class(cls):
+    """Return a subclass of a PocketFlow node class whose runs and exec attempts open spans."""
+    if cls in _traced_classes:
+        return _traced_classes[cls]
+
+    def attempt_span(self, prep_res):
+        retry = getattr(self, "cur_retry", 0)
+        current = _current_span.get()
+        if current is not None and retry:
+            current.add(retries=1)
+        if hasattr(self, "_batch_item_span"):
+            # Each batch item attempt gets its own span under the node
+            label = None
+            if isinstance(prep_res, tuple) and prep_res and isinstance(prep_res[0], dict):
+                label = prep_res[0].get("topic")
+            return span(f"{cls.__name__}.item", "item", item=label, retry=retry)
+        return contextlib.nullcontext()
+
+    if _is_async(cls):
+        async def _run_async(self, shared):
+            with span(cls.__name__, "node"):
+                return await cls._run_async(self, shared)
+
+        async def exec_async(self, prep_res):
+            with attempt_span(self, prep_res):
+                return await cls.exec_async(self, prep_res)
+
+        attrs = {"_run_async": _run_async, "exec_async": exec_async}
+    else:
+        def _run(self, shared):
+            with span(cls.__name__, "node"):
+                return cls._run(self, shared)
+
+        def exec(self, prep_res):
+            with attempt_span(self, prep_res):
+                return cls.exec(self, prep_res)
+
+        attrs = {"_run": _run, "exec": exec}
+    if _is_batch(cls):
+        attrs["_batch_item_span"] = True
+    traced = type(cls.__name__, (cls,), attrs)
+    traced.__qualname__ = cls.__qualname__
+    traced.__module__ = cls.__module__
+    _traced_classes[cls] = traced
+    return traced
+
+def _is_batch(cls):
+    return any(base.__name__ == "BatchNode" for base in cls.__mro__)
+
+def _is_async(cls):
+    return any(base.__name__ == "AsyncNode" for base in cls.__mro__)
+
+def instrument_flow(flow):
+    """
+    Make every node reachable from the flow's start node open a span per run,
+    and batch nodes a span per item attempt. Spans are only recorded while a
+    RunTracer is active, so an instrumented flow can also run untraced.
+    """
+    seen, stack = set(), [flow.start_node]
+    while stack:
+        node = stack.pop()
+        if node is None or id(node) in seen:
+            continue
+        seen.add(id(node))
+        if type(node) not in _traced_classes.values():
+            node.__class__ = _traced_class(type(node))
+        stack.extend(node.successors.values())
+    return flow
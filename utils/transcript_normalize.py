@@ -0,0 +1,179 @@
+import html
+import re
+import unicodedata
+from array import array
+from utils.chunk_utils import estimate_tokens
+from utils.segment_store import SegmentArray
+
+# Caption cleanup applied before any prompt is built. Every token removed here is
+# saved once per prompt that carries the transcript (1 + number of topics).
+
+# Sound and speaker tags: [Music], [Applause], [Âm nhạc], ♪ lyrics ♪, >> speaker changes
+_TAG_RE = re.compile(r"\[[^\[\]]{0,60}\]|♪[^♪]{0,200}♪|[♪♫]|>>")
+_PAREN_TAG_RE = re.compile(
+    r"\((?:music|applause|laughter|laughs|laughing|cheering|inaudible|silence|"
+    r"âm nhạc|nhạc|vỗ tay|tiếng cười|cười)\)",
+    re.IGNORECASE,
+)
+_PUNCTUATION = ".,!?;:\"'()-…"
+
+# Pure hesitation sounds, dropped only with trim_fillers. Words that also carry
+# meaning ("like", "you know", Vietnamese "à", "ừ") are left alone.
+FILLERS = {
+    "en": frozenset({"um", "umm", "uh", "uhh", "uhm", "erm", "er", "ah", "hmm", "mm", "mhm"}),
+    "vi": frozenset({"ờ", "ơ", "ừm", "ờm", "ưm", "hừm", "hmm", "um", "uh"}),
+}
+
+# Longest rolling-caption overlap and repeated phrase (in words) that are looked for
+MAX_OVERLAP_WORDS = 24
+MAX_REPEAT_WORDS = 4
+
+def _key(word):
+    """Comparison form of a word: NFC, lowercase, without surrounding punctuation."""
+    return unicodedata.normalize("NFC", word).strip(_PUNCTUATION).lower()
+
+def strip_tags(text):
+    """Remove non-speech tags and HTML entities from a caption's text."""
+    if "&" in text:
+        text = html.unescape(text)
+    if "[" in text or "♪" in text or "♫" in text or ">>" in text:
+        text = _TAG_RE.sub(" ", text)
+    if "(" in text:
+        text = _PAREN_TAG_RE.sub(" ", text)
+    return text
+
+def overlap_length(tail, keys):
+    """
+    Number of leading words of a caption that repeat the end of the previous ones.
+
+    Auto-generated captions roll: each line repeats the end of the previous line
+    before adding new words. Overlaps of one word only count when they make up
+    the whole caption, since "that that" or "had had" can be real speech.
+    """
+    for k in range(min(len(tail), len(keys), MAX_OVERLAP_WORDS), 0, -1):
+        if tail[-k:] == keys[:k] and (k > 1 or len(keys) == 1):
+            return k
+    return 0
+
+def collapse_repetition(keys):
+    """
+    Indices of the words kept when immediately repeated phrases of up to
+    MAX_REPEAT_WORDS words are reduced to one copy.
+
+    Phrases of two or more words are collapsed when they repeat at all ("thank you
+    thank you"); single words only from three copies on, so emphasis such as
+    "very very" survives.
+    """
+    kept = array("I")
+    i, n = 0, len(keys)
+    while i < n:
+        # A phrase of up to MAX_REPEAT_WORDS words repeats only if its first word recurs that soon
+        if keys[i] not in keys[i + 1:i + 1 + MAX_REPEAT_WORDS]:
+            kept.append(i)
+            i += 1
+            continue
+        for size in range(MAX_REPEAT_WORDS, 0, -1):
+            phrase = keys[i:i + size]
+            if len(phrase) < size or not phrase[0]:
+                continue
+            copies = 1
+            while keys[i + copies * size:i + (copies + 1) * size] == phrase:
+                copies += 1
+            if copies >= (3 if size == 1 else 2):
+                kept.extend(range(i, i + size))
+                i += copies * size
+                break
+        else:
+            kept.append(i)
+            i += 1
+    return kept
+
+def normalize_segments(segments, language="en", trim_fillers=False):
+    """
+    Clean caption segments before prompting.
+
+    Strips non-speech tags, removes the words each rolling caption repeats from the
+    previous one, collapses repeated phrases and, with trim_fillers, drops
+    hesitation sounds for languages in FILLERS. Segments keep their timestamps;
+    segments left empty are dropped.
+
+    Args:
+        segments: list of caption segment dicts, or a SegmentArray
+        language: str, transcript language code ("en", "vi", "en-US", ...)
+        trim_fillers: bool, also remove filler words
+
+    Returns:
+        (SegmentArray, stats) where stats has the token counts before and after,
+        the reduction ratio, segment counts and the words removed by each step.
+    """
+    fillers = FILLERS.get((language or "").split("-")[0].lower(), frozenset()) if trim_fillers else frozenset()
+    removed = {"tags": 0, "overlap": 0, "repetition": 0, "fillers": 0}
+    raw_parts, timings = [], []
+    words, keys, owners = [], [], array("I")
+    # Captions reuse a small vocabulary, so each distinct word and its key are stored once
+    known = {}
+    # Words spoken before this caption, fillers included, as rolling captions repeat them
+    tail = []
+    for segment in segments:
+        text = segment["text"]
+        raw_parts.append(text)
+        segment_words = strip_tags(text).split()
+        removed["tags"] += len(text.split()) - len(segment_words)
+        for j, word in enumerate(segment_words):
+            entry = known.get(word)
+            if entry is None:
+                entry = known[word] = (word, _key(word))
+            segment_words[j] = entry
+        segment_keys = [key for _, key in segment_words]
+
+        k = overlap_length(tail, segment_keys)
+        removed["overlap"] += k
+        tail = (tail + segment_keys[k:])[-MAX_OVERLAP_WORDS:]
+        for word, key in segment_words[k:]:
+            if key in fillers:
+                removed["fillers"] += 1
+                continue
+            words.append(word)
+            keys.append(key)
+            owners.append(len(timings))
+        timings.append((segment["start"], segment["duration"]))
+
+    # Repeated phrases can span caption boundaries, so they are collapsed over the whole stream
+    kept = collapse_repetition(keys)
+    removed["repetition"] = len(keys) - len(kept)
+    texts = [[] for _ in timings]
+    for i in kept:
+        texts[owners[i]].append(words[i])
+    cleaned = [
+        {"text": " ".join(segment_words), "start": start, "duration": duration}
+        for segment_words, (start, duration) in zip(texts, timings) if segment_words
+    ]
+
+    raw_tokens = estimate_tokens(" ".join(raw_parts))
+    normalized = SegmentArray.from_segments(cleaned)
+    tokens = estimate_tokens(normalized.text())
+    return normalized, {
+        "raw_tokens": raw_tokens,
+        "tokens": tokens,
+        "reduction": round(1 - tokens / raw_tokens, 4) if raw_tokens else 0.0,
+        "segments_in": len(timings),
+        "segments_out": len(cleaned),
+        "removed_words": removed,
+    }
+
+if __name__ == "__main__":
+    # Rolling auto-generated captions with tags, stutters and fillers
+    captions = [
+        "[Music]",
+        "um so today we're going to talk",
+        "we're going to talk about caching",
+        "about caching and uh latency",
+        "thank you thank you thank you",
+        "[Applause]",
+        "ờ hôm nay chúng ta nói về bộ nhớ đệm",
+    ]
+    segments = [{"text": text, "start": i * 2.0, "duration": 2.0} for i, text in enumerate(captions)]
+    normalized, stats = normalize_segments(segments, "en", trim_fillers=True)
+    for segment in normalized:
+        print(f"{segment['start']:>4.0f}s  {segment['text']}")
+    print(stats)
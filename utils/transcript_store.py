@@ -0,0 +1,91 @@
+import json
+import os
+import re
+import time
+from utils.segment_store import SegmentArray
+
+class TranscriptStore:
+    """
+    Local store of fetched transcripts, keyed by video ID and language.
+
+    Each transcript is kept as its caption segments with timestamps, in the
+    memory-mappable SegmentArray format. Videos known to have no transcript are
+    remembered for negative_ttl seconds so they fail without touching the network.
+
+    Layout:
+        <root>/<video_id>/<language>.seg    segments (see utils/segment_store.py)
+        <root>/<video_id>/<language>.json   segments stored by older versions, still readable
+        <root>/<video_id>/missing.json      negative cache entry
+    """
+    def __init__(self, root=os.path.join(".cache", "transcripts"), negative_ttl=24 * 3600):
+        self.root = root
+        self.negative_ttl = negative_ttl
+
+    def _video_dir(self, video_id):
+        # Video IDs are [0-9A-Za-z_-]; anything else would escape the store directory
+        if not re.fullmatch(r"[0-9A-Za-z_-]+", video_id or ""):
+            raise ValueError(f"Invalid video ID: {video_id!r}")
+        return os.path.join(self.root, video_id)
+
+    def _write_json(self, path, data):
+        """Write atomically so concurrent readers never see a partial file."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def languages(self, video_id):
+        """Return the languages stored for a video."""
+        video_dir = self._video_dir(video_id)
+        if not os.path.isdir(video_dir):
+            return []
+        return sorted({
+            os.path.splitext(name)[0] for name in os.listdir(video_dir)
+            if name.endswith((".seg", ".json")) and name != "missing.json"
+        })
+
+    def get(self, video_id, languages=None):
+        """
+        Return (language, SegmentArray) for the first stored language in the given
+        preference order (any stored language if none match), or None.
+        """
+        stored = self.languages(video_id)
+        if not stored:
+            return None
+        preferred = [lang for lang in (languages or []) if lang in stored]
+        language = preferred[0] if preferred else stored[0]
+        path = os.path.join(self._video_dir(video_id), language)
+        try:
+            if os.path.exists(f"{path}.seg"):
+                return language, SegmentArray.load(f"{path}.seg")
+            with open(f"{path}.json", encoding="utf-8") as f:
+                return language, SegmentArray.from_segments(json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def put(self, video_id, language, segments):
+        """Store segments (a list of dicts or a SegmentArray) and clear any negative entry for the video."""
+        SegmentArray.from_segments(segments).save(os.path.join(self._video_dir(video_id), f"{language}.seg"))
+        missing_path = os.path.join(self._video_dir(video_id), "missing.json")
+        if os.path.exists(missing_path):
+            os.remove(missing_path)
+
+    def mark_missing(self, video_id, reason=""):
+        """Remember that a video has no transcript."""
+        self._write_json(
+            os.path.join(self._video_dir(video_id), "missing.json"),
+            {"checked_at": time.time(), "reason": reason},
+        )
+
+    def is_missing(self, video_id):
+        """Return the stored reason if the video is known to have no transcript, else None."""
+        path = os.path.join(self._video_dir(video_id), "missing.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("checked_at", 0) > self.negative_ttl:
+            return None
+        return entry.get("reason") or "no transcript available"
@@ -1,5 +1,11 @@
-from youtube_transcript_api import YouTubeTranscriptApi
+import asyncio
+import contextvars
+import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.segment_store import SegmentArray
+from utils.transcript_store import TranscriptStore
 
 def extract_video_id(url):
     """Extract YouTube video ID from URL."""
@@ -17,54 +23,154 @@ def get_thumbnail_url(video_id):
     # Other options include: default.jpg, hqdefault.jpg, mqdefault.jpg, sddefault.jpg
     return f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"
 
-def get_transcript(video_id):
+class TranscriptUnavailable(Exception):
+    """Raised by transcript backends when a video has no usable transcript."""
+
+class YouTubeTranscriptBackend:
     """
-    Get transcript from YouTube video.
-    Tries to fetch in both English and Vietnamese, and falls back to any available language.
+    Transcript backend using youtube_transcript_api.
+
+    Backends expose list_transcripts(video_id), returning objects with
+    language_code, is_generated and fetch() -> list of {"text", "start", "duration"}.
+    Tests can install any object with the same method via set_transcript_backend().
     """
-    try:
-        # First try: specified languages (English and Vietnamese)
+    def list_transcripts(self, video_id):
+        # Imported on first fetch: cached transcripts never need the API client (or requests)
+        from youtube_transcript_api import NoTranscriptFound, TranscriptsDisabled, VideoUnavailable, YouTubeTranscriptApi
         try:
-            transcript_list = YouTubeTranscriptApi.get_transcript(video_id, languages=['en', 'vi'])
-            transcript_text = ' '.join([item['text'] for item in transcript_list])
-            print(f"Successfully retrieved transcript in English or Vietnamese")
-            return transcript_text
-        except Exception as e:
-            print(f"Could not retrieve transcript in English or Vietnamese: {e}")
-            
-        # Second try: auto-generated transcripts for these languages
-        try:
-            transcript_list = YouTubeTranscriptApi.get_transcript(video_id, languages=['en-US', 'vi', 'en'])
-            transcript_text = ' '.join([item['text'] for item in transcript_list])
-            print(f"Successfully retrieved auto-generated transcript")
-            return transcript_text
-        except Exception as e:
-            print(f"Could not retrieve auto-generated transcript: {e}")
-        
-        # Last resort: try any available transcript
-        print("Attempting to retrieve transcript in any available language...")
-        available_transcripts = YouTubeTranscriptApi.list_transcripts(video_id)
-        
-        # Try to find manual transcripts first (they're usually better quality)
-        for transcript in available_transcripts:
-            if not transcript.is_generated:
-                transcript_data = transcript.fetch()
-                transcript_text = ' '.join([item['text'] for item in transcript_data])
-                print(f"Retrieved manual transcript in language: {transcript.language_code}")
-                return transcript_text
-        
-        # If no manual transcript, get any generated one
-        for transcript in available_transcripts:
-            transcript_data = transcript.fetch()
-            transcript_text = ' '.join([item['text'] for item in transcript_data])
-            print(f"Retrieved generated transcript in language: {transcript.language_code}")
-            return transcript_text
-            
-        raise Exception("No transcripts found in any language")
-            
+            if hasattr(YouTubeTranscriptApi, "list_transcripts"):
+                # youtube-transcript-api < 1.0 exposes static methods
+                transcripts = YouTubeTranscriptApi.list_transcripts(video_id)
+            else:
+                transcripts = YouTubeTranscriptApi().list(video_id)
+        except (NoTranscriptFound, TranscriptsDisabled, VideoUnavailable) as e:
+            raise TranscriptUnavailable(str(e)) from e
+        return [_YouTubeTranscript(t) for t in transcripts]
+
+class _YouTubeTranscript:
+    """Adapts a youtube_transcript_api Transcript to plain segment dicts."""
+    def __init__(self, transcript):
+        self._transcript = transcript
+        self.language_code = transcript.language_code
+        self.is_generated = transcript.is_generated
+
+    def fetch(self):
+        data = self._transcript.fetch()
+        if hasattr(data, "to_raw_data"):
+            return data.to_raw_data()
+        return [dict(item) for item in data]
+
+PREFERRED_LANGUAGES = ['en', 'vi', 'en-US']
+
+_transcript_backend = YouTubeTranscriptBackend()
+_transcript_store = TranscriptStore(
+    os.environ.get("TRANSCRIPT_CACHE_DIR", os.path.join(".cache", "transcripts")),
+    negative_ttl=float(os.environ.get("TRANSCRIPT_NEGATIVE_TTL", str(24 * 3600))),
+)
+
+def set_transcript_backend(backend):
+    """Replace the transcript fetch backend (e.g. with a local fake in tests)."""
+    global _transcript_backend
+    _transcript_backend = backend
+
+def set_transcript_store(store):
+    """Replace the local transcript store, or pass None to disable it."""
+    global _transcript_store
+    _transcript_store = store
+
+def _select_transcript(transcripts):
+    """
+    Pick the best transcript: preferred languages first (manual before generated),
+    then any manual transcript, then any generated one.
+    """
+    ranked = sorted(transcripts, key=lambda t: t.is_generated)
+    for language in PREFERRED_LANGUAGES:
+        for transcript in ranked:
+            if transcript.language_code == language:
+                return transcript
+    return ranked[0] if ranked else None
+
+def get_transcript_segments(video_id):
+    """
+    Get the caption segments of a YouTube video.
+    Returns (language_code, SegmentArray) or None if no transcript is available.
+
+    Results are served from the local transcript store when possible, and videos
+    without captions are remembered so they fail without another fetch.
+    """
+    store = _transcript_store
+    if store:
+        cached = store.get(video_id, PREFERRED_LANGUAGES)
+        if cached:
+            return cached
+        reason = store.is_missing(video_id)
+        if reason:
+            print(f"Skipping transcript fetch, known to be unavailable: {reason}")
+            return None
+
+    try:
+        transcript = _select_transcript(_transcript_backend.list_transcripts(video_id))
+        if transcript is None:
+            raise TranscriptUnavailable("No transcripts found in any language")
+        segments = SegmentArray.from_segments(transcript.fetch())
+        kind = "generated" if transcript.is_generated else "manual"
+        print(f"Retrieved {kind} transcript in language: {transcript.language_code}")
+    except TranscriptUnavailable as e:
+        print(f"Error fetching transcript: {e}")
+        if store:
+            store.mark_missing(video_id, str(e))
+        return None
     except Exception as e:
+        # Network and parsing errors may be transient, so they are not negatively cached
         print(f"Error fetching transcript: {e}")
         return None
+
+    if store:
+        store.put(video_id, transcript.language_code, segments)
+    return transcript.language_code, segments
+
+_fetch_pool = None
+_fetch_pool_lock = threading.Lock()
+
+def _get_fetch_pool():
+    """Threads for blocking transcript fetches from async code, sized by TRANSCRIPT_FETCH_CONCURRENCY."""
+    global _fetch_pool
+    with _fetch_pool_lock:
+        if _fetch_pool is None:
+            _fetch_pool = ThreadPoolExecutor(
+                max_workers=int(os.environ.get("TRANSCRIPT_FETCH_CONCURRENCY", "32")),
+                thread_name_prefix="transcript-fetch",
+            )
+        return _fetch_pool
+
+async def aget_transcript_segments(video_id):
+    """
+    Async version of get_transcript_segments.
+
+    Cached transcripts are memory-mapped straight on the event loop. The
+    transcript API client is blocking, so fetches run on a bounded thread pool
+    while the loop keeps driving other pipelines.
+    """
+    store = _transcript_store
+    if store:
+        cached = store.get(video_id, PREFERRED_LANGUAGES)
+        if cached:
+            return cached
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        _get_fetch_pool(), context.run, get_transcript_segments, video_id
+    )
+
+def get_transcript(video_id):
+    """
+    Get transcript from YouTube video.
+    Prefers English and Vietnamese, and falls back to any available language.
+    """
+    result = get_transcript_segments(video_id)
+    if not result:
+        return None
+    _, segments = result
+    return segments.text()
         
 def get_video_title(video_id):
     """Get the title of a YouTube video."""